@@ -0,0 +1,137 @@
+import bisect
+import heapq
+import threading
+import time
+
+from search import tokenize
+
+
+class PrefixIndex:
+    """Type-ahead over short labels using a sorted array and binary search.
+
+    Every word position of a label is a key ('the dark knight', 'dark
+    knight', 'knight'), so a prefix matches the start of any word. Matches
+    are ranked by weight. Results for prefixes of at most short_prefix
+    characters match a large part of the catalog; they are cached and
+    dropped only when an item under that prefix changes.
+    """
+
+    def __init__(self, refresh_interval=300, short_prefix=2, max_results=50):
+        self.refresh_interval = refresh_interval
+        self.short_prefix = short_prefix
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._keys = []  # sorted [(key, item_id)]
+        self._items = {}  # item_id -> (payload, weight, keys)
+        self._short = {}  # short prefix -> ranked [item_id]
+        self._built_at = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def needs_rebuild(self):
+        built_at = self._built_at
+        return built_at is None or time.time() - built_at >= self.refresh_interval
+
+    def is_built(self):
+        return self._built_at is not None
+
+    @staticmethod
+    def _label_keys(label):
+        words = tokenize(label)
+        return tuple(' '.join(words[i:]) for i in range(len(words)))
+
+    def rebuild(self, items):
+        """Replace the index with items, an iterable of (item_id, label, payload, weight)."""
+        keys, entries = [], {}
+        for item_id, label, payload, weight in items:
+            item_keys = self._label_keys(label)
+            entries[item_id] = (payload, weight or 0, item_keys)
+            keys.extend((key, item_id) for key in item_keys)
+        keys.sort()
+
+        with self._lock:
+            self._keys, self._items, self._short = keys, entries, {}
+            self._built_at = time.time()
+
+    # Updates are no-ops until the first rebuild, which reads everything anyway
+
+    def add(self, item_id, label, payload, weight=None):
+        with self._lock:
+            if self._built_at is None:
+                return
+            if weight is None:
+                weight = self._items[item_id][1] if item_id in self._items else 0
+            self._remove(item_id)
+            item_keys = self._label_keys(label)
+            self._items[item_id] = (payload, weight, item_keys)
+            for key in item_keys:
+                bisect.insort(self._keys, (key, item_id))
+            self._forget_short(item_keys)
+
+    def remove(self, item_id):
+        with self._lock:
+            self._remove(item_id)
+
+    def add_weight(self, item_id, delta):
+        with self._lock:
+            entry = self._items.get(item_id)
+            if entry is not None:
+                payload, weight, item_keys = entry
+                self._items[item_id] = (payload, weight + delta, item_keys)
+                self._forget_short(item_keys)
+
+    def _remove(self, item_id):
+        # Called with the lock held
+        entry = self._items.pop(item_id, None)
+        if entry is None:
+            return
+        for key in entry[2]:
+            index = bisect.bisect_left(self._keys, (key, item_id))
+            if index < len(self._keys) and self._keys[index] == (key, item_id):
+                del self._keys[index]
+        self._forget_short(entry[2])
+
+    def _forget_short(self, item_keys):
+        # Called with the lock held
+        for key in item_keys:
+            for length in range(1, self.short_prefix + 1):
+                self._short.pop(key[:length], None)
+
+    def complete(self, prefix, limit):
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+        limit = min(limit, self.max_results)
+        with self._lock:
+            ranked = self._short.get(prefix) if len(prefix) <= self.short_prefix else None
+            if ranked is None:
+                ranked = self._rank(prefix)
+                if len(prefix) <= self.short_prefix:
+                    self._short[prefix] = ranked
+            return [self._items[item_id][0] for item_id in ranked[:limit]]
+
+    def _rank(self, prefix):
+        # Called with the lock held
+        matches = set()
+        index = bisect.bisect_left(self._keys, (prefix,))
+        while index < len(self._keys) and self._keys[index][0].startswith(prefix):
+            matches.add(self._keys[index][1])
+            index += 1
+        return heapq.nsmallest(
+            self.max_results, matches,
+            key=lambda item_id: (-self._items[item_id][1], self._items[item_id][2][0], item_id)
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'keys': len(self._keys),
+                'cached_prefixes': len(self._short),
+                'built_at': self._built_at,
+            }
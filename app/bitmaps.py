@@ -0,0 +1,325 @@
+import bisect
+import threading
+import time
+from array import array
+
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+CHUNK_BYTES = (1 << CHUNK_BITS) // 8
+ARRAY_MAX = 4096  # Past this many ids a chunk is smaller as a bitmap than as an array of uint16
+
+
+def _to_int(container):
+    if isinstance(container, int):
+        return container
+    bits = bytearray(CHUNK_BYTES)
+    for low in container:
+        bits[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _members(container):
+    """The ids in a container, ascending."""
+    if not isinstance(container, int):
+        return container
+    members = []
+    for i, byte in enumerate(container.to_bytes(CHUNK_BYTES, 'little')):
+        while byte:
+            low_bit = byte & -byte
+            members.append(i * 8 + low_bit.bit_length() - 1)
+            byte ^= low_bit
+    return members
+
+
+def _filter(lows, container, keep):
+    # The array container lows, keeping ids whose membership in the bitmap container equals keep
+    bits = container.to_bytes(CHUNK_BYTES, 'little')
+    return array('H', (low for low in lows if bool(bits[low >> 3] >> (low & 7) & 1) == keep))
+
+
+def _count(container):
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+def _and(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return a & b
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return _filter(a, b, True)
+    shared = set(b)
+    return array('H', (low for low in a if low in shared))
+
+
+def _andnot(a, b):
+    if isinstance(a, int):
+        return a & ~_to_int(b)
+    if isinstance(b, int):
+        return _filter(a, b, False)
+    excluded = set(b)
+    return array('H', (low for low in a if low not in excluded))
+
+
+class Bitmap:
+    """A compressed set of non-negative ids, after Roaring bitmaps.
+
+    A set of at most ARRAY_MAX ids is a single sorted array of them. Larger
+    sets are split into chunks of 2**16 ids by their high bits. A chunk
+    with few ids keeps them as a sorted array of uint16, and a chunk with
+    more than ARRAY_MAX keeps a Python int used as a 65536-bit bitmap. So a
+    sparse set costs a few bytes per id, and a dense one at most a bit per
+    id.
+    """
+
+    __slots__ = ('_ids', '_chunks')
+
+    def __init__(self, ids=None, chunks=None):
+        self._ids = ids if chunks is None else None  # sorted array('q') while the set is small
+        self._chunks = chunks  # high bits -> container, once it is not
+        if ids is None and chunks is None:
+            self._ids = array('q')
+
+    @classmethod
+    def from_ids(cls, ids):
+        ids = sorted(set(ids))
+        if len(ids) <= ARRAY_MAX:
+            return cls(ids=array('q', ids))
+        return cls(chunks=cls._chunk(ids))
+
+    @staticmethod
+    def _chunk(ids):
+        # ids sorted and unique
+        chunks = {}
+        start = 0
+        while start < len(ids):
+            high = ids[start] >> CHUNK_BITS
+            end = bisect.bisect_left(ids, (high + 1) << CHUNK_BITS, start)
+            base = high << CHUNK_BITS
+            container = array('H', [i - base for i in ids[start:end]] if base else ids[start:end])
+            chunks[high] = _to_int(container) if len(container) > ARRAY_MAX else container
+            start = end
+        return chunks
+
+    def add(self, i):
+        if self._chunks is None:
+            position = bisect.bisect_left(self._ids, i)
+            if position == len(self._ids) or self._ids[position] != i:
+                self._ids.insert(position, i)
+                if len(self._ids) > ARRAY_MAX:
+                    self._ids, self._chunks = None, self._chunk(self._ids)
+            return
+
+        high, low = i >> CHUNK_BITS, i & CHUNK_MASK
+        container = self._chunks.get(high)
+        if container is None:
+            self._chunks[high] = array('H', [low])
+        elif isinstance(container, int):
+            self._chunks[high] = container | (1 << low)
+        else:
+            position = bisect.bisect_left(container, low)
+            if position == len(container) or container[position] != low:
+                container.insert(position, low)
+                if len(container) > ARRAY_MAX:
+                    self._chunks[high] = _to_int(container)
+
+    def discard(self, i):
+        if self._chunks is None:
+            position = bisect.bisect_left(self._ids, i)
+            if position < len(self._ids) and self._ids[position] == i:
+                del self._ids[position]
+            return
+
+        high, low = i >> CHUNK_BITS, i & CHUNK_MASK
+        container = self._chunks.get(high)
+        if container is None:
+            return
+        if isinstance(container, int):
+            container &= ~(1 << low)
+        else:
+            position = bisect.bisect_left(container, low)
+            if position < len(container) and container[position] == low:
+                del container[position]
+        if not container:
+            del self._chunks[high]
+        elif isinstance(container, int):
+            self._chunks[high] = container
+
+    def __and__(self, other):
+        if self._chunks is None:
+            return Bitmap(ids=array('q', (i for i in self._ids if i in other)))
+        if other._chunks is None:
+            return Bitmap(ids=array('q', (i for i in other._ids if i in self)))
+        chunks = {}
+        for high, container in self._chunks.items():
+            if high in other._chunks:
+                result = _and(container, other._chunks[high])
+                if result:
+                    chunks[high] = result
+        return Bitmap(chunks=chunks)
+
+    def __sub__(self, other):
+        if self._chunks is None:
+            return Bitmap(ids=array('q', (i for i in self._ids if i not in other)))
+        other_chunks = self._chunk(other._ids) if other._chunks is None else other._chunks
+        chunks = {}
+        for high, container in self._chunks.items():
+            result = _andnot(container, other_chunks[high]) if high in other_chunks else container
+            if result:
+                chunks[high] = result
+        return Bitmap(chunks=chunks)
+
+    def __len__(self):
+        if self._chunks is None:
+            return len(self._ids)
+        return sum(_count(container) for container in self._chunks.values())
+
+    def __contains__(self, i):
+        if self._chunks is None:
+            position = bisect.bisect_left(self._ids, i)
+            return position < len(self._ids) and self._ids[position] == i
+        container = self._chunks.get(i >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = i & CHUNK_MASK
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        position = bisect.bisect_left(container, low)
+        return position < len(container) and container[position] == low
+
+    def page(self, after, limit):
+        """Up to limit ids greater than after, ascending."""
+        if self._chunks is None:
+            start = bisect.bisect_right(self._ids, after)
+            return self._ids[start:start + limit].tolist()
+        ids = []
+        for high in sorted(self._chunks):
+            if (high + 1) << CHUNK_BITS <= after + 1:
+                continue
+            base = high << CHUNK_BITS
+            for low in _members(self._chunks[high]):
+                if base + low > after:
+                    ids.append(base + low)
+                    if len(ids) == limit:
+                        return ids
+        return ids
+
+    def nbytes(self):
+        if self._chunks is None:
+            return self._ids.itemsize * len(self._ids)
+        return sum(
+            CHUNK_BYTES if isinstance(container, int) else container.itemsize * len(container)
+            for container in self._chunks.values()
+        )
+
+
+class MovieBitmaps:
+    """Per-genre and per-actor bitmaps over movie ids for boolean catalog filters.
+
+    Every query starts from the bitmap of all movies, so a deleted movie
+    only needs to be cleared there. Writes in this process update the
+    bitmaps immediately. A periodic rebuild picks up writes made by other
+    workers.
+    """
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._movies = Bitmap()
+        self._genres = {}  # genre -> Bitmap
+        self._actors = {}  # actor_id -> Bitmap
+        self._built_at = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def needs_rebuild(self):
+        built_at = self._built_at
+        return built_at is None or time.time() - built_at >= self.refresh_interval
+
+    def is_built(self):
+        return self._built_at is not None
+
+    def rebuild(self, movie_ids, movie_genres, movie_actors):
+        """Replace the bitmaps.
+
+        movie_ids yields movie ids, movie_genres (movie_id, genre) and
+        movie_actors (movie_id, actor_id).
+        """
+        movies = Bitmap.from_ids(movie_ids)
+        genres, actors = {}, {}
+        for movie_id, genre in movie_genres:
+            genres.setdefault(genre, []).append(movie_id)
+        for movie_id, actor_id in movie_actors:
+            actors.setdefault(actor_id, []).append(movie_id)
+        genres = {genre: Bitmap.from_ids(ids) for genre, ids in genres.items()}
+        actors = {actor_id: Bitmap.from_ids(ids) for actor_id, ids in actors.items()}
+
+        with self._lock:
+            self._movies, self._genres, self._actors = movies, genres, actors
+            self._built_at = time.time()
+
+    def add_movie(self, movie_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._movies.add(movie_id)
+
+    def remove_movie(self, movie_id):
+        with self._lock:
+            self._movies.discard(movie_id)
+
+    def add_genre(self, movie_id, genre):
+        with self._lock:
+            if self._built_at is not None:
+                self._genres.setdefault(genre, Bitmap()).add(movie_id)
+
+    def remove_genre(self, genre):
+        with self._lock:
+            self._genres.pop(genre, None)
+
+    def add_actor(self, movie_id, actor_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._actors.setdefault(actor_id, Bitmap()).add(movie_id)
+
+    def remove_actor(self, actor_id):
+        with self._lock:
+            self._actors.pop(actor_id, None)
+
+    def query(self, genres=(), exclude_genres=(), actors=(), after=0, limit=100):
+        """Movies in every genre of genres, none of exclude_genres, featuring every actor of actors.
+
+        Returns (total, page of up to limit movie ids after after, {genre: count within the result}).
+        """
+        with self._lock:
+            result = self._movies
+            for genre in genres:
+                result = result & self._genres.get(genre, Bitmap())
+            for actor_id in actors:
+                result = result & self._actors.get(actor_id, Bitmap())
+            for genre in exclude_genres:
+                if genre in self._genres:
+                    result = result - self._genres[genre]
+
+            facets = {}
+            for genre, bitmap in self._genres.items():
+                count = len(result & bitmap)
+                if count:
+                    facets[genre] = count
+            return len(result), result.page(after, limit), facets
+
+    def stats(self):
+        with self._lock:
+            return {
+                'movies': len(self._movies),
+                'genres': len(self._genres),
+                'actors': len(self._actors),
+                'bytes': self._movies.nbytes() + sum(
+                    bitmap.nbytes() for bitmaps in (self._genres, self._actors) for bitmap in bitmaps.values()
+                ),
+                'built_at': self._built_at,
+            }
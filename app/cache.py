@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU cache with per-entry expiry and tag based invalidation.
+
+    Entries expire at the time given to set() (or after the default ttl) and
+    are dropped lazily when read. Tags group entries so that everything
+    derived from, say, one user can be invalidated at once. With maxbytes
+    set, the least recently used entries are also evicted once the sizes
+    reported by sizeof(value) add up to more than that.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, maxbytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags, size)
+        self._tags = {}  # tag -> set of keys
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at=None, tags=()):
+        if self.ttl is not None:
+            ttl_expiry = time.time() + self.ttl
+            expires_at = ttl_expiry if expires_at is None else min(expires_at, ttl_expiry)
+
+        size = self.sizeof(value) if self.sizeof else 0
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return  # Would evict everything else and still not fit
+            self._entries[key] = (value, expires_at, tuple(tags), size)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize or (
+                    self.maxbytes is not None and self._bytes > self.maxbytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        # Called with the lock held
+        _, _, tags, size = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+            if self.maxbytes is not None:
+                stats.update({'bytes': self._bytes, 'maxbytes': self.maxbytes})
+            return stats
+
+
+class VersionedValue:
+    """A single value loaded from the database and reused until its version moves.
+
+    The version is re-read at most every check_interval seconds, so worker
+    processes notice each other's writes within that window. Writes made by
+    this process call invalidate() and are seen by the next get().
+    """
+
+    def __init__(self, load, read_version, check_interval=1.0):
+        self.load = load
+        self.read_version = read_version
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.checks = 0
+        self.loads = 0
+
+    def get(self, cursor, check=False):
+        """Return (version, value).
+
+        cursor is called for a database cursor only when the version has to
+        be checked. check=True forces that check regardless of the interval.
+        """
+        with self._lock:
+            now = time.time()
+            if (self._version is not None and not check
+                    and now - self._checked_at < self.check_interval):
+                self.hits += 1
+                return self._version, self._value
+
+            db_cursor = cursor()
+            version = self.read_version(db_cursor)
+            self.checks += 1
+            self._checked_at = now
+            if version != self._version:
+                self._value = self.load(db_cursor)
+                self._version = version
+                self.loads += 1
+            return self._version, self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._value = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self._version,
+                'hits': self.hits,
+                'checks': self.checks,
+                'loads': self.loads,
+            }
@@ -0,0 +1,274 @@
+"""Bulk import of movies, actors, genres and their links.
+
+Records are read one at a time from the request body and buffered per
+table. Every batch_size records the buffers are written with executemany,
+parents before the rows referring to them, and committed as one
+transaction together with the version bumps. When a statement fails,
+its rows are rolled back to a savepoint and written again one by one, so
+only the rows at fault are reported and the rest of the batch is kept.
+
+Movies and actors given with an id are inserted under that id or update
+the existing row. Links that already exist are skipped. Re-sending an
+import that stopped part way is therefore safe as long as every movie and
+actor carries its id.
+"""
+import csv
+import io
+import json
+import time
+
+import pymysql
+
+from versions import bump, bump_many, bump_related
+
+KINDS = ('genre', 'movie', 'actor', 'movie_actor', 'movie_genre')  # In the order batches are written
+
+INSERT_SQL = {
+    'genre': "INSERT IGNORE INTO ref_movie_genres (movie_genres_type) VALUES (%s)",
+    # A NULL id takes the next AUTO_INCREMENT value
+    'movie': """
+        INSERT INTO movies (movie_id, movie_title) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE movie_title = VALUES(movie_title)
+    """,
+    'actor': """
+        INSERT INTO actors (actor_id, first_name, last_name) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE first_name = VALUES(first_name), last_name = VALUES(last_name)
+    """,
+    'movie_actor': "INSERT INTO movie_actors (movies_movie_id, actors_actor_id) VALUES (%s, %s)",
+    'movie_genre': "INSERT INTO movie_genres (movies_movie_id, ref_movie_genres_movie_genres_type) VALUES (%s, %s)",
+}
+
+EXISTING_LINKS_SQL = {
+    'movie_actor': "SELECT movies_movie_id, actors_actor_id FROM movie_actors WHERE movies_movie_id IN",
+    'movie_genre': """
+        SELECT movies_movie_id, ref_movie_genres_movie_genres_type FROM movie_genres WHERE movies_movie_id IN
+    """,
+}
+
+
+def ndjson_records(stream, default_type=None):
+    """(line number, record) for every non-blank line; a malformed line yields its ValueError."""
+    for line, text in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            yield line, ValueError(f'Invalid JSON: {e}')
+            continue
+        if not isinstance(record, dict):
+            yield line, ValueError('Each line must be a JSON object')
+            continue
+        record.setdefault('type', default_type)
+        yield line, record
+
+
+def csv_records(stream, default_type=None):
+    """(line number, record) for every row under the header; empty cells are None."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        record = {name: value if value != '' else None for name, value in row.items() if name is not None}
+        if not record.get('type'):
+            record['type'] = default_type
+        yield reader.line_num, record
+
+
+def _id(record, name, required=True):
+    value = record.get(name)
+    if value is None:
+        if required:
+            raise ValueError(f'{name} is required')
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer') from None
+
+
+def _text(record, *names):
+    values = tuple(record.get(name) for name in names)
+    if not all(isinstance(value, str) and value.strip() for value in values):
+        raise ValueError(f"{' and '.join(names)} {'is' if len(names) == 1 else 'are'} required")
+    return values
+
+
+class CatalogImport:
+    """Writes parsed records to the catalog in batched transactions and reports on them."""
+
+    def __init__(self, connection, batch_size=1000, max_errors=100):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self._cursor = connection.cursor()
+        # Genre links are stored with the genre's own spelling, matched case-insensitively
+        self._cursor.execute("SELECT movie_genres_type FROM ref_movie_genres")
+        self._genres = {name.casefold(): name for name, in self._cursor.fetchall()}
+        self._pending = {kind: [] for kind in KINDS}  # kind -> [(line, params)]
+        self._pending_count = 0
+        self.rows = 0
+        self.batches = 0
+        self.imported = dict.fromkeys(KINDS, 0)
+        self.errors = []
+        self.error_count = 0
+        self._started = time.time()
+
+    def run(self, records):
+        """Import every (line, record) of records and return the report."""
+        for line, record in records:
+            self.add(line, record)
+        self.flush()
+        return self.report()
+
+    def add(self, line, record):
+        self.rows += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            kind = record.get('type')
+            if kind not in KINDS:
+                raise ValueError(f"Unknown record type: {kind}" if kind else 'type is required')
+            params = getattr(self, f'_{kind}_params')(record)
+        except ValueError as e:
+            self._error(line, str(e))
+            return
+        self._pending[kind].append((line, params))
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size:
+            self.flush()
+
+    def _genre_params(self, record):
+        genre, = _text(record, 'movie_genres_type')
+        self._genres.setdefault(genre.casefold(), genre)
+        return (genre,)
+
+    def _movie_params(self, record):
+        # movie_title as stored, or title as sent to POST /movies
+        title = record.get('movie_title') or record.get('title')
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError('movie_title is required')
+        return _id(record, 'movie_id', required=False), title
+
+    def _actor_params(self, record):
+        return (_id(record, 'actor_id', required=False), *_text(record, 'first_name', 'last_name'))
+
+    def _movie_actor_params(self, record):
+        return _id(record, 'movie_id'), _id(record, 'actor_id')
+
+    def _movie_genre_params(self, record):
+        movie_id = _id(record, 'movie_id')
+        name, = _text(record, 'movie_genres_type')
+        genre = self._genres.get(name.casefold())
+        if not genre:
+            raise ValueError(f'Genre not found: {name}')
+        return movie_id, genre
+
+    def flush(self):
+        """Write the pending records in one transaction."""
+        if not self._pending_count:
+            return
+        imported = {}
+        try:
+            for kind in KINDS:
+                rows = self._pending[kind]
+                if kind in EXISTING_LINKS_SQL:
+                    rows = self._new_links(kind, rows)
+                written = self._write(kind, rows)
+                if written:
+                    self._bump(kind, written)
+                # Links that already existed count as imported
+                imported[kind] = len(self._pending[kind]) - len(rows) + len(written)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        for kind, count in imported.items():
+            self.imported[kind] += count
+        self.batches += 1
+        self._pending = {kind: [] for kind in KINDS}
+        self._pending_count = 0
+
+    def _new_links(self, kind, rows):
+        # Links already stored, or repeated within the batch, are not written again
+        movie_ids = sorted({params[0] for _, params in rows})
+        existing = set()
+        if movie_ids:
+            self._cursor.execute(
+                f"{EXISTING_LINKS_SQL[kind]} ({', '.join(['%s'] * len(movie_ids))})", movie_ids
+            )
+            existing = {self._link_key(row) for row in self._cursor.fetchall()}
+        new = []
+        for line, params in rows:
+            key = self._link_key(params)
+            if key not in existing:
+                existing.add(key)
+                new.append((line, params))
+        return new
+
+    @staticmethod
+    def _link_key(params):
+        movie_id, other = params
+        return movie_id, other.casefold() if isinstance(other, str) else other
+
+    def _write(self, kind, rows):
+        """Insert rows, returning those written; a failing statement is retried a row at a time."""
+        if not rows:
+            return []
+        # executemany may split the rows over several statements; undo all of them before the retry
+        self._cursor.execute("SAVEPOINT import_rows")
+        try:
+            self._cursor.executemany(INSERT_SQL[kind], [params for _, params in rows])
+            return rows
+        except (pymysql.err.IntegrityError, pymysql.err.DataError):
+            self._cursor.execute("ROLLBACK TO SAVEPOINT import_rows")
+        written = []
+        for line, params in rows:
+            try:
+                self._cursor.execute(INSERT_SQL[kind], params)
+                written.append((line, params))
+            except (pymysql.err.IntegrityError, pymysql.err.DataError) as e:
+                self._error(line, e.args[1] if len(e.args) > 1 else str(e))
+        return written
+
+    def _bump(self, kind, rows):
+        # Same invalidations as the single-row endpoints, once per batch
+        params = [params for _, params in rows]
+        if kind == 'genre':
+            bump(self._cursor, 'genres', '*')
+        elif kind in ('movie', 'actor'):
+            ids = sorted({row[0] for row in params if row[0] is not None})
+            if not ids:
+                return  # New rows without an id have no cached representation yet
+            bump_many(self._cursor, kind, ids)
+            placeholders = ', '.join(['%s'] * len(ids))
+            if kind == 'movie':
+                bump_related(self._cursor, 'actor', f"""
+                    SELECT actors_actor_id AS entity_key FROM movie_actors WHERE movies_movie_id IN ({placeholders})
+                """, ids)
+                bump_related(self._cursor, 'genre', f"""
+                    SELECT ref_movie_genres_movie_genres_type AS entity_key FROM movie_genres
+                    WHERE movies_movie_id IN ({placeholders})
+                """, ids)
+            else:
+                bump_related(self._cursor, 'movie', f"""
+                    SELECT movies_movie_id AS entity_key FROM movie_actors WHERE actors_actor_id IN ({placeholders})
+                """, ids)
+        else:
+            bump_many(self._cursor, 'movie', [movie_id for movie_id, _ in params])
+            bump_many(self._cursor, 'actor' if kind == 'movie_actor' else 'genre', [other for _, other in params])
+
+    def _error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'error': message})
+
+    def report(self):
+        seconds = time.time() - self._started
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.error_count,
+            'errors': self.errors,
+            'batches': self.batches,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.rows / seconds) if seconds else None,
+        }
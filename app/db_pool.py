@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class PooledConnection:
+    """Proxy around a raw DB-API connection checked out from a ConnectionPool.
+
+    Everything is delegated to the underlying connection except close(), which
+    hands the connection back to the pool instead of tearing down the socket.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._raw, self._created_at)
+
+    def invalidate(self):
+        """Discard the underlying connection instead of returning it to the pool."""
+        if self._released:
+            return
+        self._released = True
+        self._pool._discard(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe bounded pool of DB-API connections.
+
+    - min_size connections are kept open while idle (opened lazily on first use)
+    - max_size connections are kept in the pool; up to max_overflow extra
+      connections may be opened under load and are closed when returned
+    - idle connections older than idle_timeout seconds are closed
+    - connections older than recycle seconds are replaced on checkout/return
+    - checked out connections are pinged to make sure they are still alive
+    """
+
+    def __init__(self, creator, min_size=1, max_size=10, max_overflow=5,
+                 timeout=30, idle_timeout=300, recycle=3600, ping=True):
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self._creator = creator
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.recycle = recycle
+        self.ping = ping
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (raw, created_at, returned_at)
+        self._open = 0
+        self._in_use = 0
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'closed': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+            'timeouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+        }
+
+    def connect(self):
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        wait_started = None
+
+        while True:
+            with self._lock:
+                self._close_expired_idle()
+                if self._idle:
+                    raw, created_at, _ = self._idle.pop()
+                    self._in_use += 1
+                    create = False
+                elif self._open < self.max_size + self.max_overflow:
+                    self._open += 1
+                    self._in_use += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout('Timed out waiting for a database connection')
+                    if not waited:
+                        waited = True
+                        wait_started = time.monotonic()
+                        self._stats['waits'] += 1
+                    self._lock.wait(remaining)
+                    continue
+
+                self._stats['checkouts'] += 1
+                if waited:
+                    self._stats['wait_time_total'] += time.monotonic() - wait_started
+
+            if create:
+                try:
+                    raw = self._creator()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                        self._in_use -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self._stats['created'] += 1
+                return PooledConnection(self, raw, time.monotonic())
+
+            if self._is_usable(raw, created_at):
+                return PooledConnection(self, raw, created_at)
+
+            # Stale or dead connection: drop it and try again
+            self._discard(raw)
+
+    def _is_usable(self, raw, created_at):
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            with self._lock:
+                self._stats['recycled'] += 1
+            return False
+        if self.ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._lock:
+                    self._stats['ping_failures'] += 1
+                return False
+        return True
+
+    def _release(self, raw, created_at):
+        try:
+            # Never hand out a connection with a half-finished transaction
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+            keep = (len(self._idle) < self.max_size and
+                    not (self.recycle and now - created_at > self.recycle))
+            if keep:
+                self._idle.append((raw, created_at, now))
+            else:
+                self._open -= 1
+                self._stats['closed'] += 1
+            self._lock.notify()
+
+        if not keep:
+            self._close_raw(raw)
+
+    def _discard(self, raw):
+        with self._lock:
+            self._in_use -= 1
+            self._open -= 1
+            self._stats['closed'] += 1
+            self._lock.notify()
+        self._close_raw(raw)
+
+    def _close_expired_idle(self):
+        # Called with the lock held; the oldest returned connections sit on the left
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        while len(self._idle) > self.min_size and now - self._idle[0][2] > self.idle_timeout:
+            raw, _, _ = self._idle.popleft()
+            self._open -= 1
+            self._stats['closed'] += 1
+            self._close_raw(raw)
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Close every idle connection. Checked out connections are closed on return."""
+        with self._lock:
+            while self._idle:
+                raw, _, _ = self._idle.pop()
+                self._open -= 1
+                self._stats['closed'] += 1
+                self._close_raw(raw)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'overflow': max(0, self._open - self.max_size),
+            })
+        return stats
+
+
+class SharedConnection:
+    """View of a connection shared by several callers within one unit of work.
+
+    close() is a no-op so that each caller can keep its usual open/close
+    pattern; the owner of the unit of work releases the underlying
+    connection once at the end.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
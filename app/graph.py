@@ -0,0 +1,220 @@
+import bisect
+import heapq
+import threading
+import time
+from array import array
+from collections import Counter
+
+
+def _csr(sources, targets, count):
+    # Offsets and neighbours such that node i links to neighbours[offsets[i]:offsets[i + 1]]
+    offsets = array('q', bytes(8 * (count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    free = array('q', offsets[:-1])
+    neighbours = array('i', bytes(4 * len(targets)))
+    for source, target in zip(sources, targets):
+        neighbours[free[source]] = target
+        free[source] += 1
+    return offsets, neighbours
+
+
+def _index_of(ids, key):
+    i = bisect.bisect_left(ids, key)
+    return i if i < len(ids) and ids[i] == key else None
+
+
+class CoStarGraph:
+    """The actor-movie graph from movie_actors, for co-stars and degrees of separation.
+
+    Both directions are stored CSR-style in flat integer arrays: actors and
+    movies are numbered by their position in sorted id arrays, and the movies
+    of actor i are actor_movies[actor_offsets[i]:actor_offsets[i + 1]]. That
+    is about 24 bytes per cast entry, where sets of ids would take hundreds.
+
+    The arrays cannot grow in place, so cast entries added in this process
+    since the last rebuild are kept in a small overlay of sets, and deleted
+    actors and movies are masked out. A periodic rebuild folds both in and
+    picks up writes made by other workers.
+    """
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._actor_ids = array('q')
+        self._movie_ids = array('q')
+        self._actor_offsets, self._actor_movies = array('q', [0]), array('i')
+        self._movie_offsets, self._movie_actors = array('q', [0]), array('i')
+        self._added_movies = {}  # actor_id -> movie ids added since the rebuild
+        self._added_actors = {}  # movie_id -> actor ids added since the rebuild
+        self._removed_actors = set()
+        self._removed_movies = set()
+        self._built_at = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def needs_rebuild(self):
+        built_at = self._built_at
+        return built_at is None or time.time() - built_at >= self.refresh_interval
+
+    def is_built(self):
+        return self._built_at is not None
+
+    def rebuild(self, cast):
+        """Replace the graph with cast, an iterable of (actor_id, movie_id)."""
+        # Build off to the side so queries keep using the old graph meanwhile
+        cast_actors, cast_movies = array('q'), array('q')
+        for actor_id, movie_id in cast:
+            cast_actors.append(actor_id)
+            cast_movies.append(movie_id)
+
+        actor_ids = array('q', sorted(set(cast_actors)))
+        movie_ids = array('q', sorted(set(cast_movies)))
+        actor_index = {actor_id: i for i, actor_id in enumerate(actor_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        actors = array('i', (actor_index[actor_id] for actor_id in cast_actors))
+        movies = array('i', (movie_index[movie_id] for movie_id in cast_movies))
+        del cast_actors, cast_movies, actor_index, movie_index
+
+        actor_offsets, actor_movies = _csr(actors, movies, len(actor_ids))
+        movie_offsets, movie_actors = _csr(movies, actors, len(movie_ids))
+
+        with self._lock:
+            self._clear()
+            self._actor_ids, self._movie_ids = actor_ids, movie_ids
+            self._actor_offsets, self._actor_movies = actor_offsets, actor_movies
+            self._movie_offsets, self._movie_actors = movie_offsets, movie_actors
+            self._built_at = time.time()
+
+    def add_cast(self, actor_id, movie_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._added_movies.setdefault(actor_id, set()).add(movie_id)
+                self._added_actors.setdefault(movie_id, set()).add(actor_id)
+
+    def remove_actor(self, actor_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._removed_actors.add(actor_id)
+                self._added_movies.pop(actor_id, None)
+
+    def remove_movie(self, movie_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._removed_movies.add(movie_id)
+                self._added_actors.pop(movie_id, None)
+
+    def _movies_of(self, actor_id):
+        # Called with the lock held
+        if actor_id in self._removed_actors:
+            return []
+        movies = set(self._added_movies.get(actor_id, ()))
+        i = _index_of(self._actor_ids, actor_id)
+        if i is not None:
+            movie_ids = self._movie_ids
+            movies.update(movie_ids[j] for j in self._actor_movies[self._actor_offsets[i]:self._actor_offsets[i + 1]])
+        return [movie_id for movie_id in movies if movie_id not in self._removed_movies]
+
+    def _actors_of(self, movie_id):
+        # Called with the lock held
+        if movie_id in self._removed_movies:
+            return []
+        actors = set(self._added_actors.get(movie_id, ()))
+        i = _index_of(self._movie_ids, movie_id)
+        if i is not None:
+            actor_ids = self._actor_ids
+            actors.update(actor_ids[j] for j in self._movie_actors[self._movie_offsets[i]:self._movie_offsets[i + 1]])
+        return [actor_id for actor_id in actors if actor_id not in self._removed_actors]
+
+    def costars(self, actor_id, limit):
+        """Return up to limit (costar_id, shared_movies), most shared movies first."""
+        with self._lock:
+            shared = Counter()
+            for movie_id in self._movies_of(actor_id):
+                shared.update(self._actors_of(movie_id))
+        shared.pop(actor_id, None)
+        return heapq.nsmallest(limit, shared.items(), key=lambda item: (-item[1], item[0]))
+
+    def _neighbours(self, node):
+        # Nodes are actor_id * 2 for actors and movie_id * 2 + 1 for movies
+        if node & 1:
+            return [actor_id * 2 for actor_id in self._actors_of(node >> 1)]
+        return [movie_id * 2 + 1 for movie_id in self._movies_of(node >> 1)]
+
+    def path(self, source, target):
+        """Shortest chain [actor, movie, actor, ..., actor] of ids linking two actors, or None.
+
+        Bidirectional BFS: each round expands one whole level of whichever
+        side has the smaller frontier, so the search only reaches about as
+        far as half the path from each end. If the actors are not
+        connected it stops once the smaller component is exhausted.
+        """
+        if source == target:
+            return [source]
+        start, goal = source * 2, target * 2
+        with self._lock:
+            # node -> (parent, depth) for the side searching from each end
+            forward, backward = {start: (None, 0)}, {goal: (None, 0)}
+            forward_frontier, backward_frontier = [start], [goal]
+            while forward_frontier and backward_frontier:
+                swapped = len(forward_frontier) > len(backward_frontier)
+                if swapped:
+                    forward, backward = backward, forward
+                    forward_frontier, backward_frontier = backward_frontier, forward_frontier
+
+                depth = forward[forward_frontier[0]][1] + 1
+                meeting, meeting_length = None, None
+                next_frontier = []
+                for node in forward_frontier:
+                    for neighbour in self._neighbours(node):
+                        if neighbour in forward:
+                            continue
+                        forward[neighbour] = (node, depth)
+                        next_frontier.append(neighbour)
+                        if neighbour in backward:
+                            length = depth + backward[neighbour][1]
+                            if meeting_length is None or length < meeting_length:
+                                meeting, meeting_length = neighbour, length
+                forward_frontier = next_frontier
+
+                if swapped:
+                    forward, backward = backward, forward
+                    forward_frontier, backward_frontier = backward_frontier, forward_frontier
+                if meeting is not None:
+                    return self._join(forward, backward, meeting)
+        return None
+
+    def _join(self, forward, backward, meeting):
+        nodes = []
+        node = meeting
+        while node is not None:
+            nodes.append(node)
+            node = forward[node][0]
+        nodes.reverse()
+        node = backward[meeting][0]
+        while node is not None:
+            nodes.append(node)
+            node = backward[node][0]
+        return [node >> 1 for node in nodes]
+
+    def stats(self):
+        with self._lock:
+            arrays = (self._actor_ids, self._movie_ids, self._actor_offsets,
+                      self._actor_movies, self._movie_offsets, self._movie_actors)
+            return {
+                'actors': len(self._actor_ids),
+                'movies': len(self._movie_ids),
+                'cast_entries': len(self._actor_movies),
+                'added_cast_entries': sum(len(movies) for movies in self._added_movies.values()),
+                'removed_actors': len(self._removed_actors),
+                'removed_movies': len(self._removed_movies),
+                'bytes': sum(values.itemsize * len(values) for values in arrays),
+                'built_at': self._built_at,
+            }
@@ -0,0 +1,109 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+
+
+class HashingBusy(Exception):
+    """Raised when the bcrypt pool already has as much work queued as it accepts."""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing pool is saturated')
+        self.retry_after = retry_after
+
+
+def _hashpw(password, rounds):
+    return time.time(), bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, hashed):
+    return time.time(), bcrypt.checkpw(password, hashed)
+
+
+class HashingPool:
+    """Runs bcrypt on a small dedicated worker pool instead of the request thread.
+
+    At most workers + max_queue calls are admitted at once; anything beyond
+    that is rejected straight away with HashingBusy so that a burst of
+    signins cannot tie up every request thread. Worker processes are started
+    from a fresh interpreter on first use.
+    """
+
+    def __init__(self, workers=2, max_queue=16, retry_after=1, rounds=12, use_processes=True):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.rounds = rounds
+        self.use_processes = use_processes
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            'completed': 0,
+            'rejected': 0,
+            'queue_wait_total': 0.0,
+            'queue_wait_max': 0.0,
+        }
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def hashpw(self, password):
+        return self._run(_hashpw, password, self.rounds)
+
+    def checkpw(self, password, hashed):
+        return self._run(_checkpw, password, hashed)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            raise HashingBusy(self.retry_after)
+
+        try:
+            with self._stats_lock:
+                self._in_flight += 1
+            submitted_at = time.time()
+            started_at, result = self._get_executor().submit(fn, *args).result()
+        finally:
+            with self._stats_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+        queue_wait = max(0.0, started_at - submitted_at)
+        with self._stats_lock:
+            self._stats['completed'] += 1
+            self._stats['queue_wait_total'] += queue_wait
+            self._stats['queue_wait_max'] = max(self._stats['queue_wait_max'], queue_wait)
+        return result
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats.update({
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'queue_wait_avg': (stats['queue_wait_total'] / stats['completed']
+                                   if stats['completed'] else 0.0),
+            })
+        return stats
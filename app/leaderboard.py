@@ -0,0 +1,169 @@
+import bisect
+import threading
+import time
+
+
+class Leaderboard:
+    """Movies ranked by Bayesian average rating, overall and per genre.
+
+    A movie's score is (prior * mean + rating_sum) / (prior + review_count),
+    where mean is the average of all ratings at the last rebuild. A movie
+    with a handful of reviews is pulled towards the mean, so one 10.0 review
+    cannot top the list.
+
+    Rankings are kept as sorted lists of (-score, movie_id), so top-k is a
+    slice. Review writes in this process move a single entry. A periodic
+    rebuild picks up writes made by other workers and refreshes the mean.
+    """
+
+    def __init__(self, prior=10, refresh_interval=300):
+        self.prior = prior
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._movies = {}  # movie_id -> {'title', 'count', 'sum', 'genres'}
+        self._ranked = {None: []}  # genre (None for all movies) -> sorted [(-score, movie_id)]
+        self._mean = 0.0
+        self._built_at = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def needs_rebuild(self):
+        built_at = self._built_at
+        return built_at is None or time.time() - built_at >= self.refresh_interval
+
+    def is_built(self):
+        return self._built_at is not None
+
+    def rebuild(self, movies, movie_genres):
+        """Replace the rankings.
+
+        movies yields (movie_id, title, review_count, rating_sum) and
+        movie_genres yields (movie_id, genre).
+        """
+        entries = {}
+        total_count, total_sum = 0, 0.0
+        for movie_id, title, count, rating_sum in movies:
+            count, rating_sum = count or 0, float(rating_sum or 0)
+            entries[movie_id] = {'title': title, 'count': count, 'sum': rating_sum, 'genres': set()}
+            total_count += count
+            total_sum += rating_sum
+        for movie_id, genre in movie_genres:
+            if movie_id in entries:
+                entries[movie_id]['genres'].add(genre)
+
+        mean = total_sum / total_count if total_count else 0.0
+        ranked = {None: []}
+        for movie_id, entry in entries.items():
+            if entry['count']:
+                key = (-self._score(entry, mean), movie_id)
+                ranked[None].append(key)
+                for genre in entry['genres']:
+                    ranked.setdefault(genre, []).append(key)
+        for keys in ranked.values():
+            keys.sort()
+
+        with self._lock:
+            self._movies, self._ranked, self._mean = entries, ranked, mean
+            self._built_at = time.time()
+
+    def _score(self, entry, mean):
+        return (self.prior * mean + entry['sum']) / (self.prior + entry['count'])
+
+    def _unrank(self, movie_id, entry):
+        # Called with the lock held
+        if not entry['count']:
+            return
+        key = (-self._score(entry, self._mean), movie_id)
+        for genre in (None, *entry['genres']):
+            keys = self._ranked.get(genre)
+            if keys:
+                index = bisect.bisect_left(keys, key)
+                if index < len(keys) and keys[index] == key:
+                    del keys[index]
+
+    def _rank(self, movie_id, entry):
+        # Called with the lock held
+        if not entry['count']:
+            return
+        key = (-self._score(entry, self._mean), movie_id)
+        for genre in (None, *entry['genres']):
+            bisect.insort(self._ranked.setdefault(genre, []), key)
+
+    def top(self, limit, genre=None):
+        with self._lock:
+            keys = self._ranked.get(genre, [])[:limit]
+            return [{
+                'movie_id': movie_id,
+                'movie_title': self._movies[movie_id]['title'],
+                'score': round(-negative_score, 3),
+                'review_count': self._movies[movie_id]['count'],
+                'average_rating': round(self._movies[movie_id]['sum'] / self._movies[movie_id]['count'], 2)
+            } for negative_score, movie_id in keys]
+
+    # The updates below are no-ops until the first rebuild, which reads everything anyway
+
+    def rate(self, movie_id, count_delta, sum_delta):
+        """Apply a review write: (+1, rating) added, (0, new - old) changed, (-1, -rating) removed.
+
+        Movies this worker has not loaded are left to the next rebuild, since
+        a delta alone says nothing about their other reviews.
+        """
+        with self._lock:
+            entry = self._movies.get(movie_id)
+            if entry is None:
+                return
+            self._unrank(movie_id, entry)
+            entry['count'] += count_delta
+            entry['sum'] += float(sum_delta)
+            if entry['count'] <= 0:
+                # Reviews removed by other workers since the rebuild can take the count below zero
+                entry['count'], entry['sum'] = 0, 0.0
+            self._rank(movie_id, entry)
+
+    def add_movie(self, movie_id, title):
+        with self._lock:
+            if self._built_at is not None:
+                self._movies.setdefault(
+                    movie_id, {'title': title, 'count': 0, 'sum': 0.0, 'genres': set()}
+                )['title'] = title
+
+    def set_title(self, movie_id, title):
+        with self._lock:
+            if movie_id in self._movies:
+                self._movies[movie_id]['title'] = title
+
+    def remove_movie(self, movie_id):
+        with self._lock:
+            entry = self._movies.pop(movie_id, None)
+            if entry is not None:
+                self._unrank(movie_id, entry)
+
+    def add_genre(self, movie_id, genre):
+        with self._lock:
+            entry = self._movies.get(movie_id)
+            if entry is None or genre in entry['genres']:
+                return
+            self._unrank(movie_id, entry)
+            entry['genres'].add(genre)
+            self._rank(movie_id, entry)
+
+    def remove_genre(self, genre):
+        with self._lock:
+            self._ranked.pop(genre, None)
+            for entry in self._movies.values():
+                entry['genres'].discard(genre)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'movies': len(self._movies),
+                'ranked': len(self._ranked[None]),
+                'genres': len(self._ranked) - 1,
+                'mean': round(self._mean, 3),
+                'built_at': self._built_at,
+            }
@@ -1,11 +1,31 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g, has_request_context, stream_with_context
+import click
 import pymysql
-import bcrypt
+import pymysql.constants.CLIENT
 import jwt
+import hmac
+import hashlib
+import secrets
 import os
 import datetime
+import threading
 import time
 from dotenv import load_dotenv
+from db_pool import ConnectionPool, SharedConnection
+from cache import LRUCache, VersionedValue
+from sessions import create_session_store, new_session_id, sign_session_id, unsign_session_id
+from hashing import HashingPool, HashingBusy
+from pagination import InvalidPage, parse_page_args, split_page
+from versions import get_version, version_from_row, bump, bump_related, etag
+import ratings
+from leaderboard import Leaderboard
+from search import InvertedIndex
+from autocomplete import PrefixIndex
+from graph import CoStarGraph
+from similar import SimilarMovies
+import recommend
+from bitmaps import MovieBitmaps
+from catalog_import import CatalogImport, ndjson_records, csv_records
 
 # Load .env
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -14,8 +34,6 @@ load_dotenv(dotenv_path)
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 
-session={}
-
 app = Flask(__name__)
 
 db_config = {
@@ -25,8 +43,176 @@ db_config = {
     'database': os.getenv('DB_NAME')
 }
 
-def get_db_connection():
-    return pymysql.connect(**db_config)
+pool_config = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 5)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+    'recycle': float(os.getenv('DB_POOL_RECYCLE', 3600))
+}
+
+db_pool = ConnectionPool(lambda: pymysql.connect(**db_config), **pool_config)
+
+# The detail reads that batch several parameterized SELECTs into one round trip get connections of
+# their own, so no other statement ever runs where statements can be stacked
+multi_statement_pool = ConnectionPool(
+    lambda: pymysql.connect(**db_config, client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS),
+    **pool_config
+)
+
+def get_db_connection(multi_statements=False):
+    if multi_statements:
+        pool, name = multi_statement_pool, 'multi_statement_connection'
+    else:
+        pool, name = db_pool, 'db_connection'
+
+    # Outside of a request, hand out a pooled connection; close() returns it to the pool
+    if not has_request_context():
+        return pool.connect()
+
+    # Within a request, authenticate() and the handler share a single connection,
+    # checked out on first use and released by release_db_connection()
+    if name not in g:
+        setattr(g, name, pool.connect())
+    return SharedConnection(g.get(name))
+
+@app.teardown_request
+def release_db_connection(exception=None):
+    for name in ('db_connection', 'multi_statement_connection'):
+        connection = g.pop(name, None)
+        if connection is not None:
+            # Returning the connection rolls back anything the handler did not commit
+            connection.close()
+
+# Server-side sessions; use the sqlite store when running several worker processes
+SESSION_COOKIE = 'session_id'
+SESSION_LIFETIME = int(os.getenv('SESSION_LIFETIME', 86400))
+SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', 'false').lower() == 'true'
+
+session_store = create_session_store(
+    os.getenv('SESSION_STORE', 'memory'),
+    path=os.getenv('SESSION_SQLITE_PATH', os.path.join(root_dir, 'sessions.sqlite3')),
+    sweep_interval=float(os.getenv('SESSION_SWEEP_INTERVAL', 60))
+)
+
+def load_session():
+    # Session data of the signed-in user making this request, or an empty dict
+    if 'session' not in g:
+        g.session_id = None
+        g.session = {}
+        cookie = request.cookies.get(SESSION_COOKIE)
+        session_id = unsign_session_id(SECRET_KEY, cookie) if cookie else None
+        if session_id:
+            data = session_store.get(session_id)
+            if data is not None:
+                g.session_id = session_id
+                g.session = data
+    return g.session
+
+# Verified API keys: digest -> (user_id, is_admin, credentials version), never outliving the JWT's exp
+credential_cache = LRUCache(
+    maxsize=int(os.getenv('AUTH_CACHE_SIZE', 10000)),
+    ttl=float(os.getenv('AUTH_CACHE_TTL', 300))
+)
+
+# Bumped by every key deletion and role change, so other workers stop trusting their cached keys
+# within AUTH_CACHE_CHECK_INTERVAL seconds. Moving to a new version empties the local cache.
+credential_versions = VersionedValue(
+    lambda cursor: credential_cache.clear(),
+    lambda cursor: get_version(cursor, 'credentials', '*'),
+    check_interval=float(os.getenv('AUTH_CACHE_CHECK_INTERVAL', 1))
+)
+
+# Serialized GET /movies/<id> bodies: movie_id -> (version, body), bounded by total body size.
+# Entries are tagged with the movie's actors and genres so writes to those can drop them.
+movie_cache = LRUCache(
+    maxsize=int(os.getenv('MOVIE_CACHE_SIZE', 10000)),
+    maxbytes=int(os.getenv('MOVIE_CACHE_BYTES', 64 * 1024 * 1024)),
+    sizeof=lambda entry: len(entry[1])
+)
+
+# bcrypt runs on a bounded worker pool; requests beyond its queue get a 503
+hashing_pool = HashingPool(
+    workers=int(os.getenv('BCRYPT_WORKERS', 2)),
+    max_queue=int(os.getenv('BCRYPT_MAX_QUEUE', 16)),
+    retry_after=int(os.getenv('BCRYPT_RETRY_AFTER', 1)),
+    use_processes=os.getenv('BCRYPT_EXECUTOR', 'process') == 'process'
+)
+
+def hashing_busy_response(error):
+    g.retry_after = error.retry_after
+    return jsonify({'error': 'Server is busy, please try again later'}), 503
+
+@app.after_request
+def add_retry_after(response):
+    if response.status_code == 503 and 'retry_after' in g:
+        response.headers['Retry-After'] = str(g.retry_after)
+    return response
+
+# List endpoints are paginated on their primary key; no page holds more than this
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 500))
+
+def page_args():
+    return parse_page_args(request.args, PAGE_SIZE_MAX)
+
+def with_next_cursor(payload, next_cursor, paginated):
+    # Unpaginated requests keep the original response shape while the list fits in one page
+    if paginated or next_cursor:
+        payload['next_cursor'] = next_cursor
+    return payload
+
+def limit_arg(default):
+    # For ranked endpoints that return a single page of at most ?limit= results
+    limit = request.args.get('limit')
+    if limit is None:
+        return default
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPage('limit must be a positive integer')
+    if limit <= 0:
+        raise InvalidPage('limit must be a positive integer')
+    return min(limit, PAGE_SIZE_MAX)
+
+# Catalog GETs carry an ETag built from the entity's version counter (see versions.py)
+def client_has_version(tag):
+    return request.if_none_match.contains_weak(tag)
+
+def not_modified(tag):
+    response = app.response_class(status=304)
+    response.set_etag(tag)
+    return response
+
+def with_etag(response, tag):
+    response.set_etag(tag)
+    return response
+
+# The genre reference table is tiny and rarely written, so it is served from memory
+def load_genres(cursor):
+    cursor.execute("SELECT movie_genres_type FROM ref_movie_genres")
+    names = [row['movie_genres_type'] for row in cursor.fetchall()]
+    return {
+        'names': names,
+        # MySQL compares genre names case-insensitively
+        'lookup': {name.casefold(): name for name in names},
+        # Pre-serialized body of GET /genres
+        'body': jsonify({'genres': names}).get_data()
+    }
+
+genre_cache = VersionedValue(
+    load_genres,
+    lambda cursor: get_version(cursor, 'genres', '*'),
+    check_interval=float(os.getenv('GENRE_CACHE_CHECK_INTERVAL', 1))
+)
+
+def cached_genres(check=False):
+    # Writes pass check=True so they never act on a genre list another worker has changed
+    return genre_cache.get(lambda: get_db_connection().cursor(pymysql.cursors.DictCursor), check)
+
+def find_genre(name, check=False):
+    # Returns the stored spelling of the genre, or None if it does not exist
+    return cached_genres(check)[1]['lookup'].get(name.casefold())
 
 # AUTH
 
@@ -51,7 +237,7 @@ def signup():
             return jsonify({'error': 'Username already exists'}), 400
 
         # Hash the password with bcrypt
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = hashing_pool.hashpw(password.encode('utf-8'))
 
         # Insert the new user into the database
         cursor.execute(
@@ -63,6 +249,8 @@ def signup():
 
         return jsonify({'message': 'User registered successfully'}), 201
 
+    except HashingBusy as e:
+        return hashing_busy_response(e)
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred during signup'}), 500
@@ -92,14 +280,30 @@ def signin():
             return jsonify({'error': 'User not found'}), 404
 
         # Verify the password (compare the hashed password)
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+        if not hashing_pool.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
             return jsonify({'error': 'Invalid password'}), 401 
-        session['user_id'] = user['user_id']
-        session['hashed_password'] = user['password']
-        session['is_admin'] = user['is_admin']
-        # Return a success message
-        return jsonify({'message': 'Login successful', 'user_id': user['user_id'], 'is_admin': user['is_admin']}), 200
 
+        # Start a new server-side session, replacing any previous one
+        load_session()
+        if g.session_id:
+            session_store.delete(g.session_id)
+        session_id = new_session_id()
+        session_store.set(session_id, {
+            'user_id': user['user_id'],
+            'hashed_password': user['password'],
+            'is_admin': user['is_admin']
+        }, time.time() + SESSION_LIFETIME)
+
+        # Return a success message along with the signed session cookie
+        response = jsonify({'message': 'Login successful', 'user_id': user['user_id'], 'is_admin': user['is_admin']})
+        response.set_cookie(
+            SESSION_COOKIE, sign_session_id(SECRET_KEY, session_id),
+            max_age=SESSION_LIFETIME, httponly=True, samesite='Lax', secure=SESSION_COOKIE_SECURE
+        )
+        return response, 200
+
+    except HashingBusy as e:
+        return hashing_busy_response(e)
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while signing in'}), 500
@@ -107,9 +311,13 @@ def signin():
 @app.route('/signout', methods=['POST'])
 def signout():
     try:
-        # Clear the session
-        session.clear()
-        return jsonify({'message': 'Successfully signed out'}), 200
+        # Drop the server-side session and the cookie pointing at it
+        load_session()
+        if g.session_id:
+            session_store.delete(g.session_id)
+        response = jsonify({'message': 'Successfully signed out'})
+        response.delete_cookie(SESSION_COOKIE)
+        return response, 200
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while signing out'}), 500
@@ -159,22 +367,23 @@ def create_token():
         if not isinstance(expiration_hours, (int, float)) or expiration_hours <= 0:
             return jsonify({'error': 'Invalid expiration time. Must be a positive number.'}), 400
 
-        # Generate the JWT payload
+        # Generate the JWT payload; 'jti' identifies the stored key without scanning
+        key_id = secrets.token_hex(16)
         payload = {
             'user_id': user_id,
+            'jti': key_id,
             'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=expiration_hours)  # User-defined expiration
         }
 
         # Create the JWT using the application-wide SECRET_KEY
         api_key = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
-        hashed_api_key = bcrypt.hashpw(api_key.encode('utf-8'), bcrypt.gensalt())
 
-        # Store the JWT in the `user_keys` table
+        # Store the key id and a keyed digest of the JWT in the `user_keys` table
         connection = get_db_connection()
         cursor = connection.cursor()
         cursor.execute(
-            "INSERT INTO user_keys (user_id, api_key) VALUES (%s, %s)",
-            (user_id, hashed_api_key.decode('utf-8'))
+            "INSERT INTO user_keys (user_id, api_key, jti) VALUES (%s, %s, %s)",
+            (user_id, api_key_digest(api_key), key_id)
         )
         connection.commit()
         connection.close()
@@ -198,7 +407,7 @@ def delete_token(id):
         # Query the database to check if the token exists for the user
         connection = get_db_connection()
         cursor = connection.cursor()
-        cursor.execute("SELECT api_key FROM user_keys WHERE user_id = %s AND id = %s", (user_id, id))
+        cursor.execute("SELECT jti FROM user_keys WHERE user_id = %s AND id = %s", (user_id, id))
         token = cursor.fetchone()
 
         if not token:
@@ -206,18 +415,60 @@ def delete_token(id):
 
         # Delete the token from the database
         cursor.execute("DELETE FROM user_keys WHERE user_id = %s AND id = %s", (user_id, id))
+        bump(cursor, 'credentials', '*')
         connection.commit()
         connection.close()
 
+        # Stop accepting the key from this worker's credential cache right away; others follow the bump
+        credential_cache.invalidate_tag(('key', token[0]))
+
         return jsonify({'message': 'Token deleted successfully'}), 200
 
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while deleting the token'}), 500
 
+def api_key_digest(api_key):
+    # Keyed digest of an API key; cheap to verify, useless without SECRET_KEY
+    return hmac.new(SECRET_KEY.encode('utf-8'), api_key.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def legacy_key_id(digest):
+    # Keys issued before 'jti' existed are indexed by a prefix of their digest
+    return digest[:32]
+
+def migrate_legacy_key(connection, cursor, user_id, key, key_id, digest):
+    # Fall back to checking bcrypt-hashed keys that have not been migrated yet
+    cursor.execute("""
+        SELECT k.id, k.api_key, u.is_admin
+        FROM user_keys k
+        JOIN users u ON k.user_id = u.user_id
+        WHERE k.user_id = %s AND k.jti IS NULL
+    """, (user_id,))
+    for stored_key in cursor.fetchall():
+        if hashing_pool.checkpw(key.encode('utf-8'), stored_key['api_key'].encode('utf-8')):
+            # Replace the bcrypt hash so the next lookup is a single indexed query
+            cursor.execute(
+                "UPDATE user_keys SET jti = %s, api_key = %s WHERE id = %s",
+                (key_id, digest, stored_key['id'])
+            )
+            connection.commit()
+            return {'user_id': user_id, 'api_key': digest, 'is_admin': stored_key['is_admin']}
+    return None
+
+def check_role(user_id, is_admin, role, strict):
+    # Ensure the user has the required role (0 for reviewer, 1 for admin)
+    if role == 0 and is_admin != 0 and strict:
+        return {"message": "Access denied, reviewer role required", "success": False}, 403
+    elif role == 1 and is_admin != 1:
+        return {"message": "Access denied, admin role required", "success": False}, 403
+
+    # Authentication successful
+    return {"message": "Authentication successful", "success": True, "user_id": user_id}, 200
+
 def authenticate(role=0, strict=False):
     connection = get_db_connection()
     cursor = connection.cursor(pymysql.cursors.DictCursor)
+    session = load_session()
     user_id = session['user_id'] if 'user_id' in session else None
     hashed_password = session['hashed_password'] if 'hashed_password' in session else None
     key = request.headers.get('Authorization')
@@ -230,6 +481,16 @@ def authenticate(role=0, strict=False):
         # Case 1: Check for API key authentication
         if key:
             try:
+                digest = api_key_digest(key)
+
+                # Keys verified recently are served from the credential cache, unless a key was
+                # deleted or a role changed since; the version is read before the lookup below
+                version, _ = credential_versions.get(lambda: cursor)
+                credentials = credential_cache.get(digest)
+                if credentials and credentials[2] == version:
+                    user_id, is_admin, _ = credentials
+                    return check_role(user_id, is_admin, role, strict)
+
                 # Decode the JWT token and verify it
                 decoded_token = jwt.decode(key, SECRET_KEY, algorithms=["HS256"])
                 
@@ -240,25 +501,31 @@ def authenticate(role=0, strict=False):
                 if decoded_token.get('exp') < int(time.time()):
                     return {"message": "API key has expired", "success": False}, 401
 
-                # Find the JWT hash in the database associated with the user
-                
-                # Fetch all API keys for the user
-                cursor.execute("SELECT api_key FROM user_keys WHERE user_id = %s", (user_id,))
-                user_keys = cursor.fetchall()
-
-                if not user_keys:
-                    return {"message": "No stored API keys for this user", "success": False}, 401
-
-                    # Check if the provided key matches any of the stored keys
-                key_valid = any(bcrypt.checkpw(key.encode('utf-8'), stored_key['api_key'].encode('utf-8')) for stored_key in user_keys)
-
-                if not key_valid:
-                    print(f"Provided key: {key.encode('utf-8')}")
-                    print(f"Stored keys: {[stored_key['api_key'] for stored_key in user_keys]}")
+                # Look up the stored key and its owner's role by the key id
+                key_id = decoded_token.get('jti') or legacy_key_id(digest)
+                cursor.execute("""
+                    SELECT k.user_id, k.api_key, u.is_admin
+                    FROM user_keys k
+                    JOIN users u ON k.user_id = u.user_id
+                    WHERE k.jti = %s
+                """, (key_id,))
+                stored_key = cursor.fetchone()
+
+                if not stored_key and not decoded_token.get('jti'):
+                    stored_key = migrate_legacy_key(connection, cursor, user_id, key, key_id, digest)
+
+                # Compare the digests in constant time
+                if (not stored_key or stored_key['user_id'] != user_id or
+                        not hmac.compare_digest(stored_key['api_key'], digest)):
                     return {"message": "Invalid API key", "success": False}, 401
 
-                # Proceed if the key is valid
-                return {"message": "API key validated", "success": True, "user_id": user_id}, 200
+                # Cache the verified key for no longer than the JWT itself is valid
+                is_admin = stored_key['is_admin']
+                credential_cache.set(
+                    digest, (user_id, is_admin, version),
+                    expires_at=decoded_token['exp'],
+                    tags=(('key', key_id),)
+                )
 
             except jwt.ExpiredSignatureError:
                 return {"message": "API key has expired", "success": False}, 401
@@ -274,26 +541,17 @@ def authenticate(role=0, strict=False):
 
             if not user or not (user['password'] == hashed_password):
                 return {"message": "Invalid credentials", "success": False}, 401                        
+            is_admin = user['is_admin']
         else:
             # Handle missing session or token
             return {"message": "Authentication required. Please sign in or provide a valid API token.", "success": False}, 401
 
         # Case 3: Check if user has the required role
-        cursor.execute("SELECT is_admin FROM users WHERE user_id = %s", (user_id,))
-        user = cursor.fetchone()
-
-        if not user:
-            return {"message": "User not found", "success": False}, 404
-        
-        # Ensure the user has the required role (0 for reviewer, 1 for admin)
-        if role == 0 and user['is_admin'] != 0 and strict:
-            return {"message": "Access denied, reviewer role required", "success": False}, 403
-        elif role == 1 and user['is_admin'] != 1:
-            return {"message": "Access denied, admin role required", "success": False}, 403
-        
-        # Authentication successful
-        return {"message": "Authentication successful", "success": True, "user_id": user_id}, 200
+        return check_role(user_id, is_admin, role, strict)
 
+    except HashingBusy as e:
+        g.retry_after = e.retry_after
+        return {"message": "Server is busy, please try again later", "success": False}, 503
     except Exception as e:
         print(f"Error: {e}")
         return {"message": "An error occurred during authentication", "success": False}, 500
@@ -302,18 +560,448 @@ def authenticate(role=0, strict=False):
 
 @app.route('/movies', methods=['GET'])
 def movies():
+    if 'ids' in request.args:
+        return movies_by_ids()
+    if any(name in request.args for name in ('genre', 'exclude_genre', 'actor')):
+        return filtered_movies()
     try:
+        after, limit, paginated = page_args()
+
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
-        cursor.execute("SELECT movie_id, movie_title FROM movies")
-        movies = cursor.fetchall()
+        cursor.execute("""
+            SELECT movie_id, movie_title FROM movies
+            WHERE movie_id > %s ORDER BY movie_id LIMIT %s
+        """, (after, limit + 1))
+        movies, next_cursor = split_page(cursor.fetchall(), 'movie_id', limit)
         connection.close()
 
         # If no movies are found, return a 404 response
-        if not movies:
+        if not movies and not after:
             return jsonify({'error': 'No movies found'}), 404
 
+        return jsonify(with_next_cursor({'movies': movies}, next_cursor, paginated))
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return "Error occurred while fetching movies", 500
+
+# One lock per in-memory structure, taken by the request thread that reloads it
+rebuild_locks = {}
+
+def rebuild_once(structure, rebuild):
+    """Call rebuild() if structure is due for it, from one request thread at a time.
+
+    Threads that find a rebuild under way keep serving the current structure,
+    unless it has never been built, in which case they wait for that rebuild.
+    """
+    if not structure.needs_rebuild():
+        return
+    lock = rebuild_locks.setdefault(structure, threading.Lock())
+    if not lock.acquire(blocking=not structure.is_built()):
+        return
+    try:
+        # Whoever held the lock before may have just rebuilt it
+        if structure.needs_rebuild():
+            rebuild()
+    finally:
+        lock.release()
+
+# Genre and cast filters on GET /movies are answered from bitmaps over movie ids
+movie_bitmaps = MovieBitmaps(refresh_interval=float(os.getenv('MOVIE_BITMAPS_REFRESH', 300)))
+
+def rebuild_movie_bitmaps():
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT movie_id FROM movies")
+    movie_ids = [movie_id for movie_id, in cursor.fetchall()]
+    cursor.execute("SELECT movies_movie_id, ref_movie_genres_movie_genres_type FROM movie_genres")
+    movie_genres = cursor.fetchall()
+    cursor.execute("SELECT movies_movie_id, actors_actor_id FROM movie_actors")
+    movie_bitmaps.rebuild(movie_ids, movie_genres, cursor.fetchall())
+
+def current_movie_bitmaps():
+    rebuild_once(movie_bitmaps, rebuild_movie_bitmaps)
+    return movie_bitmaps
+
+def filtered_movies():
+    try:
+        after, limit, paginated = page_args()
+
+        # Genres are matched case-insensitively, like everywhere else
+        genres = {}
+        for name in ('genre', 'exclude_genre'):
+            genres[name] = []
+            for genre in request.args.get(name, '').split(','):
+                if genre:
+                    found = find_genre(genre)
+                    if not found:
+                        return jsonify({'error': f'Genre not found: {genre}'}), 404
+                    genres[name].append(found)
+        try:
+            actors = [int(actor_id) for actor_id in request.args.get('actor', '').split(',') if actor_id]
+        except ValueError:
+            return jsonify({'error': 'actor must be a comma separated list of actor IDs'}), 400
+
+        bitmaps = current_movie_bitmaps()
+        total, movie_ids, facets = bitmaps.query(
+            genres['genre'], genres['exclude_genre'], actors, after=after, limit=limit + 1
+        )
+        # The page ends where the bitmaps say, so skipping a movie below cannot lose the next cursor
+        movie_ids, next_cursor = split_page(movie_ids, None, limit)
+
+        connection = get_db_connection()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        titles = fetch_by_id(cursor, MOVIES_BY_ID_SQL, movie_ids, 'movie_id')
+        connection.close()
+
+        # Movies deleted by another worker since the last rebuild are skipped and dropped from the bitmaps
+        movies = []
+        for movie_id in movie_ids:
+            if movie_id in titles:
+                movies.append(titles[movie_id])
+            else:
+                bitmaps.remove_movie(movie_id)
+                total -= 1
+        return jsonify(with_next_cursor(
+            {'movies': movies, 'total': total, 'facets': {'genres': facets}}, next_cursor, paginated
+        ))
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while filtering movies'}), 500
+
+# Top-rated movies are ranked in memory and rebuilt from movie_ratings every LEADERBOARD_REFRESH seconds
+leaderboard = Leaderboard(
+    prior=float(os.getenv('LEADERBOARD_PRIOR', 10)),
+    refresh_interval=float(os.getenv('LEADERBOARD_REFRESH', 300))
+)
+
+def rebuild_leaderboard():
+    cursor = get_db_connection().cursor()
+    cursor.execute("""
+        SELECT m.movie_id, m.movie_title, r.review_count, r.rating_sum
+        FROM movies m
+        LEFT JOIN movie_ratings r ON r.movie_id = m.movie_id
+    """)
+    movies = cursor.fetchall()
+    cursor.execute("SELECT movies_movie_id, ref_movie_genres_movie_genres_type FROM movie_genres")
+    leaderboard.rebuild(movies, cursor.fetchall())
+
+def current_leaderboard():
+    rebuild_once(leaderboard, rebuild_leaderboard)
+    return leaderboard
+
+@app.route('/movies/top', methods=['GET'])
+def top_movies():
+    try:
+        limit = limit_arg(10)
+
+        genre = request.args.get('genre')
+        if genre is not None:
+            genre = find_genre(genre)
+            if not genre:
+                return jsonify({'error': 'Genre not found'}), 404
+
+        movies = current_leaderboard().top(limit, genre)
         return jsonify({'movies': movies})
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while fetching top movies'}), 500
+
+# Movie titles and actor names, searchable with GET /search and GET /autocomplete
+SEARCH_REFRESH = float(os.getenv('SEARCH_REFRESH', 300))
+# Largest edit distance ?mode=fuzzy accepts; it is also the default distance
+SEARCH_FUZZY_MAX_DISTANCE = int(os.getenv('SEARCH_FUZZY_MAX_DISTANCE', 2))
+catalog_index = InvertedIndex(refresh_interval=SEARCH_REFRESH)
+movie_prefixes = PrefixIndex(refresh_interval=SEARCH_REFRESH)
+actor_prefixes = PrefixIndex(refresh_interval=SEARCH_REFRESH)
+
+def movie_document(movie_id, title):
+    return ('movie', movie_id), title, {'type': 'movie', 'movie_id': movie_id, 'movie_title': title}
+
+def actor_document(actor_id, first_name, last_name):
+    return ('actor', actor_id), f'{first_name} {last_name}', {
+        'type': 'actor', 'actor_id': actor_id, 'first_name': first_name, 'last_name': last_name
+    }
+
+def rebuild_catalog_index():
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT movie_id, movie_title FROM movies")
+    documents = [movie_document(*movie) for movie in cursor.fetchall()]
+    cursor.execute("SELECT actor_id, first_name, last_name FROM actors")
+    documents += [actor_document(*actor) for actor in cursor.fetchall()]
+    catalog_index.rebuild(documents)
+
+def current_catalog_index():
+    rebuild_once(catalog_index, rebuild_catalog_index)
+    return catalog_index
+
+# Review text, searchable by admins and per movie; keyed by (movie_id, review_id)
+review_index = InvertedIndex(refresh_interval=SEARCH_REFRESH)
+
+def rebuild_review_index():
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT review_id, movie_id, review_text FROM review")
+    review_index.rebuild(
+        ((movie_id, review_id), text or '', None) for review_id, movie_id, text in cursor.fetchall()
+    )
+
+def current_review_index():
+    rebuild_once(review_index, rebuild_review_index)
+    return review_index
+
+def ranked_reviews(cursor, query, limit, select, movie_id=None):
+    """Rank reviews matching query and fetch them with select, best first."""
+    matches = current_review_index().search(
+        query, limit, accept=None if movie_id is None else lambda key: key[0] == movie_id
+    )
+    if not matches:
+        return []
+    scores = {key[1]: score for score, key, _ in matches}
+    cursor.execute(
+        f"{select} WHERE r.review_id IN ({', '.join(['%s'] * len(scores))})", list(scores)
+    )
+    rows = {row['review_id']: row for row in cursor.fetchall()}
+    # Reviews deleted by another worker since the last rebuild are skipped
+    return [dict(rows[review_id], score=round(score, 4)) for review_id, score in scores.items() if review_id in rows]
+
+# Suggestions are weighted by review count; an actor's is the total over their movies
+def rebuild_movie_prefixes():
+    cursor = get_db_connection().cursor()
+    cursor.execute("""
+        SELECT m.movie_id, m.movie_title, r.review_count
+        FROM movies m
+        LEFT JOIN movie_ratings r ON r.movie_id = m.movie_id
+    """)
+    movie_prefixes.rebuild(
+        (movie_id, title, movie_document(movie_id, title)[2], count or 0)
+        for movie_id, title, count in cursor.fetchall()
+    )
+
+def rebuild_actor_prefixes():
+    cursor = get_db_connection().cursor()
+    cursor.execute("""
+        SELECT a.actor_id, a.first_name, a.last_name, SUM(r.review_count)
+        FROM actors a
+        LEFT JOIN movie_actors ma ON ma.actors_actor_id = a.actor_id
+        LEFT JOIN movie_ratings r ON r.movie_id = ma.movies_movie_id
+        GROUP BY a.actor_id, a.first_name, a.last_name
+    """)
+    actor_prefixes.rebuild(
+        (actor_id, f'{first_name} {last_name}', actor_document(actor_id, first_name, last_name)[2], int(count or 0))
+        for actor_id, first_name, last_name, count in cursor.fetchall()
+    )
+
+def current_prefixes(kind):
+    if kind == 'movie':
+        rebuild_once(movie_prefixes, rebuild_movie_prefixes)
+        return movie_prefixes
+    rebuild_once(actor_prefixes, rebuild_actor_prefixes)
+    return actor_prefixes
+
+def index_movie(movie_id, title):
+    key, text, payload = movie_document(movie_id, title)
+    catalog_index.add(key, text, payload)
+    movie_prefixes.add(movie_id, text, payload)
+
+def unindex_movie(movie_id):
+    catalog_index.remove(('movie', movie_id))
+    movie_prefixes.remove(movie_id)
+
+def index_actor(actor_id, first_name, last_name):
+    key, text, payload = actor_document(actor_id, first_name, last_name)
+    catalog_index.add(key, text, payload)
+    actor_prefixes.add(actor_id, text, payload)
+
+def unindex_actor(actor_id):
+    catalog_index.remove(('actor', actor_id))
+    actor_prefixes.remove(actor_id)
+
+def movie_cast_reviews(movie_id):
+    # The movie's actors and review count, which it adds to each of their suggestion weights.
+    # None while the actor suggestions are due for a rebuild, which reads the weights afresh.
+    if actor_prefixes.needs_rebuild():
+        return None
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT actors_actor_id FROM movie_actors WHERE movies_movie_id = %s", (movie_id,))
+    actor_ids = [actor_id for actor_id, in cursor.fetchall()]
+    cursor.execute("SELECT review_count FROM movie_ratings WHERE movie_id = %s", (movie_id,))
+    row = cursor.fetchone()
+    return actor_ids, row[0] if row else 0
+
+def reweigh_actors(actor_ids, delta):
+    for actor_id in actor_ids:
+        actor_prefixes.add_weight(actor_id, delta)
+
+@app.route('/search', methods=['GET'])
+def search_catalog():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+
+        kind = request.args.get('type')
+        if kind not in (None, 'movie', 'actor'):
+            return jsonify({'error': "type must be 'movie' or 'actor'"}), 400
+
+        mode = request.args.get('mode', 'exact')
+        if mode not in ('exact', 'fuzzy'):
+            return jsonify({'error': "mode must be 'exact' or 'fuzzy'"}), 400
+
+        max_distance = 0
+        if mode == 'fuzzy':
+            try:
+                max_distance = int(request.args.get('distance', SEARCH_FUZZY_MAX_DISTANCE))
+            except ValueError:
+                max_distance = -1
+            if not 0 <= max_distance <= SEARCH_FUZZY_MAX_DISTANCE:
+                return jsonify({'error': f'distance must be between 0 and {SEARCH_FUZZY_MAX_DISTANCE}'}), 400
+
+        limit = limit_arg(20)
+        matches = current_catalog_index().search(
+            query, limit, accept=None if kind is None else lambda key: key[0] == kind,
+            max_distance=max_distance
+        )
+        return jsonify({'results': [dict(payload, score=round(score, 4)) for score, _, payload in matches]})
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while searching'}), 500
+
+@app.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    try:
+        prefix = request.args.get('prefix', '')
+        if not prefix.strip():
+            return jsonify({'error': 'Query parameter prefix is required'}), 400
+
+        kind = request.args.get('type', 'movie')
+        if kind not in ('movie', 'actor'):
+            return jsonify({'error': "type must be 'movie' or 'actor'"}), 400
+
+        limit = limit_arg(10)
+        return jsonify({'suggestions': current_prefixes(kind).complete(prefix, limit)})
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while fetching suggestions'}), 500
+
+# Movie, reviews, actors and genres, sent to MySQL as a single multi-statement query
+# Prepended to MOVIE_DETAIL_SQL so the ETag comes from the same snapshot as the details
+MOVIE_VERSION_SQL = "SELECT version FROM entity_versions WHERE entity = 'movie' AND entity_key = %(key)s;"
+
+MOVIE_DETAIL_SQL = """
+    SELECT * FROM movies WHERE movie_id = %(id)s;
+    SELECT star_rating, review_text FROM review WHERE movie_id = %(id)s;
+    SELECT a.actor_id, a.first_name, a.last_name
+    FROM movie_actors ma
+    JOIN actors a ON ma.actors_actor_id = a.actor_id
+    WHERE ma.movies_movie_id = %(id)s;
+    SELECT rg.movie_genres_type
+    FROM movie_genres mg
+    JOIN ref_movie_genres rg ON mg.ref_movie_genres_movie_genres_type = rg.movie_genres_type
+    WHERE mg.movies_movie_id = %(id)s
+"""
+
+MOVIE_RATING_SQL = "SELECT * FROM movie_ratings WHERE movie_id = %(id)s"
+
+# Everything GET /movies/<id> reads, in one round trip
+MOVIE_RESPONSE_SQL = MOVIE_VERSION_SQL + MOVIE_DETAIL_SQL + ';' + MOVIE_RATING_SQL
+
+# GET /movies?ids=... returns details for at most this many movies per request
+MAX_BATCH_IDS = int(os.getenv('MAX_BATCH_IDS', 100))
+BATCH_EXPANSIONS = ('actors', 'genres', 'rating')
+
+def batch_detail_sql(expand, count):
+    # The movies, then one set-based statement per expansion, whatever the number of ids
+    statements = [f"SELECT * FROM movies WHERE movie_id IN ({', '.join(['%s'] * count)})"]
+    statements += expansion_statements(expand, count)
+    return ';'.join(statements), len(statements)
+
+def expansion_statements(expand, count):
+    placeholders = ', '.join(['%s'] * count)
+    statements = []
+    if 'actors' in expand:
+        statements.append(f"""
+            SELECT ma.movies_movie_id AS movie_id, a.actor_id, a.first_name, a.last_name
+            FROM movie_actors ma
+            JOIN actors a ON ma.actors_actor_id = a.actor_id
+            WHERE ma.movies_movie_id IN ({placeholders})
+        """)
+    if 'genres' in expand:
+        statements.append(f"""
+            SELECT mg.movies_movie_id AS movie_id, rg.movie_genres_type
+            FROM movie_genres mg
+            JOIN ref_movie_genres rg ON mg.ref_movie_genres_movie_genres_type = rg.movie_genres_type
+            WHERE mg.movies_movie_id IN ({placeholders})
+        """)
+    if 'rating' in expand:
+        statements.append(f"SELECT * FROM movie_ratings WHERE movie_id IN ({placeholders})")
+    return statements
+
+def attach_expansions(cursor, movies, expand):
+    # Reads the result sets of expansion_statements(), the cursor being on the first of them
+    for movie in movies.values():
+        if 'actors' in expand:
+            movie['actors'] = []
+        if 'genres' in expand:
+            movie['genres'] = []
+        if 'rating' in expand:
+            movie['rating'] = ratings.summary(None)
+
+    for i, name in enumerate(name for name in BATCH_EXPANSIONS if name in expand):
+        if i:
+            cursor.nextset()
+        for row in cursor.fetchall():
+            movie = movies.get(row['movie_id'])
+            if movie is None:
+                continue
+            if name == 'actors':
+                row.pop('movie_id')
+                movie['actors'].append(row)
+            elif name == 'genres':
+                movie['genres'].append(row['movie_genres_type'])
+            else:
+                movie['rating'] = ratings.summary(row)
+
+def movies_by_ids():
+    try:
+        # Parse and validate the requested ids and expansions
+        try:
+            ids = list(dict.fromkeys(int(movie_id) for movie_id in request.args['ids'].split(',')))
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma separated list of movie IDs'}), 400
+        if len(ids) > MAX_BATCH_IDS:
+            return jsonify({'error': f'At most {MAX_BATCH_IDS} ids can be requested at once'}), 400
+
+        expand = [name for name in request.args.get('expand', '').split(',') if name]
+        unknown = [name for name in expand if name not in BATCH_EXPANSIONS]
+        if unknown:
+            return jsonify({'error': f"Unknown expand value(s): {', '.join(unknown)}"}), 400
+
+        connection = get_db_connection(multi_statements=True)
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+
+        # Fetch every movie and expansion in one round trip
+        sql, statement_count = batch_detail_sql(expand, len(ids))
+        cursor.execute(sql, ids * statement_count)
+        movies = {movie['movie_id']: movie for movie in cursor.fetchall()}
+        if expand:
+            cursor.nextset()
+            attach_expansions(cursor, movies, expand)
+        connection.close()
+
+        # Keep the order the ids were requested in
+        return jsonify({
+            'movies': [movies[movie_id] for movie_id in ids if movie_id in movies],
+            'not_found': [movie_id for movie_id in ids if movie_id not in movies]
+        })
     except Exception as e:
         print(f"Error: {e}")
         return "Error occurred while fetching movies", 500
@@ -321,42 +1009,55 @@ def movies():
 @app.route('/movies/<int:id>', methods=['GET'])
 def movie_by_id(id):
     try:
-        connection = get_db_connection()
+        connection = get_db_connection(multi_statements=True)
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        # Fetch the movie details
-        cursor.execute("SELECT * FROM movies WHERE movie_id = %s", (id,))
+        # A client that already holds the current version is answered from the version alone,
+        # and so is a cached body, once the version shows it is still current
+        cached = movie_cache.get(id)
+        if request.if_none_match or cached:
+            version = get_version(cursor, 'movie', id)
+            tag = etag('movie', id, version)
+            if client_has_version(tag):
+                connection.close()
+                return not_modified(tag)
+            if cached and cached[0] == version:
+                connection.close()
+                return with_etag(app.response_class(cached[1], mimetype='application/json'), tag)
+
+        # Fetch the version, movie details, reviews, actors, genres and rating in one round trip
+        cursor.execute(MOVIE_RESPONSE_SQL, {'id': id, 'key': str(id)})
+        version = version_from_row(cursor.fetchone())
+        cursor.nextset()
         movie = cursor.fetchone()
 
         if movie:
-            # Fetch reviews for the movie
-            cursor.execute("SELECT star_rating, review_text FROM review WHERE movie_id = %s", (id,))
-            reviews = cursor.fetchall()
-            movie['reviews'] = reviews  # Add reviews to the movie details
+            # Reviews for the movie
+            cursor.nextset()
+            movie['reviews'] = cursor.fetchall()
 
-            # Fetch actors for the movie
-            cursor.execute("""
-                SELECT a.actor_id, a.first_name, a.last_name
-                FROM movie_actors ma
-                JOIN actors a ON ma.actors_actor_id = a.actor_id
-                WHERE ma.movies_movie_id = %s
-            """, (id,))
-            actors = cursor.fetchall()
-            movie['actors'] = actors  # Add actors to the movie details
+            # Actors for the movie
+            cursor.nextset()
+            movie['actors'] = cursor.fetchall()
 
-            # Fetch genres for the movie
-            cursor.execute("""
-                SELECT rg.movie_genres_type
-                FROM movie_genres mg
-                JOIN ref_movie_genres rg ON mg.ref_movie_genres_movie_genres_type = rg.movie_genres_type
-                WHERE mg.movies_movie_id = %s
-            """, (id,))
-            genres = [genre['movie_genres_type'] for genre in cursor.fetchall()]
-            movie['genres'] = genres  # Add genres to the movie details
+            # Genres for the movie
+            cursor.nextset()
+            movie['genres'] = [genre['movie_genres_type'] for genre in cursor.fetchall()]
+
+            # Rating summary for the movie
+            cursor.nextset()
+            movie['rating'] = ratings.summary(cursor.fetchone())
 
             connection.close()
-            return jsonify({'movie': movie})
+
+            body = jsonify({'movie': movie}).get_data()
+            movie_cache.set(id, (version, body), tags=(
+                [('actor', actor['actor_id']) for actor in movie['actors']] +
+                [('genre', genre) for genre in movie['genres']]
+            ))
+            return with_etag(app.response_class(body, mimetype='application/json'), etag('movie', id, version))
         else:
+            # pymysql discards the unread result sets before the next command
             connection.close()
             return jsonify({'error': 'Movie not found'}), 404
     except Exception as e:
@@ -394,6 +1095,9 @@ def add_movie():
         # Commit the changes and close the connection
         connection.commit()
         connection.close()
+        leaderboard.add_movie(movie_id, data['title'])
+        movie_bitmaps.add_movie(movie_id)
+        index_movie(movie_id, data['title'])
 
         # Return the response with the new movie ID
         return jsonify({'message': 'Movie added successfully', 'movie_id': movie_id}), 201
@@ -402,6 +1106,14 @@ def add_movie():
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while adding the movie'}), 500
 
+def bump_movie_relations(cursor, movie_id):
+    bump_related(cursor, 'actor', """
+        SELECT actors_actor_id AS entity_key FROM movie_actors WHERE movies_movie_id = %s
+    """, (movie_id,))
+    bump_related(cursor, 'genre', """
+        SELECT ref_movie_genres_movie_genres_type AS entity_key FROM movie_genres WHERE movies_movie_id = %s
+    """, (movie_id,))
+
 @app.route('/movies/<int:id>', methods=['PUT'])
 def update_movie(id):
     try:
@@ -430,7 +1142,14 @@ def update_movie(id):
 
         # Update movie details
         cursor.execute("UPDATE movies SET movie_title = %s WHERE movie_id = %s", (title, id))
+
+        # The title also appears on the pages of the movie's actors and genres
+        bump(cursor, 'movie', id)
+        bump_movie_relations(cursor, id)
         connection.commit()
+        movie_cache.invalidate(id)
+        leaderboard.set_title(id, title)
+        index_movie(id, title)
         connection.close()
 
         return jsonify({'message': 'Movie updated successfully'}), 200
@@ -459,9 +1178,23 @@ def delete_movie(id):
             connection.close()
             return jsonify({'error': 'Movie not found'}), 404
 
+        # Bump the versions, and note what the actors lose, while the movie's associations still exist
+        bump(cursor, 'movie', id)
+        bump_movie_relations(cursor, id)
+        cast = movie_cast_reviews(id)
+
         # Delete movie
+        cursor.execute("DELETE FROM movie_ratings WHERE movie_id = %s", (id,))
         cursor.execute("DELETE FROM movies WHERE movie_id = %s", (id,))
         connection.commit()
+        movie_cache.invalidate(id)
+        leaderboard.remove_movie(id)
+        unindex_movie(id)
+        if cast:
+            reweigh_actors(cast[0], -cast[1])
+        costar_graph.remove_movie(id)
+        similar_movies.remove_movie(id)
+        movie_bitmaps.remove_movie(id)
         connection.close()
 
         return jsonify({'message': 'Movie deleted successfully'}), 200
@@ -473,15 +1206,22 @@ def delete_movie(id):
 @app.route('/actors', methods=['GET'])
 def actors():
     try:
+        after, limit, paginated = page_args()
+
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        # Fetch all actors
-        cursor.execute("SELECT actor_id, first_name, last_name FROM actors")
-        actors = cursor.fetchall()
+        # Fetch one page of actors
+        cursor.execute("""
+            SELECT actor_id, first_name, last_name FROM actors
+            WHERE actor_id > %s ORDER BY actor_id LIMIT %s
+        """, (after, limit + 1))
+        actors, next_cursor = split_page(cursor.fetchall(), 'actor_id', limit)
 
         connection.close()
-        return jsonify({'actors': actors})
+        return jsonify(with_next_cursor({'actors': actors}, next_cursor, paginated))
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error: {e}")
         return "Error occurred while fetching actors", 500
@@ -493,6 +1233,12 @@ def actor_by_id(id):
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
+        # A client that already holds the current version is answered from the version alone
+        tag = etag('actor', id, get_version(cursor, 'actor', id))
+        if client_has_version(tag):
+            connection.close()
+            return not_modified(tag)
+
         # Fetch actor details
         cursor.execute("SELECT actor_id, first_name, last_name FROM actors WHERE actor_id = %s", (id,))
         actor = cursor.fetchone()
@@ -509,7 +1255,7 @@ def actor_by_id(id):
             actor['movies'] = movies  # Add movies to the actor details
 
             connection.close()
-            return jsonify({'actor': actor})
+            return with_etag(jsonify({'actor': actor}), tag)
         else:
             connection.close()
             return jsonify({'error': 'Actor not found'}), 404
@@ -538,8 +1284,10 @@ def create_actor():
 
         # Insert new actor into the actors table
         cursor.execute("INSERT INTO actors (first_name, last_name) VALUES (%s, %s)", (first_name, last_name))
+        actor_id = cursor.lastrowid
         connection.commit()
         connection.close()
+        index_actor(actor_id, first_name, last_name)
 
         return jsonify({'message': 'Actor created successfully'}), 201
 
@@ -547,6 +1295,11 @@ def create_actor():
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while creating the actor'}), 500
 
+def bump_actor_movies(cursor, actor_id):
+    bump_related(cursor, 'movie', """
+        SELECT movies_movie_id AS entity_key FROM movie_actors WHERE actors_actor_id = %s
+    """, (actor_id,))
+
 # Update actor route
 @app.route('/actors/<int:id>', methods=['PUT'])
 def update_actor(id):
@@ -577,7 +1330,13 @@ def update_actor(id):
 
         # Update actor details
         cursor.execute("UPDATE actors SET first_name = %s, last_name = %s WHERE actor_id = %s", (first_name, last_name, id))
+
+        # The name also appears on the detail page of every movie the actor is in
+        bump(cursor, 'actor', id)
+        bump_actor_movies(cursor, id)
         connection.commit()
+        movie_cache.invalidate_tag(('actor', id))
+        index_actor(id, first_name, last_name)
         connection.close()
 
         return jsonify({'message': 'Actor updated successfully'}), 200
@@ -607,9 +1366,18 @@ def delete_actor(id):
             connection.close()
             return jsonify({'error': 'Actor not found'}), 404
 
+        # Bump the versions while the actor's associations still exist
+        bump(cursor, 'actor', id)
+        bump_actor_movies(cursor, id)
+
         # Delete the actor
         cursor.execute("DELETE FROM actors WHERE actor_id = %s", (id,))
         connection.commit()
+        movie_cache.invalidate_tag(('actor', id))
+        unindex_actor(id)
+        costar_graph.remove_actor(id)
+        movie_bitmaps.remove_actor(id)
+        similar_movies.remove_actor(id)
         connection.close()
 
         return jsonify({'message': 'Actor deleted successfully'}), 200
@@ -618,32 +1386,129 @@ def delete_actor(id):
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while deleting the actor'}), 500
 
+# Who acted with whom, from movie_actors
+GRAPH_REFRESH = float(os.getenv('GRAPH_REFRESH', 300))
+costar_graph = CoStarGraph(refresh_interval=GRAPH_REFRESH)
+
+def rebuild_costar_graph():
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT actors_actor_id, movies_movie_id FROM movie_actors")
+    costar_graph.rebuild(cursor.fetchall())
+
+def current_costar_graph():
+    rebuild_once(costar_graph, rebuild_costar_graph)
+    return costar_graph
+
+def fetch_by_id(cursor, sql, ids, key):
+    # sql ends with "WHERE <key> IN"; rows come back keyed by id
+    if not ids:
+        return {}
+    cursor.execute(f"{sql} ({', '.join(['%s'] * len(ids))})", list(ids))
+    return {row[key]: row for row in cursor.fetchall()}
+
+ACTORS_BY_ID_SQL = "SELECT actor_id, first_name, last_name FROM actors WHERE actor_id IN"
+MOVIES_BY_ID_SQL = "SELECT movie_id, movie_title FROM movies WHERE movie_id IN"
+
+@app.route('/actors/<int:id>/costars', methods=['GET'])
+def actor_costars(id):
+    try:
+        limit = limit_arg(20)
+
+        connection = get_db_connection()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        costars = current_costar_graph().costars(id, limit)
+        actors = fetch_by_id(cursor, ACTORS_BY_ID_SQL, [id] + [actor_id for actor_id, _ in costars], 'actor_id')
+        connection.close()
+
+        if id not in actors:
+            return jsonify({'error': 'Actor not found'}), 404
+
+        # Actors deleted by another worker since the last rebuild are skipped
+        return jsonify({'actor_id': id, 'costars': [
+            dict(actors[actor_id], shared_movies=shared) for actor_id, shared in costars if actor_id in actors
+        ]})
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while fetching co-stars'}), 500
+
+@app.route('/actors/<int:id>/path/<int:other_id>', methods=['GET'])
+def actor_path(id, other_id):
+    try:
+        chain = current_costar_graph().path(id, other_id) or []
+
+        connection = get_db_connection()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        actors = fetch_by_id(cursor, ACTORS_BY_ID_SQL, {id, other_id, *chain[::2]}, 'actor_id')
+        movies = fetch_by_id(cursor, MOVIES_BY_ID_SQL, set(chain[1::2]), 'movie_id')
+        connection.close()
+
+        if id not in actors or other_id not in actors:
+            return jsonify({'error': 'Actor not found'}), 404
+
+        # Chains through something deleted by another worker since the last rebuild count as no path
+        path = [actors.get(node) if i % 2 == 0 else movies.get(node) for i, node in enumerate(chain)]
+        if not chain or None in path:
+            return jsonify({'degrees': None, 'path': []})
+        return jsonify({'degrees': len(chain) // 2, 'path': path})
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while finding the path'}), 500
+
 @app.route('/movies/<int:id>/reviews', methods=['GET'])
 def get_reviews(id):
     try:
+        after, limit, paginated = page_args()
+
         # Connect to the database
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        # Fetch reviews for the specified movie
+        # Fetch one page of reviews for the specified movie
         cursor.execute("""
-            SELECT review_id, star_rating, review_text 
-            FROM review 
-            WHERE movie_id = %s
-        """, (id,))
-        reviews = cursor.fetchall()
+            SELECT review_id, star_rating, review_text
+            FROM review
+            WHERE movie_id = %s AND review_id > %s
+            ORDER BY review_id LIMIT %s
+        """, (id, after, limit + 1))
+        reviews, next_cursor = split_page(cursor.fetchall(), 'review_id', limit)
         connection.close()
 
-        if not reviews:
+        if not reviews and not after:
             return jsonify({'message': 'No reviews found for this movie', 'success': False}), 404
 
         # Return the reviews
-        return jsonify({'message': 'Reviews retrieved successfully', 'success': True, 'reviews': reviews}), 200
+        return jsonify(with_next_cursor(
+            {'message': 'Reviews retrieved successfully', 'success': True, 'reviews': reviews},
+            next_cursor, paginated
+        )), 200
 
+    except InvalidPage as e:
+        return jsonify({'error': str(e), 'success': False}), 400
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while fetching reviews', 'success': False}), 500
 
+@app.route('/movies/<int:id>/reviews/search', methods=['GET'])
+def search_movie_reviews(id):
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required', 'success': False}), 400
+
+        limit = limit_arg(20)
+        cursor = get_db_connection().cursor(pymysql.cursors.DictCursor)
+        reviews = ranked_reviews(
+            cursor, query, limit, "SELECT r.review_id, r.star_rating, r.review_text FROM review r", movie_id=id
+        )
+        return jsonify({'reviews': reviews})
+    except InvalidPage as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while searching reviews', 'success': False}), 500
+
 @app.route('/movies/<int:id>/reviews', methods=['POST'])
 def add_review(id):
     try:
@@ -681,7 +1546,17 @@ def add_review(id):
             "INSERT INTO review (movie_id, user_id, star_rating, review_text) VALUES (%s, %s, %s, %s)",
             (id, user_id, star_rating, review_text)
         )
+        review_id = cursor.lastrowid  # Read before the statements below reset it
+        ratings.add_rating(cursor, id, star_rating)
+        bump(cursor, 'movie', id)
         connection.commit()
+        movie_cache.invalidate(id)
+        leaderboard.rate(id, 1, star_rating)
+        movie_prefixes.add_weight(id, 1)
+        cast = movie_cast_reviews(id)
+        if cast:
+            reweigh_actors(cast[0], 1)
+        review_index.add((id, review_id), review_text, None)
 
         return jsonify({"message": "Review added successfully", "success": True}), 201
 
@@ -689,6 +1564,65 @@ def add_review(id):
         print(f"Error: {e}")
         return jsonify({"message": "An error occurred while adding the review", "success": False}), 500
 
+@app.route('/movies/<int:id>/rating', methods=['GET'])
+def movie_rating(id):
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+
+        # Read the maintained summary rather than aggregating the reviews
+        cursor.execute(ratings.RATING_SQL, (id,))
+        row = cursor.fetchone()
+        connection.close()
+
+        if not row:
+            return jsonify({'message': f'Movie with ID {id} not found', 'success': False}), 404
+
+        return jsonify({'movie_id': id, 'rating': ratings.summary(row)})
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while fetching the rating', 'success': False}), 500
+
+# Movies sharing cast and genres; a genre in common counts for SIMILAR_GENRE_WEIGHT of an actor
+SIMILAR_GENRE_WEIGHT = float(os.getenv('SIMILAR_GENRE_WEIGHT', 0.5))
+SIMILAR_REFRESH = float(os.getenv('SIMILAR_REFRESH', 300))
+similar_movies = SimilarMovies(genre_weight=SIMILAR_GENRE_WEIGHT, refresh_interval=SIMILAR_REFRESH)
+
+def rebuild_similar_movies():
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT movies_movie_id, actors_actor_id FROM movie_actors")
+    cast = cursor.fetchall()
+    cursor.execute("SELECT movies_movie_id, ref_movie_genres_movie_genres_type FROM movie_genres")
+    similar_movies.rebuild(cast, cursor.fetchall())
+
+def current_similar_movies():
+    rebuild_once(similar_movies, rebuild_similar_movies)
+    return similar_movies
+
+@app.route('/movies/<int:id>/similar', methods=['GET'])
+def similar_to_movie(id):
+    try:
+        limit = limit_arg(10)
+
+        connection = get_db_connection()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        similar = current_similar_movies().similar(id, limit)
+        movies = fetch_by_id(cursor, MOVIES_BY_ID_SQL, [id] + [movie_id for movie_id, _ in similar], 'movie_id')
+        connection.close()
+
+        if id not in movies:
+            return jsonify({'message': f'Movie with ID {id} not found', 'success': False}), 404
+
+        # Movies deleted by another worker since the last rebuild are skipped
+        return jsonify({'movie_id': id, 'similar': [
+            dict(movies[movie_id], similarity=round(score, 4)) for movie_id, score in similar if movie_id in movies
+        ]})
+    except InvalidPage as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while fetching similar movies', 'success': False}), 500
+
 @app.route('/movies/<int:id>/genres', methods=['GET'])
 def movie_genres(id):
     try:
@@ -741,10 +1675,9 @@ def add_genre_to_movie(id):
             return jsonify({'error': 'Movie not found'}), 404
 
         # Check if the genre exists in ref_movie_genres
-        cursor.execute("SELECT * FROM ref_movie_genres WHERE movie_genres_type = %s", (genre_type,))
-        genre = cursor.fetchone()
+        genre_type = find_genre(genre_type, check=True)
 
-        if not genre:
+        if not genre_type:
             return jsonify({'error': 'Genre not found'}), 404
 
         # Check if the genre is already associated with the movie
@@ -761,9 +1694,15 @@ def add_genre_to_movie(id):
             INSERT INTO movie_genres (movies_movie_id, ref_movie_genres_movie_genres_type)
             VALUES (%s, %s)
         """, (id, genre_type))
+        bump(cursor, 'movie', id)
+        bump(cursor, 'genre', genre_type)
 
         # Commit the transaction
         connection.commit()
+        movie_cache.invalidate(id)
+        leaderboard.add_genre(id, genre_type)
+        similar_movies.add_genre(id, genre_type)
+        movie_bitmaps.add_genre(id, genre_type)
 
         # Now close the connection
         connection.close()
@@ -814,6 +1753,11 @@ def add_actor_to_movie(id):
         # Validate the input
         if not actor_id:
             return jsonify({'error': 'Actor ID is required'}), 400
+        # The in-memory indexes key actors by int, so "1" must not reach them as a str
+        try:
+            actor_id = int(actor_id)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Actor ID must be an integer'}), 400
 
         # Connect to the database
         connection = get_db_connection()
@@ -850,9 +1794,18 @@ def add_actor_to_movie(id):
             INSERT INTO movie_actors (movies_movie_id, actors_actor_id)
             VALUES (%s, %s)
         """, (id, actor_id))
+        bump(cursor, 'movie', id)
+        bump(cursor, 'actor', actor_id)
 
         # Commit the transaction
         connection.commit()
+        movie_cache.invalidate(id)
+        costar_graph.add_cast(actor_id, id)
+        movie_bitmaps.add_actor(id, actor_id)
+        similar_movies.add_actor(id, actor_id)
+        cast = movie_cast_reviews(id)
+        if cast:
+            reweigh_actors([actor_id], cast[1])
         connection.close()
 
         return jsonify({'message': 'Actor added to the movie successfully'}), 201
@@ -864,15 +1817,13 @@ def add_actor_to_movie(id):
 @app.route('/genres')
 def genres():
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-
-        # Fetch all genres
-        cursor.execute("SELECT movie_genres_type FROM ref_movie_genres")
-        genres = [row['movie_genres_type'] for row in cursor.fetchall()]
+        # Served from the genre cache without touching MySQL
+        version, genres = cached_genres()
+        tag = etag('genres', '*', version)
+        if client_has_version(tag):
+            return not_modified(tag)
 
-        connection.close()
-        return jsonify({'genres': genres})
+        return with_etag(app.response_class(genres['body'], mimetype='application/json'), tag)
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'Error occurred while fetching genres'}), 500
@@ -890,20 +1841,18 @@ def add_genre():
         if not new_genre:
             return jsonify({'error': 'Genre type is required'}), 400
 
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-
         # Check if the genre already exists
-        cursor.execute("SELECT movie_genres_type FROM ref_movie_genres WHERE movie_genres_type = %s", (new_genre,))
-        existing_genre = cursor.fetchone()
-
-        if existing_genre:
-            connection.close()
+        if find_genre(new_genre, check=True):
             return jsonify({'error': 'Genre already exists'}), 400
 
+        connection = get_db_connection()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+
         # Insert the new genre into the database
         cursor.execute("INSERT INTO ref_movie_genres (movie_genres_type) VALUES (%s)", (new_genre,))
+        bump(cursor, 'genres', '*')
         connection.commit()
+        genre_cache.invalidate()
 
         connection.close()
         return jsonify({'message': 'Genre added successfully'}), 201
@@ -914,29 +1863,38 @@ def add_genre():
 @app.route('/genres/<string:genre>')
 def genre_by_type(genre):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        after, limit, paginated = page_args()
 
         # Check if the genre exists
-        cursor.execute("SELECT movie_genres_type FROM ref_movie_genres WHERE movie_genres_type = %s", (genre,))
-        genre_data = cursor.fetchone()
+        genre = find_genre(genre)
+
+        if genre:
+            connection = get_db_connection()
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        if genre_data:
-            # Fetch movies associated with the genre
+            # A client that already holds the current version is answered from the version alone
+            tag = etag('genre', genre, get_version(cursor, 'genre', genre))
+            if client_has_version(tag):
+                connection.close()
+                return not_modified(tag)
+
+            # Fetch one page of movies associated with the genre
             cursor.execute("""
                 SELECT m.movie_id, m.movie_title
                 FROM movie_genres mg
                 JOIN movies m ON mg.movies_movie_id = m.movie_id
-                WHERE mg.ref_movie_genres_movie_genres_type = %s
-            """, (genre,))
-            movies = cursor.fetchall()
-            genre_data['movies'] = movies  # Add movies to the genre details
+                WHERE mg.ref_movie_genres_movie_genres_type = %s AND mg.movies_movie_id > %s
+                ORDER BY mg.movies_movie_id LIMIT %s
+            """, (genre, after, limit + 1))
+            movies, next_cursor = split_page(cursor.fetchall(), 'movie_id', limit)
+            genre_data = {'movie_genres_type': genre, 'movies': movies}
 
             connection.close()
-            return jsonify({'genre': genre_data})
+            return with_etag(jsonify(with_next_cursor({'genre': genre_data}, next_cursor, paginated)), tag)
         else:
-            connection.close()
             return jsonify({'error': 'Genre not found'}), 404
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error: {e}")
         return "Error occurred while fetching genre details", 500
@@ -949,17 +1907,22 @@ def delete_genre(genre):
         if not auth_response['success']:
             return jsonify(auth_response), status_code
 
-        connection = get_db_connection()
-        cursor = connection.cursor()
-
         # Check if the genre exists in the ref_movie_genres table
-        cursor.execute("SELECT movie_genres_type FROM ref_movie_genres WHERE movie_genres_type = %s", (genre,))
-        genre_data = cursor.fetchone()
+        genre = find_genre(genre, check=True)
 
-        if not genre_data:
-            connection.close()
+        if not genre:
             return jsonify({'error': 'Genre not found'}), 404
 
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        # Bump the versions while the genre's movies are still associated with it
+        bump(cursor, 'genres', '*')
+        bump(cursor, 'genre', genre)
+        bump_related(cursor, 'movie', """
+            SELECT movies_movie_id AS entity_key FROM movie_genres WHERE ref_movie_genres_movie_genres_type = %s
+        """, (genre,))
+
         # Delete all associated movie-genre relationships
         cursor.execute("DELETE FROM movie_genres WHERE ref_movie_genres_movie_genres_type = %s", (genre,))
         
@@ -967,6 +1930,11 @@ def delete_genre(genre):
         cursor.execute("DELETE FROM ref_movie_genres WHERE movie_genres_type = %s", (genre,))
         
         connection.commit()
+        genre_cache.invalidate()
+        movie_cache.invalidate_tag(('genre', genre))
+        leaderboard.remove_genre(genre)
+        movie_bitmaps.remove_genre(genre)
+        similar_movies.remove_genre(genre)
         connection.close()
 
         return jsonify({'message': 'Genre deleted successfully', 'success': True}), 200
@@ -976,6 +1944,47 @@ def delete_genre(genre):
         return jsonify({'error': 'An error occurred while fetching the genre', 'success': False}), 500
 
 
+# Factors trained offline by `flask train-recommendations`, memory-mapped by every worker
+recommendation_model = recommend.ModelFile(
+    os.getenv('RECOMMENDATIONS_PATH', os.path.join(root_dir, 'recommendations.model')),
+    check_interval=float(os.getenv('RECOMMENDATIONS_CHECK_INTERVAL', 10))
+)
+
+@app.route('/profile/recommendations', methods=['GET'])
+def get_recommendations():
+    try:
+        # Authenticate the user
+        auth_response, status_code = authenticate(role=0)
+        if not auth_response['success']:
+            return jsonify(auth_response), status_code
+
+        user_id = auth_response['user_id']
+        limit = limit_arg(10)
+
+        model = recommendation_model.get()
+        if model is None:
+            return jsonify({'message': 'Recommendations are not available yet', 'success': False}), 503
+
+        # Movies reviewed since the model was trained are excluded too
+        connection = get_db_connection()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute("SELECT movie_id FROM review WHERE user_id = %s", (user_id,))
+        seen = {row['movie_id'] for row in cursor.fetchall()}
+        predicted = model.recommend(user_id, limit, exclude=seen)
+        movies = fetch_by_id(cursor, MOVIES_BY_ID_SQL, [movie_id for movie_id, _ in predicted], 'movie_id')
+        connection.close()
+
+        # Movies deleted since the model was trained are skipped
+        return jsonify({'recommendations': [
+            dict(movies[movie_id], predicted_rating=round(min(max(rating, 0.0), 10.0), 2))
+            for movie_id, rating in predicted if movie_id in movies
+        ]})
+    except InvalidPage as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while fetching recommendations', 'success': False}), 500
+
 @app.route('/profile/reviews', methods=['GET'])
 def get_user_reviews():
     try:
@@ -985,27 +1994,31 @@ def get_user_reviews():
             return jsonify(auth_response), status_code
 
         user_id = auth_response['user_id']
+        after, limit, paginated = page_args()
 
         # Connect to the database
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        # Fetch reviews created by the authenticated user
+        # Fetch one page of reviews created by the authenticated user
         cursor.execute("""
             SELECT r.review_id, r.movie_id, r.star_rating, r.review_text, m.movie_title
             FROM review r
             JOIN movies m ON r.movie_id = m.movie_id
-            WHERE r.user_id = %s
-        """, (user_id,))
-        reviews = cursor.fetchall()
-        
+            WHERE r.user_id = %s AND r.review_id > %s
+            ORDER BY r.review_id LIMIT %s
+        """, (user_id, after, limit + 1))
+        reviews, next_cursor = split_page(cursor.fetchall(), 'review_id', limit)
+
         connection.close()
 
-        if reviews:
-            return jsonify({'reviews': reviews})
+        if reviews or after:
+            return jsonify(with_next_cursor({'reviews': reviews}, next_cursor, paginated))
         else:
             return jsonify({'message': 'No reviews found for this user', 'success': False}), 404
 
+    except InvalidPage as e:
+        return jsonify({'error': str(e), 'success': False}), 400
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while fetching reviews', 'success': False}), 500
@@ -1025,9 +2038,10 @@ def delete_review(review_id):
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        # Check if the review exists and if the authenticated user created it
+        # Check if the review exists and if the authenticated user created it,
+        # locking it so the rating summary is adjusted from its current star rating
         cursor.execute("""
-            SELECT user_id FROM review WHERE review_id = %s
+            SELECT user_id, movie_id, star_rating FROM review WHERE review_id = %s FOR UPDATE
         """, (review_id,))
         review = cursor.fetchone()
 
@@ -1043,7 +2057,16 @@ def delete_review(review_id):
         cursor.execute("""
             DELETE FROM review WHERE review_id = %s
         """, (review_id,))
+        ratings.remove_rating(cursor, review['movie_id'], review['star_rating'])
+        bump(cursor, 'movie', review['movie_id'])
         connection.commit()
+        movie_cache.invalidate(review['movie_id'])
+        leaderboard.rate(review['movie_id'], -1, -float(review['star_rating']))
+        movie_prefixes.add_weight(review['movie_id'], -1)
+        cast = movie_cast_reviews(review['movie_id'])
+        if cast:
+            reweigh_actors(cast[0], -1)
+        review_index.remove((review['movie_id'], review_id))
         connection.close()
 
         return jsonify({'message': 'Review deleted successfully'}), 200
@@ -1075,9 +2098,10 @@ def update_review(review_id):
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        # Check if the review exists and if the authenticated user created it
+        # Check if the review exists and if the authenticated user created it,
+        # locking it so the rating summary is adjusted from its current star rating
         cursor.execute("""
-            SELECT user_id FROM review WHERE review_id = %s
+            SELECT user_id, movie_id, star_rating FROM review WHERE review_id = %s FOR UPDATE
         """, (review_id,))
         review = cursor.fetchone()
 
@@ -1095,7 +2119,12 @@ def update_review(review_id):
             SET star_rating = %s, review_text = %s
             WHERE review_id = %s
         """, (star_rating, review_text, review_id))
+        ratings.change_rating(cursor, review['movie_id'], review['star_rating'], star_rating)
+        bump(cursor, 'movie', review['movie_id'])
         connection.commit()
+        movie_cache.invalidate(review['movie_id'])
+        leaderboard.rate(review['movie_id'], 0, float(star_rating) - float(review['star_rating']))
+        review_index.add((review['movie_id'], review_id), review_text, None)
         connection.close()
 
         return jsonify({'message': 'Review updated successfully'}), 200
@@ -1113,31 +2142,65 @@ def get_all_reviews():
         if not auth_response['success']:
             return jsonify(auth_response), status_code
 
+        after, limit, paginated = page_args()
+
         # Connect to the database
         connection = get_db_connection()
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
-        # Fetch all reviews from the database
+        # Fetch one page of reviews from the database
         cursor.execute("""
             SELECT r.review_id, r.movie_id, r.star_rating, r.review_text, m.movie_title, u.username
             FROM review r
             JOIN movies m ON r.movie_id = m.movie_id
             JOIN users u ON r.user_id = u.user_id
-        """)
-        reviews = cursor.fetchall()
-        
+            WHERE r.review_id > %s
+            ORDER BY r.review_id LIMIT %s
+        """, (after, limit + 1))
+        reviews, next_cursor = split_page(cursor.fetchall(), 'review_id', limit)
+
         connection.close()
 
-        if reviews:
-            return jsonify({'reviews': reviews})
+        if reviews or after:
+            return jsonify(with_next_cursor({'reviews': reviews}, next_cursor, paginated))
         else:
             return jsonify({'message': 'No reviews found', 'success': False}), 404
 
+    except InvalidPage as e:
+        return jsonify({'error': str(e), 'success': False}), 400
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while fetching reviews', 'success': False}), 500
 
 
+@app.route('/reviews/search', methods=['GET'])
+def search_all_reviews():
+    try:
+        # Authenticate the user (Admin role=1)
+        auth_response, status_code = authenticate(role=1)  # Admin role is 1
+        if not auth_response['success']:
+            return jsonify(auth_response), status_code
+
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required', 'success': False}), 400
+
+        limit = limit_arg(20)
+        cursor = get_db_connection().cursor(pymysql.cursors.DictCursor)
+        reviews = ranked_reviews(cursor, query, limit, """
+            SELECT r.review_id, r.movie_id, r.star_rating, r.review_text, m.movie_title, u.username
+            FROM review r
+            JOIN movies m ON r.movie_id = m.movie_id
+            JOIN users u ON r.user_id = u.user_id
+        """)
+        return jsonify({'reviews': reviews})
+    except InvalidPage as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while searching reviews', 'success': False}), 500
+
+
 @app.route('/reviews/<int:review_id>', methods=['GET'])
 def get_specific_review(review_id):
     try:
@@ -1182,10 +2245,10 @@ def delete_specific_review(review_id):
 
         # Connect to the database
         connection = get_db_connection()
-        cursor = connection.cursor()
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
 
         # Check if the review exists
-        cursor.execute("SELECT review_id FROM review WHERE review_id = %s", (review_id,))
+        cursor.execute("SELECT review_id, movie_id, star_rating FROM review WHERE review_id = %s FOR UPDATE", (review_id,))
         review = cursor.fetchone()
 
         if not review:
@@ -1194,7 +2257,16 @@ def delete_specific_review(review_id):
 
         # Delete the review from the database
         cursor.execute("DELETE FROM review WHERE review_id = %s", (review_id,))
+        ratings.remove_rating(cursor, review['movie_id'], review['star_rating'])
+        bump(cursor, 'movie', review['movie_id'])
         connection.commit()
+        movie_cache.invalidate(review['movie_id'])
+        leaderboard.rate(review['movie_id'], -1, -float(review['star_rating']))
+        movie_prefixes.add_weight(review['movie_id'], -1)
+        cast = movie_cast_reviews(review['movie_id'])
+        if cast:
+            reweigh_actors(cast[0], -1)
+        review_index.remove((review['movie_id'], review_id))
 
         connection.close()
 
@@ -1204,5 +2276,180 @@ def delete_specific_review(review_id):
         print(f"Error: {e}")
         return jsonify({'error': 'An error occurred while deleting the review', 'success': False}), 500
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    try:
+        auth_response, status_code = authenticate(role=1)
+        if not auth_response['success']:
+            return jsonify(auth_response), status_code
+
+        return jsonify({
+            'db_pool': db_pool.stats(),
+            'multi_statement_pool': multi_statement_pool.stats(),
+            'auth_cache': credential_cache.stats(),
+            'genre_cache': genre_cache.stats(),
+            'movie_cache': movie_cache.stats(),
+            'leaderboard': leaderboard.stats(),
+            'search': catalog_index.stats(),
+            'review_search': review_index.stats(),
+            'costar_graph': costar_graph.stats(),
+            'similar_movies': similar_movies.stats(),
+            'recommendations': recommendation_model.stats(),
+            'movie_bitmaps': movie_bitmaps.stats(),
+            'autocomplete': {'movies': movie_prefixes.stats(), 'actors': actor_prefixes.stats()},
+            'bcrypt': hashing_pool.stats()
+        }), 200
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while fetching stats'}), 500
+
+# Movies per batch of actor, genre and rating lookups while exporting the catalog
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+def export_catalog_lines():
+    # The movies are streamed from the server on a connection of their own, since that connection
+    # cannot run other queries until every row is read; each batch is expanded on a second one
+    movie_connection, detail_connection = db_pool.connect(), multi_statement_pool.connect()
+    finished = False
+    try:
+        movie_cursor = movie_connection.cursor(pymysql.cursors.SSDictCursor)
+        detail_cursor = detail_connection.cursor(pymysql.cursors.DictCursor)
+        movie_cursor.execute("SELECT * FROM movies ORDER BY movie_id")
+        while True:
+            batch = movie_cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not batch:
+                break
+            movies = {movie['movie_id']: movie for movie in batch}
+            statements = expansion_statements(BATCH_EXPANSIONS, len(movies))
+            detail_cursor.execute(';'.join(statements), list(movies) * len(statements))
+            attach_expansions(detail_cursor, movies, BATCH_EXPANSIONS)
+            yield ''.join(app.json.dumps(movie) + '\n' for movie in batch)
+        finished = True
+    except Exception as e:
+        # The status line is already sent; the client sees the response end without its final chunk
+        print(f"Error: {e}")
+        raise
+    finally:
+        detail_connection.close()
+        # A client that disconnects mid-export leaves unread rows behind, so that connection is not reused
+        if finished:
+            movie_connection.close()
+        else:
+            movie_connection.invalidate()
+
+@app.route('/export/catalog.ndjson', methods=['GET'])
+def export_catalog():
+    try:
+        auth_response, status_code = authenticate(role=1)
+        if not auth_response['success']:
+            return jsonify(auth_response), status_code
+
+        # One movie per line, with its actors, genres and rating, read and sent a batch at a time
+        return app.response_class(
+            stream_with_context(export_catalog_lines()),
+            mimetype='application/x-ndjson',
+            headers={'Content-Disposition': 'attachment; filename=catalog.ndjson'}
+        )
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({'error': 'An error occurred while exporting the catalog'}), 500
+
+# Records written per transaction by POST /import, unless ?batch_size= asks for another size
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+IMPORT_BATCH_SIZE_MAX = int(os.getenv('IMPORT_BATCH_SIZE_MAX', 10000))
+IMPORT_FORMATS = {'application/x-ndjson': ndjson_records, 'text/csv': csv_records}
+
+def reload_catalog_structures():
+    # After a bulk write every in-memory view of the catalog is rebuilt from the database on next use
+    genre_cache.invalidate()
+    for structure in (leaderboard, catalog_index, movie_prefixes, actor_prefixes,
+                      costar_graph, similar_movies, movie_bitmaps):
+        structure.clear()
+
+@app.route('/import', methods=['POST'])
+def import_catalog():
+    importer = None
+    try:
+        auth_response, status_code = authenticate(role=1)
+        if not auth_response['success']:
+            return jsonify(auth_response), status_code
+
+        read_records = IMPORT_FORMATS.get(request.mimetype)
+        if not read_records:
+            return jsonify({'error': 'Send the records as application/x-ndjson or text/csv'}), 415
+        try:
+            batch_size = int(request.args.get('batch_size', IMPORT_BATCH_SIZE))
+        except ValueError:
+            batch_size = 0
+        if not 1 <= batch_size <= IMPORT_BATCH_SIZE_MAX:
+            return jsonify({'error': f'batch_size must be between 1 and {IMPORT_BATCH_SIZE_MAX}'}), 400
+
+        # The body is parsed as it arrives, so only one batch of records is held at a time
+        connection = get_db_connection()
+        importer = CatalogImport(connection, batch_size)
+        report = importer.run(read_records(request.stream, request.args.get('type')))
+        connection.close()
+        if importer.batches:
+            reload_catalog_structures()
+
+        return jsonify(report), 200
+    except Exception as e:
+        print(f"Error: {e}")
+        payload = {'error': 'An error occurred while importing the catalog'}
+        # Batches committed before the failure stay imported
+        if importer is not None:
+            if importer.batches:
+                reload_catalog_structures()
+            payload['report'] = importer.report()
+        return jsonify(payload), 500
+
+@app.cli.command('rebuild-ratings')
+def rebuild_ratings():
+    """Recompute every movie's rating summary from the review table."""
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    rated = ratings.rebuild(cursor)
+
+    # Every movie detail embeds its rating, so cached copies in running workers are stale
+    bump_related(cursor, 'movie', "SELECT movie_id AS entity_key FROM movies", ())
+    connection.commit()
+    connection.close()
+    print(f"Rebuilt rating summaries for {rated} movies")
+
+@app.cli.command('set-role')
+@click.argument('user_id', type=int)
+@click.option('--admin/--reviewer', default=False, help='Make the user an admin, or a reviewer.')
+def set_role(user_id, admin):
+    """Change a user's role; running workers re-verify the API keys they have cached."""
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    updated = cursor.execute("UPDATE users SET is_admin = %s WHERE user_id = %s", (int(admin), user_id))
+    bump(cursor, 'credentials', '*')
+    connection.commit()
+    connection.close()
+    if updated:
+        print(f"User {user_id} is now {'an admin' if admin else 'a reviewer'}")
+    else:
+        print(f"User {user_id} not found")
+
+@app.cli.command('train-recommendations')
+@click.option('--factors', default=32, help='Latent factors per user and movie.')
+@click.option('--iterations', default=10, help='Alternating least squares sweeps.')
+@click.option('--regularization', default=0.1, help='Ridge penalty per rating.')
+def train_recommendations(factors, iterations, regularization):
+    """Factorise the review ratings and publish the model to RECOMMENDATIONS_PATH."""
+    connection = get_db_connection()
+    # Streamed rather than buffered; train reads the rows straight into one array of 24-byte records
+    cursor = connection.cursor(pymysql.cursors.SSCursor)
+    cursor.execute("SELECT user_id, movie_id, star_rating FROM review")
+    started = time.time()
+    model, rmse = recommend.train(cursor, factors=factors, iterations=iterations, regularization=regularization)
+    connection.close()
+
+    model.save(recommendation_model.path)
+    print(f"Trained on {len(model.user_ids)} users and {len(model.movie_ids)} movies "
+          f"in {time.time() - started:.1f}s, training RMSE {rmse:.3f}")
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', debug=True)
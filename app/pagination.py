@@ -0,0 +1,61 @@
+import base64
+import json
+
+
+class InvalidPage(ValueError):
+    """Raised for a malformed limit or cursor query parameter."""
+
+
+def encode_cursor(last_key):
+    # Opaque to clients: the primary key of the last row they have seen
+    payload = json.dumps({'after': last_key}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['after']
+    except (ValueError, KeyError, TypeError):
+        raise InvalidPage('Invalid cursor')
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise InvalidPage('Invalid cursor')
+    return after
+
+
+def parse_page_args(args, max_page_size):
+    """Read ?limit= and ?cursor= from the query string.
+
+    Returns (after, limit, paginated): rows with a key greater than `after`
+    should be returned, at most `limit` of them. `paginated` is False when the
+    client asked for neither, in which case the response keeps its
+    unpaginated shape as long as everything fits in one page.
+    """
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+    paginated = limit is not None or cursor is not None
+
+    if limit is None:
+        limit = max_page_size
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise InvalidPage('limit must be a positive integer')
+        if limit <= 0:
+            raise InvalidPage('limit must be a positive integer')
+        limit = min(limit, max_page_size)
+
+    after = decode_cursor(cursor) if cursor else 0
+    return after, limit, paginated
+
+
+def split_page(rows, key, limit):
+    """Split rows fetched with LIMIT limit + 1 into the page and the next cursor.
+
+    With key None the rows are the keys themselves.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1] if key is None else rows[-1][key])
+    return rows, None
@@ -0,0 +1,82 @@
+"""Per-movie rating summaries kept in the movie_ratings table.
+
+Every review write adjusts the summary of its movie in the same
+transaction. Reading a movie's rating is then a primary-key lookup
+instead of a scan of its reviews. rebuild() recomputes every summary
+from the review table.
+"""
+
+# Bucket n counts the star ratings in [n, n + 1); 10.0 gets a bucket of its own
+BUCKETS = range(11)
+BUCKET_COLUMNS = ', '.join(f'bucket_{n}' for n in BUCKETS)
+
+# Movies without reviews have no summary row; no row at all means no such movie
+RATING_SQL = """
+    SELECT m.movie_id AS found_movie_id, r.*
+    FROM movies m
+    LEFT JOIN movie_ratings r ON r.movie_id = m.movie_id
+    WHERE m.movie_id = %s
+"""
+
+REBUILD_SQL = (
+    "DELETE FROM movie_ratings",
+    f"""
+    INSERT INTO movie_ratings (movie_id, review_count, rating_sum, {BUCKET_COLUMNS})
+    SELECT movie_id, COUNT(*), SUM(star_rating),
+        {', '.join(f'SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = {n})' for n in BUCKETS)}
+    FROM review
+    GROUP BY movie_id
+    """
+)
+
+
+def bucket_column(star_rating):
+    return f'bucket_{min(max(int(star_rating), 0), 10)}'
+
+
+def add_rating(cursor, movie_id, star_rating):
+    column = bucket_column(star_rating)
+    cursor.execute(f"""
+        INSERT INTO movie_ratings (movie_id, review_count, rating_sum, {column})
+        VALUES (%s, 1, %s, 1)
+        ON DUPLICATE KEY UPDATE
+            review_count = review_count + 1, rating_sum = rating_sum + %s, {column} = {column} + 1
+    """, (movie_id, star_rating, star_rating))
+
+
+def remove_rating(cursor, movie_id, star_rating):
+    column = bucket_column(star_rating)
+    cursor.execute(f"""
+        UPDATE movie_ratings
+        SET review_count = review_count - 1, rating_sum = rating_sum - %s, {column} = {column} - 1
+        WHERE movie_id = %s
+    """, (star_rating, movie_id))
+
+
+def change_rating(cursor, movie_id, old_rating, new_rating):
+    old_column, new_column = bucket_column(old_rating), bucket_column(new_rating)
+    buckets = ''
+    if old_column != new_column:
+        buckets = f', {old_column} = {old_column} - 1, {new_column} = {new_column} + 1'
+    cursor.execute(f"""
+        UPDATE movie_ratings SET rating_sum = rating_sum - %s + %s{buckets}
+        WHERE movie_id = %s
+    """, (old_rating, new_rating, movie_id))
+
+
+def rebuild(cursor):
+    """Recompute every summary from the review table; returns the number of movies rated."""
+    for sql in REBUILD_SQL:
+        cursor.execute(sql)
+    return cursor.rowcount
+
+
+def summary(row):
+    # Movies without reviews have no row
+    if not row or not row['review_count']:
+        return {'review_count': 0, 'average_rating': None, 'histogram': [0 for _ in BUCKETS]}
+    return {
+        'review_count': row['review_count'],
+        'average_rating': round(float(row['rating_sum']) / row['review_count'], 2),
+        'histogram': [row[f'bucket_{n}'] for n in BUCKETS]
+    }
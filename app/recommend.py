@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+HEADER_SIZE = 4096
+ALIGNMENT = 64
+CHUNK = 8192  # Ratings whose outer products are held at once; 8192 * 33 * 33 doubles is about 70MB
+RATING_DTYPE = np.dtype([('user_id', np.int64), ('movie_id', np.int64), ('rating', np.float64)])
+
+
+def _solve(rows, columns, column_factors, targets, count, regularization):
+    """One ALS half-step: ridge-regress every row's ratings on the other side's factors.
+
+    Each row gets factors x minimising sum((target - x . f)^2) + regularization * n * |x|^2
+    over its n ratings. rows must be sorted. Consecutive rows are solved
+    together as a stack of k x k systems, as many as have CHUNK ratings
+    between them; a row with more ratings than that is solved on its own.
+    """
+    k = column_factors.shape[1]
+    bounds = np.searchsorted(rows, np.arange(count + 1))  # Ratings of row i are bounds[i]:bounds[i + 1]
+    solved = np.empty((count, k))
+    first = 0
+    while first < count:
+        last = int(np.searchsorted(bounds, bounds[first] + CHUNK, 'right')) - 1
+        last = max(min(last, count), first + 1)
+        start, end = bounds[first], bounds[last]
+        factors = column_factors[columns[start:end]]
+        weighted = factors * targets[start:end, None]
+        if last == first + 1:
+            gram, moment = (factors.T @ factors)[None], weighted.sum(axis=0)[None]
+        else:
+            segments = bounds[first:last] - start
+            gram = np.add.reduceat(factors[:, :, None] * factors[:, None, :], segments, axis=0)
+            moment = np.add.reduceat(weighted, segments, axis=0)
+        counts = np.diff(bounds[first:last + 1])
+        gram += (regularization * counts)[:, None, None] * np.eye(k)
+        solved[first:last] = np.linalg.solve(gram, moment[:, :, None])[:, :, 0]
+        first = last
+    return solved
+
+
+def train(ratings, factors=32, iterations=10, regularization=0.1, seed=1):
+    """Factorise (user_id, movie_id, star_rating) triples with alternating least squares.
+
+    A rating is predicted as mean + user_bias + movie_bias + user . movie.
+    The biases are learnt as one more factor against a constant 1 on the
+    other side, so each half-step is a single batched solve. Returns the
+    model and its root mean squared error on the training ratings.
+    """
+    # Filled row by row as ratings is consumed, without building a list of the rows first
+    triples = np.fromiter(
+        ((user_id, movie_id, float(rating)) for user_id, movie_id, rating in ratings), dtype=RATING_DTYPE
+    )
+    if not len(triples):
+        raise ValueError('There are no ratings to train on')
+    user_ids, users = np.unique(triples['user_id'], return_inverse=True)
+    movie_ids, movies = np.unique(triples['movie_id'], return_inverse=True)
+    values = triples['rating']
+    mean = values.mean()
+    by_user = np.argsort(users, kind='stable')
+    by_movie = np.argsort(movies, kind='stable')
+
+    rng = np.random.default_rng(seed)
+    # Users are [factors, bias, 1] and movies [factors, 1, bias], so a dot product includes both biases
+    user_factors = np.hstack([rng.normal(0, 0.1, (len(user_ids), factors)), np.zeros((len(user_ids), 1)),
+                              np.ones((len(user_ids), 1))])
+    movie_factors = np.hstack([rng.normal(0, 0.1, (len(movie_ids), factors)), np.ones((len(movie_ids), 1)),
+                               np.zeros((len(movie_ids), 1))])
+    user_columns = list(range(factors + 1))
+    movie_columns = list(range(factors)) + [factors + 1]
+
+    for _ in range(iterations):
+        # Each side solves for its factors and bias, with the other side's bias moved into the target
+        residual = values - mean - movie_factors[movies, factors + 1]
+        user_factors[:, user_columns] = _solve(
+            users[by_user], movies[by_user], movie_factors[:, user_columns], residual[by_user],
+            len(user_ids), regularization
+        )
+        residual = values - mean - user_factors[users, factors]
+        movie_factors[:, movie_columns] = _solve(
+            movies[by_movie], users[by_movie], user_factors[:, movie_columns], residual[by_movie],
+            len(movie_ids), regularization
+        )
+
+    predicted = mean + np.einsum('ij,ij->i', user_factors[users], movie_factors[movies])
+    model = FactorModel(
+        mean=float(mean),
+        user_ids=user_ids,
+        user_factors=user_factors[:, :factors].astype(np.float32),
+        user_bias=user_factors[:, factors].astype(np.float32),
+        movie_ids=movie_ids,
+        movie_factors=movie_factors[:, :factors].astype(np.float32),
+        movie_bias=movie_factors[:, factors + 1].astype(np.float32),
+    )
+    return model, float(np.sqrt(np.mean((predicted - values) ** 2)))
+
+
+class FactorModel:
+    """Trained user and movie factors, saved to and memory-mapped from a single file.
+
+    The file is a JSON header padded to HEADER_SIZE bytes followed by the
+    raw arrays, each aligned to ALIGNMENT bytes. Loading maps the arrays
+    read-only without copying, so every worker process shares one copy in
+    the page cache.
+    """
+
+    ARRAYS = ('user_ids', 'user_factors', 'user_bias', 'movie_ids', 'movie_factors', 'movie_bias')
+
+    def __init__(self, mean, user_ids, user_factors, user_bias, movie_ids, movie_factors, movie_bias):
+        self.mean = mean
+        self.user_ids = user_ids
+        self.user_factors = user_factors
+        self.user_bias = user_bias
+        self.movie_ids = movie_ids
+        self.movie_factors = movie_factors
+        self.movie_bias = movie_bias
+
+    def save(self, path):
+        # Written next to the old file and renamed over it, so workers never map a partial model
+        arrays, offset = {}, HEADER_SIZE
+        for name in self.ARRAYS:
+            values = np.ascontiguousarray(getattr(self, name))
+            arrays[name] = {'dtype': values.dtype.str, 'shape': values.shape, 'offset': offset}
+            offset += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+        header = json.dumps({'mean': self.mean, 'arrays': arrays}).encode('utf-8')
+        if len(header) > HEADER_SIZE:
+            raise ValueError('Model header does not fit')
+
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b' '))
+            for name in self.ARRAYS:
+                f.seek(arrays[name]['offset'])
+                f.write(np.ascontiguousarray(getattr(self, name)).tobytes())
+            f.truncate(offset)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = json.loads(f.read(HEADER_SIZE))
+        arrays = {
+            name: np.memmap(path, dtype=np.dtype(spec['dtype']), mode='r', offset=spec['offset'],
+                            shape=tuple(spec['shape']))
+            for name, spec in header['arrays'].items()
+        }
+        return cls(header['mean'], **arrays)
+
+    def recommend(self, user_id, limit, exclude=()):
+        """Return up to limit (movie_id, predicted_rating) not in exclude, best first.
+
+        Users the model has not seen get the movies with the highest bias.
+        """
+        i = np.searchsorted(self.user_ids, user_id)
+        if i < len(self.user_ids) and self.user_ids[i] == user_id:
+            scores = self.movie_factors @ self.user_factors[i] + self.movie_bias + (self.mean + self.user_bias[i])
+        else:
+            scores = self.movie_bias + np.float32(self.mean)
+
+        exclude = np.fromiter(exclude, dtype=np.int64)
+        positions = np.searchsorted(self.movie_ids, exclude)
+        known = positions < len(self.movie_ids)
+        positions, exclude = positions[known], exclude[known]
+        scores[positions[self.movie_ids[positions] == exclude]] = -np.inf
+
+        limit = min(limit, len(scores))
+        if not limit:
+            return []
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(self.movie_ids[j]), float(scores[j])) for j in best if np.isfinite(scores[j])]
+
+
+class ModelFile:
+    """The model at path, remapped when the training job replaces the file.
+
+    The file's identity is checked at most every check_interval seconds.
+    get() returns None until a model has been trained.
+    """
+
+    def __init__(self, path, check_interval=10):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._model = None
+        self._identity = None
+        self._checked_at = None
+
+    def get(self):
+        now = time.time()
+        with self._lock:
+            if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                try:
+                    stat = os.stat(self.path)
+                    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    identity = None
+                if identity != self._identity:
+                    self._model = FactorModel.load(self.path) if identity else None
+                    self._identity = identity
+            return self._model
+
+    def stats(self):
+        with self._lock:
+            model = self._model
+            return {
+                'path': self.path,
+                'loaded': model is not None,
+                'users': len(model.user_ids) if model is not None else 0,
+                'movies': len(model.movie_ids) if model is not None else 0,
+                'checked_at': self._checked_at,
+            }
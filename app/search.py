@@ -0,0 +1,213 @@
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def fold(text):
+    """Lower-case text and strip diacritics, so 'Amélie' and 'AMELIE' match."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+def trigrams(term):
+    padded = f'$${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or None if it is more than limit."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        # Distances never shrink further down the table
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+class InvertedIndex:
+    """In-memory inverted index ranked with BM25.
+
+    Documents are identified by any hashable key and carry a payload that
+    is returned with the search results. The index is rebuilt from the
+    database every refresh_interval seconds so that writes made by other
+    workers show up. Writes in this process update it immediately.
+
+    The vocabulary is also indexed by trigram for typo-tolerant search.
+    Padded as '$$term$', a query term of length n has n + 1 trigrams, and
+    each edit changes at most three of them, so a term within edit distance
+    d shares all but 3d of the query term's distinct trigrams. Only terms
+    sharing that many are compared with the query term, never the whole
+    vocabulary.
+    """
+
+    def __init__(self, refresh_interval=300, k1=1.2, b=0.75):
+        self.refresh_interval = refresh_interval
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._postings = {}  # term -> {key: term frequency}
+        self._grams = {}  # trigram -> set of terms
+        self._by_length = {}  # term length -> set of terms, for terms too short to filter by trigram
+        self._documents = {}  # key -> (payload, terms, length)
+        self._total_length = 0
+        self._built_at = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def needs_rebuild(self):
+        built_at = self._built_at
+        return built_at is None or time.time() - built_at >= self.refresh_interval
+
+    def is_built(self):
+        return self._built_at is not None
+
+    def rebuild(self, documents):
+        """Replace the index with documents, an iterable of (key, text, payload)."""
+        # Build off to the side so searches keep using the old index meanwhile
+        fresh = InvertedIndex()
+        for key, text, payload in documents:
+            fresh._add(key, text, payload)
+
+        with self._lock:
+            self._postings = fresh._postings
+            self._grams = fresh._grams
+            self._by_length = fresh._by_length
+            self._documents = fresh._documents
+            self._total_length = fresh._total_length
+            self._built_at = time.time()
+
+    # Updates are no-ops until the first rebuild, which reads everything anyway
+
+    def add(self, key, text, payload):
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(key)
+                self._add(key, text, payload)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _add(self, key, text, payload):
+        # Called with the lock held
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                for gram in trigrams(term):
+                    self._grams.setdefault(gram, set()).add(term)
+                self._by_length.setdefault(len(term), set()).add(term)
+            postings[key] = frequency
+        length = sum(terms.values())
+        self._documents[key] = (payload, tuple(terms), length)
+        self._total_length += length
+
+    def _remove(self, key):
+        # Called with the lock held
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        _, terms, length = document
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                for gram in trigrams(term):
+                    self._grams[gram].discard(term)
+                    if not self._grams[gram]:
+                        del self._grams[gram]
+                self._by_length[len(term)].discard(term)
+        self._total_length -= length
+
+    def search(self, query, limit, accept=None, max_distance=0):
+        """Return up to limit (score, key, payload) for documents matching any query term.
+
+        accept, if given, filters candidate keys before they are ranked.
+        With max_distance, query terms also match vocabulary terms up to
+        that many edits away, scored down by 1 / (1 + distance).
+        """
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            scores = {}
+            for query_term in set(tokenize(query)):
+                # A document counts each query term once, through its closest matching term
+                term_scores = {}
+                for term, distance in self._expand(query_term, max_distance):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for key, frequency in postings.items():
+                        if accept is not None and not accept(key):
+                            continue
+                        length = self._documents[key][2]
+                        norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                        score = idf * frequency * (self.k1 + 1) / (frequency + norm) / (1 + distance)
+                        if score > term_scores.get(key, 0.0):
+                            term_scores[key] = score
+                for key, score in term_scores.items():
+                    scores[key] = scores.get(key, 0.0) + score
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(score, key, self._documents[key][0]) for key, score in best]
+
+    def _expand(self, query_term, max_distance):
+        # Called with the lock held; yields (term, distance) for vocabulary terms close enough
+        if query_term in self._postings:
+            yield query_term, 0
+        # At most one edit per three characters, or short words would match almost anything
+        max_distance = min(max_distance, len(query_term) // 3)
+        if max_distance <= 0:
+            return
+
+        grams = trigrams(query_term)
+        needed = len(grams) - 3 * max_distance
+        if needed > 0:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._grams.get(gram, ()))
+            candidates = [term for term, hits in shared.items() if hits >= needed]
+        else:
+            candidates = [
+                term
+                for length in range(len(query_term) - max_distance, len(query_term) + max_distance + 1)
+                for term in self._by_length.get(length, ())
+            ]
+
+        for term in candidates:
+            if term != query_term:
+                distance = edit_distance(query_term, term, max_distance)
+                if distance is not None:
+                    yield term, distance
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'terms': len(self._postings),
+                'trigrams': len(self._grams),
+                'built_at': self._built_at,
+            }
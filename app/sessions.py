@@ -0,0 +1,152 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+
+from itsdangerous import Signer, BadSignature
+
+
+def new_session_id():
+    return secrets.token_urlsafe(32)
+
+
+def sign_session_id(secret_key, session_id):
+    return Signer(secret_key, salt='session').sign(session_id).decode('utf-8')
+
+
+def unsign_session_id(secret_key, cookie):
+    # Returns None for cookies that were tampered with or signed with another key
+    try:
+        return Signer(secret_key, salt='session').unsign(cookie).decode('utf-8')
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+
+class MemorySessionStore:
+    """Sessions kept in this process, split over shards to reduce lock contention.
+
+    Only suitable for a single worker process. Expired sessions are dropped
+    when read and swept from one shard at a time at most every sweep_interval
+    seconds.
+    """
+
+    def __init__(self, shards=16, sweep_interval=60):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+        self._sweep_shard = 0
+        self._sweep_lock = threading.Lock()
+
+    def _shard(self, session_id):
+        return self._shards[zlib.crc32(session_id.encode('utf-8')) % len(self._shards)]
+
+    def get(self, session_id):
+        self._maybe_sweep()
+        sessions, lock = self._shard(session_id)
+        with lock:
+            entry = sessions.get(session_id)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at <= time.time():
+                del sessions[session_id]
+                return None
+            return dict(data)
+
+    def set(self, session_id, data, expires_at):
+        self._maybe_sweep()
+        sessions, lock = self._shard(session_id)
+        with lock:
+            sessions[session_id] = (dict(data), expires_at)
+
+    def delete(self, session_id):
+        sessions, lock = self._shard(session_id)
+        with lock:
+            sessions.pop(session_id, None)
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            sessions, lock = self._shards[self._sweep_shard]
+            self._sweep_shard = (self._sweep_shard + 1) % len(self._shards)
+            with lock:
+                for session_id in [sid for sid, (_, exp) in sessions.items() if exp <= now]:
+                    del sessions[session_id]
+        finally:
+            self._sweep_lock.release()
+
+    def __len__(self):
+        return sum(len(sessions) for sessions, _ in self._shards)
+
+
+class SQLiteSessionStore:
+    """Sessions kept in an SQLite file shared by all worker processes on a host.
+
+    Each thread uses its own connection. The database runs in WAL mode so
+    readers in one worker do not block writers in another. Expired rows are
+    ignored when read and deleted at most every sweep_interval seconds.
+    """
+
+    def __init__(self, path, sweep_interval=60):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        connection.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            # Connections must not be shared with forked children
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, session_id):
+        self._maybe_sweep()
+        row = self._connection().execute(
+            'SELECT data FROM sessions WHERE session_id = ? AND expires_at > ?',
+            (session_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, session_id, data, expires_at):
+        self._maybe_sweep()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)',
+            (session_id, json.dumps(data), expires_at)
+        )
+
+    def delete(self, session_id):
+        self._connection().execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        self._connection().execute('DELETE FROM sessions WHERE expires_at <= ?', (now,))
+
+
+def create_session_store(backend, path=None, sweep_interval=60):
+    if backend == 'memory':
+        return MemorySessionStore(sweep_interval=sweep_interval)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(path, sweep_interval=sweep_interval)
+    raise ValueError(f"Unknown session store: {backend}")
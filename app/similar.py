@@ -0,0 +1,244 @@
+import heapq
+import threading
+import time
+import zlib
+from itertools import chain
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+EMPTY = MERSENNE_PRIME  # Larger than any hash value
+FNV_PRIME = np.uint64(0x100000001b3)
+CHUNK = 1 << 16  # (movie, feature) pairs hashed at once, bounding the temporary matrix
+
+
+def actor_feature(actor_id):
+    return actor_id * 2
+
+
+def genre_feature(genre):
+    return zlib.crc32(genre.encode('utf-8')) * 2 + 1
+
+
+class SimilarMovies:
+    """Movies that share cast and genres, ranked by weighted Jaccard similarity.
+
+    Every movie is a set of features, its actors and its genres, where a
+    genre counts for genre_weight of an actor. Comparing a movie with the
+    whole catalog is linear per request and quadratic overall. Instead each
+    movie gets a MinHash signature of bands * rows hash minimums. Movies
+    agreeing on every row of some band land in the same bucket of that band,
+    which happens with high probability for similar sets and rarely
+    otherwise. Only movies sharing a bucket are scored exactly.
+
+    Signatures are computed with NumPy in chunks on rebuild. Each band's
+    buckets are a sorted array of keys, looked up with searchsorted. Movies
+    whose cast or genres change in this process are rehashed individually
+    into an overlay of dict buckets until the next rebuild.
+    """
+
+    def __init__(self, genre_weight=0.5, bands=24, rows=3, max_candidates=2000, refresh_interval=300, seed=1):
+        self.genre_weight = genre_weight
+        self.bands = bands
+        self.rows = rows
+        self.max_candidates = max_candidates
+        self.refresh_interval = refresh_interval
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=bands * rows, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=bands * rows, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._features = {}  # movie_id -> set of features
+        self._movie_ids = np.zeros(0, dtype=np.int64)
+        self._band_keys = [np.zeros(0, dtype=np.uint64)] * self.bands  # sorted bucket keys
+        self._band_movies = [np.zeros(0, dtype=np.int32)] * self.bands  # index into _movie_ids for each key
+        self._changed = {}  # movie_id -> its band keys in the overlay
+        self._changed_buckets = [{} for _ in range(self.bands)]  # band key -> movie ids
+        self._built_at = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def needs_rebuild(self):
+        built_at = self._built_at
+        return built_at is None or time.time() - built_at >= self.refresh_interval
+
+    def is_built(self):
+        return self._built_at is not None
+
+    def _signatures(self, owners, features, count):
+        # owners[i] is the row of features[i]; rows must be sorted so each chunk reduces by segment
+        signatures = np.full((count, self.bands * self.rows), EMPTY, dtype=np.uint32)
+        for start in range(0, len(features), CHUNK):
+            chunk_owners = owners[start:start + CHUNK]
+            values = features[start:start + CHUNK] % np.uint64(MERSENNE_PRIME)
+            hashes = ((values[:, None] * self._a + self._b) % np.uint64(MERSENNE_PRIME)).astype(np.uint32)
+            starts = np.flatnonzero(np.r_[True, chunk_owners[1:] != chunk_owners[:-1]])
+            rows = chunk_owners[starts]
+            signatures[rows] = np.minimum(signatures[rows], np.minimum.reduceat(hashes, starts, axis=0))
+        return signatures
+
+    def _band_keys_of(self, signatures):
+        # One 64-bit key per band, mixing that band's rows FNV-style
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        for row in range(self.rows):
+            keys = (keys * FNV_PRIME) ^ banded[:, :, row]
+        return keys
+
+    def _keys_for(self, features):
+        values = np.fromiter(features, dtype=np.uint64, count=len(features))
+        signature = self._signatures(np.zeros(len(values), dtype=np.int64), values, 1)
+        return self._band_keys_of(signature)[0].tolist()
+
+    def rebuild(self, cast, genres):
+        """Replace the index.
+
+        cast yields (movie_id, actor_id) and genres yields (movie_id, genre).
+        """
+        features = {}
+        for movie_id, actor_id in cast:
+            features.setdefault(movie_id, set()).add(actor_feature(actor_id))
+        for movie_id, genre in genres:
+            features.setdefault(movie_id, set()).add(genre_feature(genre))
+
+        movie_ids = np.array(sorted(features), dtype=np.int64)
+        counts = np.array([len(features[movie_id]) for movie_id in movie_ids.tolist()], dtype=np.int64)
+        owners = np.repeat(np.arange(len(movie_ids)), counts)
+        values = np.fromiter(
+            chain.from_iterable(features[movie_id] for movie_id in movie_ids.tolist()),
+            dtype=np.uint64, count=int(counts.sum())
+        )
+        keys = self._band_keys_of(self._signatures(owners, values, len(movie_ids)))
+
+        band_keys, band_movies = [], []
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind='stable')
+            band_keys.append(keys[order, band])
+            band_movies.append(order.astype(np.int32))
+
+        with self._lock:
+            self._clear()
+            self._features = features
+            self._movie_ids, self._band_keys, self._band_movies = movie_ids, band_keys, band_movies
+            self._built_at = time.time()
+
+    def add_actor(self, movie_id, actor_id):
+        self._add_feature(movie_id, actor_feature(actor_id))
+
+    def add_genre(self, movie_id, genre):
+        self._add_feature(movie_id, genre_feature(genre))
+
+    def _add_feature(self, movie_id, feature):
+        with self._lock:
+            if self._built_at is None:
+                return
+            features = self._features.setdefault(movie_id, set())
+            if feature in features:
+                return
+            features.add(feature)
+            self._rehash(movie_id, self._keys_for(features))
+
+    def remove_actor(self, actor_id):
+        self._remove_feature(actor_feature(actor_id))
+
+    def remove_genre(self, genre):
+        self._remove_feature(genre_feature(genre))
+
+    def _remove_feature(self, feature):
+        # Deleting an actor or genre is rare, so the movies that have it are found by a scan
+        with self._lock:
+            movie_ids = [movie_id for movie_id, features in self._features.items() if feature in features]
+            rehashed = []
+            for movie_id in movie_ids:
+                features = self._features[movie_id]
+                features.discard(feature)
+                if features:
+                    rehashed.append(movie_id)
+                else:
+                    del self._features[movie_id]
+                    self._unchange(movie_id)
+            if not rehashed:
+                return
+            # A genre can be on a large share of the catalog, so the signatures are computed together
+            counts = np.array([len(self._features[movie_id]) for movie_id in rehashed], dtype=np.int64)
+            values = np.fromiter(
+                chain.from_iterable(self._features[movie_id] for movie_id in rehashed),
+                dtype=np.uint64, count=int(counts.sum())
+            )
+            owners = np.repeat(np.arange(len(rehashed)), counts)
+            keys = self._band_keys_of(self._signatures(owners, values, len(rehashed)))
+            for movie_id, movie_keys in zip(rehashed, keys.tolist()):
+                self._rehash(movie_id, movie_keys)
+
+    def _rehash(self, movie_id, keys):
+        # Called with the lock held; moves the movie to the overlay buckets of its new band keys
+        self._unchange(movie_id)
+        for band, key in enumerate(keys):
+            self._changed_buckets[band].setdefault(key, set()).add(movie_id)
+        self._changed[movie_id] = keys
+
+    def remove_movie(self, movie_id):
+        # Its entries in the base buckets are skipped once it has no features
+        with self._lock:
+            self._features.pop(movie_id, None)
+            self._unchange(movie_id)
+
+    def _unchange(self, movie_id):
+        # Called with the lock held
+        keys = self._changed.pop(movie_id, None)
+        for band, key in enumerate(keys or ()):
+            bucket = self._changed_buckets[band][key]
+            bucket.discard(movie_id)
+            if not bucket:
+                del self._changed_buckets[band][key]
+
+    def _weight(self, feature):
+        return self.genre_weight if feature & 1 else 1.0
+
+    def similarity(self, a, b):
+        shared = sum(self._weight(feature) for feature in a & b)
+        return shared / sum(self._weight(feature) for feature in a | b) if shared else 0.0
+
+    def similar(self, movie_id, limit):
+        """Return up to limit (movie_id, similarity), most similar first."""
+        with self._lock:
+            features = self._features.get(movie_id)
+            if not features:
+                return []
+            keys = self._changed.get(movie_id) or self._keys_for(features)
+
+            candidates = set()
+            for band, key in enumerate(keys):
+                candidates.update(self._changed_buckets[band].get(key, ()))
+                band_keys = self._band_keys[band]
+                start = np.searchsorted(band_keys, np.uint64(key), 'left')
+                end = np.searchsorted(band_keys, np.uint64(key), 'right')
+                # Huge buckets (say, movies with a single common genre and no cast) are sampled
+                end = min(end, start + max(0, self.max_candidates - len(candidates)))
+                candidates.update(self._movie_ids[self._band_movies[band][start:end]].tolist())
+            candidates.discard(movie_id)
+
+            scored = []
+            for candidate in candidates:
+                other = self._features.get(candidate)
+                if other:
+                    score = self.similarity(features, other)
+                    if score:
+                        scored.append((score, -candidate))
+        return [(-candidate, score) for score, candidate in heapq.nlargest(limit, scored)]
+
+    def stats(self):
+        with self._lock:
+            arrays = [self._movie_ids, *self._band_keys, *self._band_movies]
+            return {
+                'movies': len(self._features),
+                'bands': self.bands,
+                'rows': self.rows,
+                'changed_movies': len(self._changed),
+                'bytes': sum(values.nbytes for values in arrays),
+                'built_at': self._built_at,
+            }
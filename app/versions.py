@@ -0,0 +1,59 @@
+"""Per-entity version counters stored in the entity_versions table.
+
+Every write that changes what a cached representation of an entity looks
+like bumps that entity's counter in the same transaction. Readers derive
+strong ETags from the counter, so a conditional GET can be answered from
+the version alone.
+"""
+
+VERSION_SQL = "SELECT version FROM entity_versions WHERE entity = %s AND entity_key = %s"
+
+BUMP_SQL = """
+    INSERT INTO entity_versions (entity, entity_key, version)
+    VALUES (%s, %s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+
+# Placeholders only, so executemany sends all the keys as one multi-row INSERT
+BUMP_MANY_SQL = """
+    INSERT INTO entity_versions (entity, entity_key, version)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+
+def get_version(cursor, entity, key):
+    cursor.execute(VERSION_SQL, (entity, str(key)))
+    return version_from_row(cursor.fetchone())
+
+
+def version_from_row(row):
+    # Entities that were never written to have no row yet
+    if not row:
+        return 0
+    return row['version'] if isinstance(row, dict) else row[0]
+
+
+def bump(cursor, entity, *keys):
+    for key in keys:
+        cursor.execute(BUMP_SQL, (entity, str(key)))
+
+
+def bump_many(cursor, entity, keys):
+    keys = {str(key) for key in keys}
+    if keys:
+        cursor.executemany(BUMP_MANY_SQL, [(entity, key, 1) for key in keys])
+
+
+def bump_related(cursor, entity, key_query, params):
+    """Bump every entity whose key is returned by key_query, in one statement."""
+    cursor.execute(f"""
+        INSERT INTO entity_versions (entity, entity_key, version)
+        SELECT %s, related.entity_key, 1 FROM ({key_query}) AS related
+        ON DUPLICATE KEY UPDATE version = entity_versions.version + 1
+    """, (entity, *params))
+
+
+def etag(entity, key, version):
+    return f'{entity}-{key}-{version}'
@@ -0,0 +1,146 @@
+"""Fuzzy search over a synthetic catalog: trigram candidate filtering versus scanning the vocabulary.
+
+Builds an InvertedIndex over --titles generated movie titles, then searches
+for titles with one or two typos injected. Reports the build time, the
+latency and recall of exact and fuzzy search, and how long finding the
+terms within --distance of each query word takes with the trigram index
+compared with computing the edit distance to every term in the vocabulary.
+
+    python bench/bench_fuzzy_search.py
+    python bench/bench_fuzzy_search.py --titles 100000 --queries 500 --distance 1
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from search import InvertedIndex, edit_distance, tokenize  # noqa: E402
+
+SYLLABLES = [
+    'ka', 'ro', 'mi', 'ten', 'vor', 'sha', 'lun', 'dra', 'bel', 'qui', 'nox', 'ar',
+    'es', 'tor', 'gal', 'phe', 'wyn', 'zel', 'cor', 'ith', 'um', 'bra', 'sol', 'dex',
+]
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_titles(rng, vocabulary, count):
+    return [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))) for _ in range(count)]
+
+
+def add_typos(rng, word, edits):
+    for _ in range(edits):
+        position = rng.randrange(len(word))
+        kind = rng.choice(('substitute', 'insert', 'delete', 'transpose'))
+        if kind == 'substitute':
+            word = word[:position] + rng.choice(LETTERS) + word[position + 1:]
+        elif kind == 'insert':
+            word = word[:position] + rng.choice(LETTERS) + word[position:]
+        elif kind == 'delete' and len(word) > 3:
+            word = word[:position] + word[position + 1:]
+        elif position + 1 < len(word):
+            word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return word
+
+
+def make_queries(rng, titles, count, distance):
+    queries = []
+    for key in rng.sample(range(len(titles)), count):
+        words = titles[key].split()
+        # Misspell the longest word, the one a user is most likely to get wrong
+        longest = max(range(len(words)), key=lambda i: len(words[i]))
+        words[longest] = add_typos(rng, words[longest], rng.randint(1, distance))
+        queries.append((key, ' '.join(words)))
+    return queries
+
+
+def brute_force_terms(index, term, distance):
+    distance = min(distance, len(term) // 3)
+    found = set()
+    for candidate in index._postings:
+        if edit_distance(term, candidate, distance) is not None:
+            found.add(candidate)
+    return found
+
+
+def summarize(timings):
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+    }
+
+
+def measure_search(index, queries, limit, distance):
+    timings = []
+    hits = 0
+    for key, query in queries:
+        started = time.perf_counter()
+        results = index.search(query, limit, max_distance=distance)
+        timings.append((time.perf_counter() - started) * 1000)
+        hits += any(result_key == key for _, result_key, _ in results)
+    return dict(summarize(timings), recall=round(hits / len(queries), 3))
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=1_000_000)
+    parser.add_argument('--vocabulary', type=int, default=50_000, help='distinct words titles are made of')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--brute-force-queries', type=int, default=50, help='queries also run against the full scan')
+    parser.add_argument('--distance', type=int, default=2)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    titles = make_titles(rng, make_vocabulary(rng, args.vocabulary), args.titles)
+    queries = make_queries(rng, titles, min(args.queries, len(titles)), args.distance)
+
+    index = InvertedIndex()
+    started = time.perf_counter()
+    index.rebuild((key, title, None) for key, title in enumerate(titles))
+    build_seconds = time.perf_counter() - started
+
+    # Both ways of expanding a query word must find the same terms before their speed matters
+    trigram_timings, scan_timings = [], []
+    identical = True
+    for _, query in queries[:args.brute_force_queries]:
+        for term in tokenize(query):
+            started = time.perf_counter()
+            with index._lock:
+                expanded = {found for found, _ in index._expand(term, args.distance)}
+            trigram_timings.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            scanned = brute_force_terms(index, term, args.distance)
+            scan_timings.append((time.perf_counter() - started) * 1000)
+            identical = identical and expanded == scanned
+
+    results = {
+        'titles': len(titles),
+        'build_seconds': round(build_seconds, 2),
+        'index': index.stats(),
+        'identical_expansions': identical,
+        'expand_trigram': summarize(trigram_timings),
+        'expand_full_scan': summarize(scan_timings),
+        'search_exact': measure_search(index, queries, args.limit, 0),
+        'search_fuzzy': measure_search(index, queries, args.limit, args.distance),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,160 @@
+"""Latency of GET /movies/<id>: four sequential queries versus one multi-statement round trip.
+
+By default the database is simulated: every round trip to the server costs
+--rtt milliseconds, which is what dominates the endpoint on a real network.
+Pass --live to run both variants against the database configured in .env
+instead.
+
+    python bench/bench_movie_detail.py --rtt 0.5 --requests 2000
+    python bench/bench_movie_detail.py --live --movie-id 1
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import pymysql  # noqa: E402
+import main  # noqa: E402
+
+LEGACY_QUERIES = [
+    "SELECT * FROM movies WHERE movie_id = %s",
+    "SELECT star_rating, review_text FROM review WHERE movie_id = %s",
+    """
+    SELECT a.actor_id, a.first_name, a.last_name
+    FROM movie_actors ma
+    JOIN actors a ON ma.actors_actor_id = a.actor_id
+    WHERE ma.movies_movie_id = %s
+    """,
+    """
+    SELECT rg.movie_genres_type
+    FROM movie_genres mg
+    JOIN ref_movie_genres rg ON mg.ref_movie_genres_movie_genres_type = rg.movie_genres_type
+    WHERE mg.movies_movie_id = %s
+    """,
+]
+
+SAMPLE_RESULTS = [
+    [{'movie_id': 1, 'movie_title': 'Inception'}],
+    [{'star_rating': 9, 'review_text': 'Amazing movie!'}] * 20,
+    [{'actor_id': i, 'first_name': 'First', 'last_name': 'Last'} for i in range(10)],
+    [{'movie_genres_type': 'Action'}, {'movie_genres_type': 'Sci-Fi'}],
+]
+
+
+class SimulatedCursor:
+    """Returns canned result sets and sleeps one round trip per execute()."""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.round_trips = 0
+        self._next_statement = 0
+        self._results = []
+
+    def execute(self, sql, args=None):
+        time.sleep(self.rtt)
+        self.round_trips += 1
+        statements = sql.count(';') + 1
+        start = self._next_statement
+        self._results = SAMPLE_RESULTS[start:start + statements]
+        self._next_statement = (start + statements) % len(SAMPLE_RESULTS)
+
+    def nextset(self):
+        self._results = self._results[1:]
+        return True if self._results else None
+
+    def fetchone(self):
+        return dict(self._results[0][0]) if self._results[0] else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._results[0]]
+
+
+class SimulatedConnection:
+    def __init__(self, rtt):
+        self._cursor = SimulatedCursor(rtt)
+
+    def cursor(self, *args):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+def legacy_movie_detail(connection, movie_id):
+    # The implementation GET /movies/<id> used before the multi-statement query
+    cursor = connection.cursor(pymysql.cursors.DictCursor)
+    cursor.execute(LEGACY_QUERIES[0], (movie_id,))
+    movie = cursor.fetchone()
+    cursor.execute(LEGACY_QUERIES[1], (movie_id,))
+    movie['reviews'] = cursor.fetchall()
+    cursor.execute(LEGACY_QUERIES[2], (movie_id,))
+    movie['actors'] = cursor.fetchall()
+    cursor.execute(LEGACY_QUERIES[3], (movie_id,))
+    movie['genres'] = [genre['movie_genres_type'] for genre in cursor.fetchall()]
+    return movie
+
+
+def single_round_trip_movie_detail(connection, movie_id):
+    cursor = connection.cursor(pymysql.cursors.DictCursor)
+    cursor.execute(main.MOVIE_DETAIL_SQL, {'id': movie_id})
+    movie = cursor.fetchone()
+    cursor.nextset()
+    movie['reviews'] = cursor.fetchall()
+    cursor.nextset()
+    movie['actors'] = cursor.fetchall()
+    cursor.nextset()
+    movie['genres'] = [genre['movie_genres_type'] for genre in cursor.fetchall()]
+    return movie
+
+
+def measure(fn, connect, movie_id, requests):
+    timings = []
+    for _ in range(requests):
+        connection = connect()
+        started = time.perf_counter()
+        fn(connection, movie_id)
+        timings.append((time.perf_counter() - started) * 1000)
+        connection.close()
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--rtt', type=float, default=0.5, help='simulated round trip in milliseconds')
+    parser.add_argument('--live', action='store_true', help='use the database configured in .env')
+    parser.add_argument('--movie-id', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.live:
+        # Both variants run on the connections GET /movies/<id> uses, which allow several statements
+        connect = main.multi_statement_pool.connect
+    else:
+        connect = lambda: SimulatedConnection(args.rtt / 1000)  # noqa: E731
+
+    # Both variants must produce the same JSON before their speed matters
+    legacy = legacy_movie_detail(connect(), args.movie_id)
+    single = single_round_trip_movie_detail(connect(), args.movie_id)
+    with main.app.app_context():
+        identical = main.app.json.dumps({'movie': legacy}) == main.app.json.dumps({'movie': single})
+
+    results = {
+        'mode': 'live' if args.live else f'simulated rtt={args.rtt}ms',
+        'identical_json': identical,
+        'four_queries': measure(legacy_movie_detail, connect, args.movie_id, args.requests),
+        'single_round_trip': measure(single_round_trip_movie_detail, connect, args.movie_id, args.requests),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,8 @@
+-- API keys are looked up by key id (the JWT 'jti' claim) and verified with an
+-- HMAC-SHA256 digest stored in user_keys.api_key instead of a bcrypt hash.
+--
+-- Rows created before this migration keep their bcrypt hash and a NULL jti.
+-- They are upgraded in place the first time the key is used.
+ALTER TABLE user_keys
+    ADD COLUMN jti CHAR(32) NULL,
+    ADD UNIQUE INDEX idx_user_keys_jti (jti);
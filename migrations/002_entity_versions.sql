@@ -0,0 +1,11 @@
+-- Version counters behind the ETags of GET /movies/<id>, /actors/<id>,
+-- /genres and /genres/<genre>.
+--
+-- Writes bump the counter of every entity whose representation they change,
+-- inside the same transaction. Entities without a row are at version 0.
+CREATE TABLE entity_versions (
+    entity VARCHAR(32) NOT NULL,
+    entity_key VARCHAR(255) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (entity, entity_key)
+);
@@ -0,0 +1,39 @@
+-- Rating summary per movie, kept up to date by the review endpoints.
+-- bucket_n counts the reviews with a star_rating in [n, n + 1).
+--
+-- The INSERT below fills the table from the existing reviews. Run
+-- `flask rebuild-ratings` later to recompute it from scratch.
+CREATE TABLE movie_ratings (
+    movie_id INT NOT NULL PRIMARY KEY,
+    review_count INT UNSIGNED NOT NULL DEFAULT 0,
+    rating_sum DOUBLE NOT NULL DEFAULT 0,
+    bucket_0 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_1 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_2 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_3 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_4 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_5 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_6 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_7 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_8 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_9 INT UNSIGNED NOT NULL DEFAULT 0,
+    bucket_10 INT UNSIGNED NOT NULL DEFAULT 0
+);
+
+INSERT INTO movie_ratings (movie_id, review_count, rating_sum,
+    bucket_0, bucket_1, bucket_2, bucket_3, bucket_4, bucket_5,
+    bucket_6, bucket_7, bucket_8, bucket_9, bucket_10)
+SELECT movie_id, COUNT(*), SUM(star_rating),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 0),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 1),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 2),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 3),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 4),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 5),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 6),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 7),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 8),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 9),
+    SUM(LEAST(GREATEST(FLOOR(star_rating), 0), 10) = 10)
+FROM review
+GROUP BY movie_id;
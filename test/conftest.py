@@ -0,0 +1,25 @@
+import pytest
+from unittest.mock import MagicMock
+import main
+
+# The in-memory catalog structures live for the whole process; start every test from empty ones
+def clear_catalog_structures():
+    main.genre_cache.invalidate()
+    for structure in (main.movie_cache, main.leaderboard, main.catalog_index,
+                      main.movie_prefixes, main.actor_prefixes, main.review_index,
+                      main.costar_graph, main.similar_movies, main.movie_bitmaps):
+        structure.clear()
+
+# Credentials start at version 0, checked just now, so authentication tests only see their own queries
+def reset_credentials():
+    main.credential_cache.clear()
+    version_cursor = MagicMock()
+    version_cursor.fetchone.return_value = (0,)
+    main.credential_versions.get(lambda: version_cursor, check=True)
+
+@pytest.fixture(autouse=True)
+def empty_catalog_caches():
+    clear_catalog_structures()
+    reset_credentials()
+    yield
+    clear_catalog_structures()
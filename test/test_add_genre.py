@@ -80,7 +80,8 @@ def test_add_genre_already_exists(mock_db, mock_authenticate, client):
     mock_db.return_value.cursor.return_value = mock_cursor
     
     # Simulate the genre already existing in the database
-    mock_cursor.fetchone.return_value = {'movie_genres_type': 'Action'}
+    mock_cursor.fetchone.return_value = {'version': 1}
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]
     
     # Simulate the POST request to add an existing genre
     data = {'movie_genres_type': 'Action'}
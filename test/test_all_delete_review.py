@@ -20,7 +20,7 @@ def test_delete_specific_review_success(mock_db, mock_authenticate, client):
     mock_db.return_value.cursor.return_value = mock_cursor
 
     # Simulate a review being found in the database
-    mock_cursor.fetchone.return_value = {'review_id': 1}  # Review exists
+    mock_cursor.fetchone.return_value = {'review_id': 1, 'movie_id': 1, 'star_rating': 8.0}  # Review exists
 
     # Simulate the DELETE request to delete a specific review
     response = client.delete('/reviews/1')  # Delete review with ID 1
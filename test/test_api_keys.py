@@ -0,0 +1,110 @@
+import pytest
+import time
+import jwt
+import bcrypt
+from unittest.mock import patch, MagicMock
+from main import app, authenticate, api_key_digest, legacy_key_id, credential_cache
+
+SECRET = 'test-secret'
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture(autouse=True)
+def empty_credential_cache():
+    credential_cache.clear()
+    yield
+    credential_cache.clear()
+
+def make_key(**claims):
+    payload = {'user_id': 1, 'exp': int(time.time()) + 3600}
+    payload.update(claims)
+    return jwt.encode(payload, SECRET, algorithm='HS256')
+
+# Test that create_token embeds a key id and stores a digest instead of the key
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_create_token_stores_digest(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+
+    response = client.post('/tokens', json={'expiration_hours': 1})
+
+    assert response.status_code == 200
+    api_key = response.json['api_key']
+    decoded = jwt.decode(api_key, SECRET, algorithms=['HS256'])
+
+    query, params = mock_cursor.execute.call_args[0]
+    assert 'jti' in query
+    assert params == (1, api_key_digest(api_key), decoded['jti'])
+
+# Test that a key with a jti is validated with a single indexed lookup
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_authenticate_api_key_by_jti(mock_db):
+    key = make_key(jti='a' * 32)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'api_key': api_key_digest(key), 'is_admin': 0}
+
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=0)
+
+    assert status_code == 200
+    assert response['user_id'] == 1
+    assert mock_cursor.execute.call_args_list[0][0][1] == ('a' * 32,)
+
+# Test that a key whose digest does not match is rejected
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_authenticate_api_key_digest_mismatch(mock_db):
+    key = make_key(jti='a' * 32)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'api_key': '0' * 64, 'is_admin': 0}
+
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=0)
+
+    assert status_code == 401
+    assert response['message'] == 'Invalid API key'
+
+# Test that a key belonging to another user is rejected
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_authenticate_api_key_wrong_user(mock_db):
+    key = make_key(jti='a' * 32)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 2, 'api_key': api_key_digest(key), 'is_admin': 0}
+
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=0)
+
+    assert status_code == 401
+
+# Test that a bcrypt-hashed key without a jti is verified once and migrated
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_authenticate_legacy_key_migrated(mock_db):
+    key = make_key()
+    legacy_hash = bcrypt.hashpw(key.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8')
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None  # No migrated key yet
+    mock_cursor.fetchall.return_value = [{'id': 7, 'api_key': legacy_hash, 'is_admin': 0}]
+
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=0)
+
+    assert status_code == 200
+    digest = api_key_digest(key)
+    mock_cursor.execute.assert_any_call(
+        "UPDATE user_keys SET jti = %s, api_key = %s WHERE id = %s",
+        (legacy_key_id(digest), digest, 7)
+    )
+    mock_db.return_value.commit.assert_called_once()
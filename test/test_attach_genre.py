@@ -21,9 +21,10 @@ def test_add_genre_to_movie_success(mock_auth, mock_db, client):
     # Simulate movie existence and genre existence
     mock_cursor.fetchone.side_effect = [
         {'movie_id': 1},  # Movie exists
-        {'movie_genres_type': 'Action'},  # Genre exists
+        {'version': 1},  # Genre list version
         None  # No existing association for this genre (will be inserted)
     ]
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]  # Genre exists
 
     # Simulate the POST request to add genre to the movie
     response = client.post('/movies/1/genres', json={
@@ -97,9 +98,10 @@ def test_add_genre_to_movie_already_associated(mock_auth, mock_db, client):
     # Simulate movie and genre existence, with existing association
     mock_cursor.fetchone.side_effect = [
         {'movie_id': 1},  # Movie exists
-        {'movie_genres_type': 'Action'},  # Genre exists
+        {'version': 1},  # Genre list version
         {'movies_movie_id': 1, 'ref_movie_genres_movie_genres_type': 'Action'}  # Already associated
     ]
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]  # Genre exists
 
     # Simulate the POST request to add genre that is already associated
     response = client.post('/movies/1/genres', json={
@@ -0,0 +1,81 @@
+import pytest
+import time
+import jwt
+from unittest.mock import patch, MagicMock
+from main import app, authenticate, api_key_digest, credential_cache, session_store
+from sessions import new_session_id, sign_session_id
+
+SECRET = 'test-secret'
+
+@pytest.fixture(autouse=True)
+def empty_credential_cache():
+    credential_cache.clear()
+    yield
+    credential_cache.clear()
+
+def session_cookie(**data):
+    # Store a server-side session and return the signed cookie header for it
+    session_id = new_session_id()
+    session_store.set(session_id, data, time.time() + 60)
+    return {'Cookie': f'session_id={sign_session_id(SECRET, session_id)}'}
+
+def make_key():
+    payload = {'user_id': 1, 'jti': 'a' * 32, 'exp': int(time.time()) + 3600}
+    return jwt.encode(payload, SECRET, algorithm='HS256')
+
+# Test that API key authentication resolves key and role in one query
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_api_key_auth_single_query(mock_db):
+    key = make_key()
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'api_key': api_key_digest(key), 'is_admin': 1}
+
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=1)
+
+    assert status_code == 200
+    assert response['user_id'] == 1
+    assert mock_cursor.execute.call_count == 1
+
+# Test that session authentication resolves credentials and role in one query
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_session_auth_single_query(mock_db):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'password': 'hash', 'is_admin': 1}
+
+    with app.test_request_context(headers=session_cookie(user_id=1, hashed_password='hash')):
+        response, status_code = authenticate(role=1)
+
+    assert status_code == 200
+    assert response['user_id'] == 1
+    assert mock_cursor.execute.call_count == 1
+
+# Test that the single session query still enforces the admin role
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_session_auth_role_denied(mock_db):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'password': 'hash', 'is_admin': 0}
+
+    with app.test_request_context(headers=session_cookie(user_id=1, hashed_password='hash')):
+        response, status_code = authenticate(role=1)
+
+    assert status_code == 403
+    assert mock_cursor.execute.call_count == 1
+
+# Test that a missing session or key is rejected without touching the database
+@patch('main.get_db_connection')
+def test_no_credentials(mock_db):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+
+    with app.test_request_context():
+        response, status_code = authenticate(role=0)
+
+    assert status_code == 401
+    assert mock_cursor.execute.call_count == 0
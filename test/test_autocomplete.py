@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import main
+from main import app
+from autocomplete import PrefixIndex
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def built(short_prefix=2):
+    index = PrefixIndex(short_prefix=short_prefix)
+    index.rebuild([
+        (1, 'Inception', 'Inception', 40),
+        (2, 'Inside Out', 'Inside Out', 90),
+        (3, 'The Dark Knight', 'The Dark Knight', 70),
+        (4, 'Into the Wild', 'Into the Wild', 5),
+    ])
+    return index
+
+# Test prefix matching on any word, ranked by weight
+def test_complete():
+    index = built()
+
+    assert index.complete('in', 10) == ['Inside Out', 'Inception', 'Into the Wild']
+    assert index.complete('INC', 10) == ['Inception']
+    assert index.complete('kni', 10) == ['The Dark Knight']
+    assert index.complete('dark kn', 10) == ['The Dark Knight']
+    assert index.complete('the', 10) == ['The Dark Knight', 'Into the Wild']
+    assert index.complete('zz', 10) == []
+    assert index.complete('in', 1) == ['Inside Out']
+
+# Test that cached short prefixes follow updates
+def test_short_prefix_cache_updates():
+    index = built()
+    assert index.complete('in', 10)[0] == 'Inside Out'
+
+    index.add_weight(1, 100)
+    assert index.complete('in', 10)[0] == 'Inception'
+
+    index.add(5, 'Interstellar', 'Interstellar', weight=500)
+    assert index.complete('in', 10)[0] == 'Interstellar'
+
+    index.remove(5)
+    index.add(1, 'Origin', 'Origin')
+    assert index.complete('in', 10) == ['Inside Out', 'Into the Wild']
+    assert index.complete('or', 10) == ['Origin']
+
+# Test the endpoint for movies and actors
+@patch('main.get_db_connection')
+def test_autocomplete_endpoint(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [
+        [(1, 'Inception', 40), (2, 'Inside Out', None)],
+        [(7, 'Leonardo', 'DiCaprio', 40)]
+    ]
+
+    movies = client.get('/autocomplete?prefix=in')
+    actors = client.get('/autocomplete?prefix=dic&type=actor')
+
+    assert [movie['movie_title'] for movie in movies.json['suggestions']] == ['Inception', 'Inside Out']
+    assert actors.json['suggestions'] == [
+        {'type': 'actor', 'actor_id': 7, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}
+    ]
+
+# Test the required parameters
+def test_autocomplete_bad_request(client):
+    assert client.get('/autocomplete').status_code == 400
+    assert client.get('/autocomplete?prefix=in&type=genre').status_code == 400
+
+# Test that cast and review writes move an actor's suggestion weight without a rebuild
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_actor_weights_follow_writes(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    main.actor_prefixes.rebuild([(1, 'Tom Hanks', 'Tom Hanks', 10), (2, 'Tom Hardy', 'Tom Hardy', 20)])
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+
+    # Tom Hanks joins a movie with 15 reviews
+    mock_cursor.fetchone.side_effect = [{'movie_id': 3}, {'actor_id': 1}, None, (15,)]
+    mock_cursor.fetchall.return_value = [(1,), (2,)]
+    assert client.post('/movies/3/actors', json={'actor_id': 1}).status_code == 201
+    assert main.actor_prefixes.complete('tom', 2) == ['Tom Hanks', 'Tom Hardy']
+
+    # Both of its actors gain its new review
+    mock_cursor.fetchone.side_effect = [(3,), (16,)]
+    assert client.post('/movies/3/reviews', json={'star_rating': 8.0, 'review_text': 'Fun'}).status_code == 201
+    assert main.actor_prefixes._items[1][1] == 26 and main.actor_prefixes._items[2][1] == 21
@@ -0,0 +1,132 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app, costar_graph
+from graph import CoStarGraph
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+# (actor_id, movie_id): 1 and 2 share two movies, 3 links to 4 through movie 30, 9 is on its own
+CAST = [(1, 10), (2, 10), (1, 20), (2, 20), (3, 20), (3, 30), (4, 30), (9, 90)]
+
+def built():
+    graph = CoStarGraph()
+    graph.rebuild(CAST)
+    return graph
+
+# Test co-stars ranked by shared movies
+def test_costars():
+    graph = built()
+
+    assert graph.costars(1, 10) == [(2, 2), (3, 1)]
+    assert graph.costars(1, 1) == [(2, 2)]
+    assert graph.costars(9, 10) == []
+    assert graph.costars(42, 10) == []
+
+# Test shortest paths in both directions and between unconnected actors
+def test_path():
+    graph = built()
+
+    assert graph.path(1, 4) == [1, 20, 3, 30, 4]
+    assert graph.path(4, 1) == [4, 30, 3, 20, 1]
+    assert graph.path(2, 2) == [2]
+    assert graph.path(1, 9) is None
+    assert graph.path(1, 42) is None
+
+# Test that the overlay and masks apply until the next rebuild
+def test_incremental_updates():
+    graph = built()
+
+    graph.add_cast(9, 10)
+    assert len(graph.path(4, 9)) == 7  # Through actor 1 or 2 and movie 10
+    graph.add_cast(9, 30)
+    assert graph.path(4, 9) == [4, 30, 9]
+
+    graph.remove_movie(30)
+    assert graph.path(4, 9) is None
+    graph.remove_actor(1)
+    assert graph.costars(2, 10) == [(3, 1), (9, 1)]
+
+    graph.rebuild(CAST)
+    assert graph.stats()['added_cast_entries'] == 0
+    assert graph.path(1, 4) == [1, 20, 3, 30, 4]
+
+# Test the co-stars endpoint
+@patch('main.get_db_connection')
+def test_costars_endpoint(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [
+        CAST,
+        [{'actor_id': 1, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'},
+         {'actor_id': 2, 'first_name': 'Tom', 'last_name': 'Hardy'}],
+        [],
+    ]
+
+    response = client.get('/actors/1/costars')
+    missing = client.get('/actors/42/costars')
+
+    assert response.status_code == 200
+    # Actor 3 was deleted since the graph was built
+    assert response.json == {'actor_id': 1, 'costars': [
+        {'actor_id': 2, 'first_name': 'Tom', 'last_name': 'Hardy', 'shared_movies': 2}
+    ]}
+    assert missing.status_code == 404
+
+# Test the path endpoint
+@patch('main.get_db_connection')
+def test_path_endpoint(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    actors = [{'actor_id': actor_id, 'first_name': 'First', 'last_name': f'Last{actor_id}'} for actor_id in (1, 3, 4, 9)]
+    mock_cursor.fetchall.side_effect = [
+        CAST,
+        actors,
+        [{'movie_id': 20, 'movie_title': 'Inception'}, {'movie_id': 30, 'movie_title': 'Dunkirk'}],
+        actors,
+        [],
+    ]
+
+    response = client.get('/actors/1/path/4')
+    unconnected = client.get('/actors/1/path/9')
+
+    assert response.status_code == 200
+    assert response.json['degrees'] == 2
+    assert [node.get('movie_title') or node['last_name'] for node in response.json['path']] == [
+        'Last1', 'Inception', 'Last3', 'Dunkirk', 'Last4'
+    ]
+    assert unconnected.json == {'degrees': None, 'path': []}
+
+# Test that attaching an actor to a movie updates the graph
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_graph_after_attach(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    costar_graph.rebuild(CAST)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [{'movie_id': 30}, {'actor_id': 1}, None]
+
+    response = client.post('/movies/30/actors', json={'actor_id': 1})
+
+    assert response.status_code == 201
+    assert costar_graph.path(1, 4) == [1, 30, 4]
+
+# Test that an actor id sent as a string is stored as an int, and a malformed one is refused
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_graph_after_attach_string_id(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    costar_graph.rebuild(CAST)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [{'movie_id': 30}, {'actor_id': 1}, None]
+
+    response = client.post('/movies/30/actors', json={'actor_id': '1'})
+    malformed = client.post('/movies/30/actors', json={'actor_id': 'tom'})
+
+    assert response.status_code == 201
+    assert costar_graph.path(1, 4) == [1, 30, 4]
+    assert malformed.status_code == 400
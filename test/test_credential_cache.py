@@ -0,0 +1,142 @@
+import pytest
+import time
+import jwt
+from unittest.mock import patch, MagicMock
+from main import app, authenticate, api_key_digest, credential_cache, credential_versions, set_role
+
+SECRET = 'test-secret'
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture(autouse=True)
+def empty_credential_cache():
+    credential_cache.clear()
+    yield
+    credential_cache.clear()
+
+def make_key(exp_in=3600):
+    payload = {'user_id': 1, 'jti': 'a' * 32, 'exp': int(time.time()) + exp_in}
+    return jwt.encode(payload, SECRET, algorithm='HS256')
+
+def mock_connection(mock_db, key, is_admin=0):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'api_key': api_key_digest(key), 'is_admin': is_admin}
+    return mock_cursor
+
+# Test that a verified key is served from the cache on the next request
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_cache_hit_skips_database(mock_db):
+    key = make_key()
+    mock_cursor = mock_connection(mock_db, key)
+    hits, misses = credential_cache.hits, credential_cache.misses
+
+    with app.test_request_context(headers={'Authorization': key}):
+        assert authenticate(role=0)[1] == 200
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=0)
+
+    assert status_code == 200
+    assert response['user_id'] == 1
+    assert mock_cursor.execute.call_count == 1  # Only the first request hit the database
+    assert credential_cache.hits == hits + 1
+    assert credential_cache.misses == misses + 1
+
+# Test that the role check still applies to cached credentials
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_cache_hit_checks_role(mock_db):
+    key = make_key()
+    mock_connection(mock_db, key, is_admin=0)
+
+    with app.test_request_context(headers={'Authorization': key}):
+        assert authenticate(role=0)[1] == 200
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=1)
+
+    assert status_code == 403
+    assert response['message'] == 'Access denied, admin role required'
+
+# Test that a cache entry never outlives the JWT's exp claim
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_cache_entry_bounded_by_exp(mock_db):
+    key = make_key(exp_in=60)
+    mock_connection(mock_db, key)
+
+    with app.test_request_context(headers={'Authorization': key}):
+        authenticate(role=0)
+
+    with patch('cache.time.time', return_value=time.time() + 120):
+        assert credential_cache.get(api_key_digest(key)) is None
+
+# Test that deleting a token evicts it from the cache
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_delete_token_invalidates_cache(mock_db, client):
+    key = make_key()
+    mock_connection(mock_db, key)
+    with app.test_request_context(headers={'Authorization': key}):
+        authenticate(role=0)
+
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = ('a' * 32,)
+    response = client.delete('/tokens/1', headers={'Authorization': key})
+
+    assert response.status_code == 200
+    assert credential_cache.get(api_key_digest(key)) is None
+    assert ('credentials', '*') in [call[0][1] for call in mock_cursor.execute.call_args_list]
+
+# Test that a key deleted or a role changed by another worker stops cache hits once the version moves
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_other_worker_revocation(mock_db):
+    key = make_key()
+    mock_cursor = mock_connection(mock_db, key)
+    with app.test_request_context(headers={'Authorization': key}):
+        authenticate(role=0)
+
+    # The next version check finds the bump, and the key is gone from user_keys
+    mock_cursor.fetchone.side_effect = [(1,), None]
+    with patch('cache.time.time', return_value=time.time() + 2):
+        with app.test_request_context(headers={'Authorization': key}):
+            response, status_code = authenticate(role=0)
+
+    assert status_code == 401
+    assert credential_cache.get(api_key_digest(key)) is None
+
+# Test that a key verified under an older version, and cached after the bump was seen, is looked up again
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_entry_from_older_version_ignored(mock_db):
+    key = make_key()
+    mock_cursor = mock_connection(mock_db, key, is_admin=0)
+    version_cursor = MagicMock()
+    version_cursor.fetchone.return_value = (1,)
+    credential_versions.get(lambda: version_cursor, check=True)
+    credential_cache.set(api_key_digest(key), (1, 1, 0))
+
+    with app.test_request_context(headers={'Authorization': key}):
+        response, status_code = authenticate(role=1)
+
+    assert status_code == 403
+    assert mock_cursor.execute.call_count == 1
+
+# Test that changing a role bumps the credentials version
+@patch('main.get_db_connection')
+def test_set_role(mock_db):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.execute.return_value = 1
+
+    result = app.test_cli_runner().invoke(set_role, ['7', '--admin'])
+
+    assert result.output == 'User 7 is now an admin\n'
+    assert mock_cursor.execute.call_args_list[0][0][1] == (1, 7)
+    assert mock_cursor.execute.call_args_list[1][0][1] == ('credentials', '*')
+    mock_db.return_value.commit.assert_called_once()
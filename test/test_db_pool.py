@@ -0,0 +1,149 @@
+import pytest
+import threading
+from unittest.mock import patch, MagicMock
+from main import app
+from db_pool import ConnectionPool, PoolTimeout
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def make_pool(**kwargs):
+    # Every call to the creator returns a fresh mock connection
+    creator = MagicMock(side_effect=lambda: MagicMock())
+    return ConnectionPool(creator, **kwargs), creator
+
+# Test that a returned connection is reused instead of reconnecting
+def test_pool_reuses_connections():
+    pool, creator = make_pool(max_size=2, max_overflow=0)
+
+    first = pool.connect()
+    raw = first.raw
+    first.close()
+    second = pool.connect()
+
+    assert second.raw is raw
+    assert creator.call_count == 1
+    raw.ping.assert_called_once_with(reconnect=False)
+    raw.close.assert_not_called()
+
+# Test that closing twice only returns the connection once
+def test_pool_double_close():
+    pool, _ = make_pool(max_size=2)
+
+    connection = pool.connect()
+    connection.close()
+    connection.close()
+
+    stats = pool.stats()
+    assert stats['idle'] == 1
+    assert stats['in_use'] == 0
+
+# Test that overflow connections are closed when returned
+def test_pool_overflow_closed_on_return():
+    pool, creator = make_pool(max_size=1, max_overflow=1)
+
+    first = pool.connect()
+    second = pool.connect()
+    assert pool.stats()['overflow'] == 1
+
+    first.close()
+    second.close()
+
+    stats = pool.stats()
+    assert creator.call_count == 2
+    assert stats['open'] == 1
+    assert stats['idle'] == 1
+    second.raw.close.assert_called_once()
+
+# Test that checkout times out when the pool is exhausted
+def test_pool_timeout():
+    pool, _ = make_pool(max_size=1, max_overflow=0, timeout=0.05)
+
+    pool.connect()
+    with pytest.raises(PoolTimeout):
+        pool.connect()
+    assert pool.stats()['timeouts'] == 1
+
+# Test that a waiting thread gets the connection once it is returned
+def test_pool_waiter_woken_on_release():
+    pool, creator = make_pool(max_size=1, max_overflow=0, timeout=5)
+    held = pool.connect()
+    result = {}
+
+    def worker():
+        connection = pool.connect()
+        result['raw'] = connection.raw
+        connection.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    held.close()
+    thread.join(timeout=5)
+
+    assert result['raw'] is held.raw
+    assert creator.call_count == 1
+
+# Test that a connection failing its ping is replaced
+def test_pool_dead_connection_replaced():
+    pool, creator = make_pool(max_size=2)
+
+    connection = pool.connect()
+    dead = connection.raw
+    dead.ping.side_effect = Exception("Gone away")
+    connection.close()
+
+    replacement = pool.connect()
+    assert replacement.raw is not dead
+    assert creator.call_count == 2
+    assert pool.stats()['ping_failures'] == 1
+    assert pool.stats()['open'] == 1
+
+# Test that connections older than the recycle age are replaced
+def test_pool_recycle():
+    pool, creator = make_pool(max_size=2, recycle=10)
+
+    with patch('db_pool.time.monotonic', return_value=100.0):
+        connection = pool.connect()
+        old = connection.raw
+        connection.close()
+
+    with patch('db_pool.time.monotonic', return_value=200.0):
+        fresh = pool.connect()
+
+    assert fresh.raw is not old
+    old.close.assert_called_once()
+    assert pool.stats()['recycled'] == 1
+
+# Test that a failed connect does not leak a pool slot
+def test_pool_connect_failure():
+    creator = MagicMock(side_effect=Exception("Can't connect"))
+    pool = ConnectionPool(creator, max_size=1, max_overflow=0)
+
+    with pytest.raises(Exception):
+        pool.connect()
+
+    stats = pool.stats()
+    assert stats['open'] == 0
+    assert stats['in_use'] == 0
+
+# Test the admin pool statistics endpoint
+@patch('main.authenticate')
+def test_stats_endpoint(mock_auth, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+
+    response = client.get('/stats')
+
+    assert response.status_code == 200
+    assert 'db_pool' in response.json
+    assert 'in_use' in response.json['db_pool']
+
+# Test the statistics endpoint without admin rights
+@patch('main.authenticate')
+def test_stats_endpoint_unauthorized(mock_auth, client):
+    mock_auth.return_value = ({'success': False, 'message': 'Access denied, admin role required'}, 403)
+
+    response = client.get('/stats')
+
+    assert response.status_code == 403
@@ -20,7 +20,8 @@ def test_delete_genre_success(mock_db, mock_authenticate, client):
     mock_db.return_value.cursor.return_value = mock_cursor
 
     # Simulate that the genre exists in the database
-    mock_cursor.fetchone.return_value = {'movie_genres_type': 'Action'}  # Genre exists
+    mock_cursor.fetchone.return_value = {'version': 1}
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]  # Genre exists
     mock_cursor.execute.return_value = None  # Simulate the DELETE queries running without errors
 
     # Simulate the DELETE request to delete the genre 'Action'
@@ -20,7 +20,7 @@ def test_delete_review_success(mock_db, mock_authenticate, client):
     mock_db.return_value.cursor.return_value = mock_cursor
 
     # Simulate the review data
-    mock_cursor.fetchone.return_value = {'user_id': 1}  # Simulate review belonging to the authenticated user
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'movie_id': 1, 'star_rating': 8.0}  # Simulate review belonging to the authenticated user
 
     # Simulate the DELETE request to delete the review
     response = client.delete('/profile/reviews/1')
@@ -62,7 +62,7 @@ def test_delete_review_unauthorized(mock_db, mock_authenticate, client):
     mock_db.return_value.cursor.return_value = mock_cursor
 
     # Simulate the review data (review belongs to another user)
-    mock_cursor.fetchone.return_value = {'user_id': 2}  # Simulate review belonging to user 2
+    mock_cursor.fetchone.return_value = {'user_id': 2, 'movie_id': 1, 'star_rating': 8.0}  # Simulate review belonging to user 2
 
     # Simulate the DELETE request to delete the review
     response = client.delete('/profile/reviews/1')
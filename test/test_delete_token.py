@@ -19,8 +19,8 @@ def test_delete_token_success(mock_auth, mock_db, client):
     mock_cursor = MagicMock()
     mock_db.return_value.cursor.return_value = mock_cursor
 
-    # Simulate token existence
-    mock_cursor.fetchone.return_value = {'api_key': 'dummy_key'}
+    # Simulate token existence (the key id of the stored token)
+    mock_cursor.fetchone.return_value = ('dummy_key_id',)
 
     # Simulate the DELETE request to delete a token
     response = client.delete('/tokens/1')
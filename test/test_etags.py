@@ -0,0 +1,166 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app
+from versions import version_from_row, etag
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def mock_cursor_for(mock_db):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    return mock_cursor
+
+def bumped(mock_cursor, entity):
+    # Every version bump passes the entity name as the first query parameter
+    return [call[0][1] for call in mock_cursor.execute.call_args_list
+            if 'INSERT INTO entity_versions' in call[0][0] and call[0][1][0] == entity]
+
+# Test that entities without a version row start at version 0
+def test_version_from_row():
+    assert version_from_row(None) == 0
+    assert version_from_row({'version': 3}) == 3
+    assert version_from_row((4,)) == 4
+    assert etag('movie', 1, 3) == 'movie-1-3'
+
+# Test that the movie detail carries an ETag
+@patch('main.get_db_connection')
+def test_movie_etag(mock_db, client):
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.side_effect = [{'version': 7}, {'movie_id': 1, 'movie_title': 'Inception'}, None]
+    mock_cursor.fetchall.side_effect = [[], [], []]
+
+    response = client.get('/movies/1')
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"movie-1-7"'
+
+# Test that a matching If-None-Match is answered from the version alone
+@patch('main.get_db_connection')
+def test_movie_not_modified(mock_db, client):
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = {'version': 7}
+
+    response = client.get('/movies/1', headers={'If-None-Match': '"movie-1-7"'})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == '"movie-1-7"'
+    assert mock_cursor.execute.call_count == 1  # No detail queries
+    mock_cursor.fetchall.assert_not_called()
+
+# Test that a stale If-None-Match gets the full movie and the new ETag
+@patch('main.get_db_connection')
+def test_movie_stale_etag(mock_db, client):
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.side_effect = [
+        {'version': 8},  # Conditional version check
+        {'version': 8},  # Version read with the details
+        {'movie_id': 1, 'movie_title': 'Inception'},
+        None  # Rating summary
+    ]
+    mock_cursor.fetchall.side_effect = [[], [], []]
+
+    response = client.get('/movies/1', headers={'If-None-Match': '"movie-1-7"'})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"movie-1-8"'
+    assert response.json['movie']['movie_title'] == 'Inception'
+
+# Test a conditional GET on an actor
+@patch('main.get_db_connection')
+def test_actor_not_modified(mock_db, client):
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = {'version': 2}
+
+    response = client.get('/actors/1', headers={'If-None-Match': '"actor-1-2"'})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"actor-1-2"'
+    assert mock_cursor.execute.call_count == 1
+
+# Test a conditional GET on a genre, checked against the cached genre list
+@patch('main.get_db_connection')
+def test_genre_not_modified(mock_db, client):
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = {'version': 2}
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]
+
+    response = client.get('/genres/action', headers={'If-None-Match': '"genre-Action-2"'})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"genre-Action-2"'
+    mock_cursor.fetchall.assert_called_once()  # Only the genre list was loaded
+
+# Test that the genre list carries an ETag
+@patch('main.get_db_connection')
+def test_genres_etag(mock_db, client):
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = None
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]
+
+    response = client.get('/genres')
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"genres-*-0"'
+
+# Test that the genre list is answered from memory once it has been loaded
+@patch('main.get_db_connection')
+def test_genres_not_modified_from_cache(mock_db, client):
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = {'version': 2}
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]
+
+    first = client.get('/genres')
+    second = client.get('/genres', headers={'If-None-Match': '"genres-*-2"'})
+
+    assert first.json == {'genres': ['Action']}
+    assert second.status_code == 304
+    assert mock_cursor.execute.call_count == 2  # Version and genre list, read once
+
+# Test that updating a movie bumps the movie and the pages that show its title
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_update_movie_bumps_versions(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = (1,)
+
+    response = client.put('/movies/1', json={'title': 'Inception'})
+
+    assert response.status_code == 200
+    assert bumped(mock_cursor, 'movie') == [('movie', '1')]
+    assert bumped(mock_cursor, 'actor') == [('actor', 1)]
+    assert bumped(mock_cursor, 'genre') == [('genre', 1)]
+    mock_db.return_value.commit.assert_called_once()
+
+# Test that adding a review bumps the movie version
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_add_review_bumps_movie(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = (1,)
+
+    response = client.post('/movies/1/reviews', json={'star_rating': 8.0, 'review_text': 'Great'})
+
+    assert response.status_code == 201
+    assert bumped(mock_cursor, 'movie') == [('movie', '1')]
+
+# Test that deleting a genre bumps the genre list, the genre and its movies
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_delete_genre_bumps_versions(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = mock_cursor_for(mock_db)
+    mock_cursor.fetchone.return_value = {'version': 1}
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]
+
+    response = client.delete('/genres/Action')
+
+    assert response.status_code == 200
+    assert bumped(mock_cursor, 'genres') == [('genres', '*')]
+    assert bumped(mock_cursor, 'genre') == [('genre', 'Action')]
+    assert bumped(mock_cursor, 'movie') == [('movie', 'Action')]
@@ -0,0 +1,74 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def export_connections(mock_pool, mock_multi_pool, batches, details):
+    # The details are read from the pool that allows several statements per query
+    movie_connection, detail_connection = MagicMock(), MagicMock()
+    movie_connection.cursor.return_value.fetchmany.side_effect = batches
+    detail_connection.cursor.return_value.fetchall.side_effect = details
+    mock_pool.connect.return_value = movie_connection
+    mock_multi_pool.connect.return_value = detail_connection
+    return movie_connection, detail_connection
+
+# Test that every movie is streamed as one JSON line with its actors, genres and rating
+@patch('main.multi_statement_pool')
+@patch('main.db_pool')
+@patch('main.authenticate')
+def test_export_catalog(mock_auth, mock_pool, mock_multi_pool, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    movie_connection, detail_connection = export_connections(mock_pool, mock_multi_pool, [
+        [{'movie_id': 1, 'movie_title': 'Inception'}, {'movie_id': 2, 'movie_title': 'Heat'}],
+        [{'movie_id': 3, 'movie_title': 'Alien'}],
+        [],
+    ], [
+        [{'movie_id': 1, 'actor_id': 10, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}],
+        [{'movie_id': 1, 'movie_genres_type': 'Sci-Fi'}, {'movie_id': 2, 'movie_genres_type': 'Crime'}],
+        [],
+        [], [{'movie_id': 3, 'movie_genres_type': 'Horror'}], [],
+    ])
+
+    with patch('main.EXPORT_BATCH_SIZE', 2):
+        response = client.get('/export/catalog.ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert [movie['movie_id'] for movie in lines] == [1, 2, 3]
+    assert lines[0]['actors'] == [{'actor_id': 10, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}]
+    assert lines[1]['genres'] == ['Crime'] and lines[1]['actors'] == []
+    assert lines[2]['rating']['review_count'] == 0
+    movie_connection.cursor.return_value.fetchmany.assert_called_with(2)
+    movie_connection.close.assert_called_once()
+    detail_connection.close.assert_called_once()
+
+# Test that a connection abandoned mid-stream is not returned to the pool
+@patch('main.multi_statement_pool')
+@patch('main.db_pool')
+@patch('main.authenticate')
+def test_export_catalog_abandoned(mock_auth, mock_pool, mock_multi_pool, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    movie_connection, detail_connection = export_connections(
+        mock_pool, mock_multi_pool, [[{'movie_id': 1, 'movie_title': 'Inception'}]], [[], [], []]
+    )
+
+    response = client.get('/export/catalog.ndjson', buffered=False)
+    next(response.response)
+    response.close()
+
+    movie_connection.invalidate.assert_called_once()
+    movie_connection.close.assert_not_called()
+    detail_connection.close.assert_called_once()
+
+# Test that only admins can export
+@patch('main.authenticate')
+def test_export_catalog_forbidden(mock_auth, client):
+    mock_auth.return_value = ({'success': False, 'error': 'Unauthorized'}, 403)
+
+    assert client.get('/export/catalog.ndjson').status_code == 403
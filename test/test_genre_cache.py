@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+from cache import VersionedValue
+
+def versioned(versions, check_interval=60):
+    # read_version returns the next version on every check
+    loads = []
+    value = VersionedValue(
+        lambda cursor: loads.append(1) or len(loads),
+        lambda cursor: versions.pop(0),
+        check_interval=check_interval
+    )
+    return value, loads
+
+# Test that the value is loaded once and served from memory within the interval
+def test_versioned_value_reused():
+    value, loads = versioned([1])
+    cursor = MagicMock()
+
+    assert value.get(cursor) == (1, 1)
+    assert value.get(cursor) == (1, 1)
+    assert cursor.call_count == 1
+    assert value.stats()['hits'] == 1
+
+# Test that a forced check reloads only when the version moved
+def test_versioned_value_check():
+    value, loads = versioned([1, 1, 2])
+    cursor = MagicMock()
+
+    value.get(cursor)
+    assert value.get(cursor, check=True) == (1, 1)
+    assert value.get(cursor, check=True) == (2, 2)
+    assert len(loads) == 2
+
+# Test that the version is re-read once the interval has passed
+def test_versioned_value_interval():
+    value, loads = versioned([1, 2], check_interval=0)
+    cursor = MagicMock()
+
+    value.get(cursor)
+    assert value.get(cursor) == (2, 2)
+
+# Test that invalidate() forces a reload even at the same version
+def test_versioned_value_invalidate():
+    value, loads = versioned([1, 1])
+    cursor = MagicMock()
+
+    value.get(cursor)
+    value.invalidate()
+    assert value.get(cursor) == (1, 2)
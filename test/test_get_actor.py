@@ -16,6 +16,7 @@ def test_actor_by_id_success(mock_db, client):
 
     # Simulate actor details being returned
     mock_cursor.fetchone.side_effect = [
+        {'version': 1},  # Version lookup
         {'actor_id': 1, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'},  # Actor details
     ]
 
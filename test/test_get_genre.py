@@ -15,13 +15,16 @@ def test_genre_by_type_success(mock_db, client):
     mock_cursor = MagicMock()
     mock_db.return_value.cursor.return_value = mock_cursor
 
-    # Simulate the genre query result
-    mock_cursor.fetchone.return_value = {'movie_genres_type': 'Action'}
+    # Simulate the version lookups
+    mock_cursor.fetchone.return_value = {'version': 1}
 
-    # Simulate the movies associated with the genre
-    mock_cursor.fetchall.return_value = [
-        {'movie_id': 1, 'movie_title': 'Action Movie 1'},
-        {'movie_id': 2, 'movie_title': 'Action Movie 2'}
+    # Simulate the genre list and the movies associated with the genre
+    mock_cursor.fetchall.side_effect = [
+        [{'movie_genres_type': 'Action'}],
+        [
+            {'movie_id': 1, 'movie_title': 'Action Movie 1'},
+            {'movie_id': 2, 'movie_title': 'Action Movie 2'}
+        ]
     ]
 
     # Simulate the GET request to fetch movies for the genre 'Action'
@@ -14,12 +14,12 @@ def test_movie_by_id_success(mock_db, client):
     mock_cursor = MagicMock()
     mock_db.return_value.cursor.return_value = mock_cursor
     
-    # Simulate the movie details being returned
-    mock_cursor.fetchone.return_value = {
+    # Simulate the version and the movie details being returned
+    mock_cursor.fetchone.side_effect = [{'version': 1}, {
         'movie_id': 1,
         'movie_title': 'Inception',
         'release_year': 2010
-    }
+    }, None]  # No rating summary yet
 
     # Simulate the reviews for the movie
     mock_cursor.execute.return_value = None  # Reset the cursor behavior between queries
@@ -40,6 +40,37 @@ def test_movie_by_id_success(mock_db, client):
     assert b'DiCaprio' in response.data  # Actor last name in the response
     assert b'Sci-Fi' in response.data  # Genre in the response
 
+# Test that the movie details are fetched in a single round trip
+@patch('main.get_db_connection')  # Mock the database connection
+def test_movie_by_id_single_round_trip(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [
+        {'version': 1},
+        {'movie_id': 1, 'movie_title': 'Inception'},
+        {'review_count': 1, 'rating_sum': 5.0, **{f'bucket_{n}': int(n == 5) for n in range(11)}}
+    ]
+    mock_cursor.fetchall.side_effect = [
+        [{'star_rating': 5, 'review_text': 'Amazing movie!'}],  # Reviews
+        [{'actor_id': 1, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}],  # Actors
+        [{'movie_genres_type': 'Action'}]  # Genres
+    ]
+
+    response = client.get('/movies/1')
+
+    # One execute with six statements, read back as six result sets
+    assert response.status_code == 200
+    assert mock_cursor.execute.call_count == 1
+    assert mock_cursor.nextset.call_count == 5
+    assert response.json == {'movie': {
+        'movie_id': 1,
+        'movie_title': 'Inception',
+        'reviews': [{'star_rating': 5, 'review_text': 'Amazing movie!'}],
+        'actors': [{'actor_id': 1, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}],
+        'genres': ['Action'],
+        'rating': {'review_count': 1, 'average_rating': 5.0, 'histogram': [0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0]}
+    }}
+
 # Test for when no movie is found by ID
 @patch('main.get_db_connection')  # Mock the database connection
 def test_movie_by_id_not_found(mock_db, client):
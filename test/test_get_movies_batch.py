@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+# Test for retrieving several movies with all expansions
+@patch('main.get_db_connection')  # Mock the database connection
+def test_movies_by_ids_expanded(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [
+        [{'movie_id': 1, 'movie_title': 'Inception'}, {'movie_id': 2, 'movie_title': 'Tenet'}],  # Movies
+        [{'movie_id': 1, 'actor_id': 7, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}],  # Actors
+        [{'movie_id': 1, 'movie_genres_type': 'Sci-Fi'}, {'movie_id': 2, 'movie_genres_type': 'Action'}],  # Genres
+        [{'movie_id': 2, 'review_count': 2, 'rating_sum': 15.0,
+          **{f'bucket_{n}': 0 for n in range(11)}, 'bucket_7': 1, 'bucket_8': 1}]  # Ratings
+    ]
+
+    response = client.get('/movies?ids=2,1,3&expand=actors,genres,rating')
+
+    assert response.status_code == 200
+    assert response.json == {
+        'movies': [
+            {'movie_id': 2, 'movie_title': 'Tenet', 'actors': [], 'genres': ['Action'],
+             'rating': {'review_count': 2, 'average_rating': 7.5,
+                        'histogram': [0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0]}},
+            {'movie_id': 1, 'movie_title': 'Inception',
+             'actors': [{'actor_id': 7, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}],
+             'genres': ['Sci-Fi'], 'rating': {'review_count': 0, 'average_rating': None, 'histogram': [0] * 11}}
+        ],
+        'not_found': [3]
+    }
+
+# Test that the number of queries does not depend on the number of ids
+@patch('main.get_db_connection')  # Mock the database connection
+def test_movies_by_ids_fixed_queries(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+
+    ids = ','.join(str(movie_id) for movie_id in range(1, 51))
+    response = client.get(f'/movies?ids={ids}&expand=actors,genres')
+
+    assert response.status_code == 200
+    assert mock_cursor.execute.call_count == 1
+    sql, params = mock_cursor.execute.call_args[0]
+    assert sql.count(';') == 2  # movies, actors and genres
+    assert len(params) == 150
+
+# Test that the number of ids per request is bounded
+@patch('main.MAX_BATCH_IDS', 3)
+def test_movies_by_ids_too_many(client):
+    response = client.get('/movies?ids=1,2,3,4')
+
+    assert response.status_code == 400
+    assert b'At most 3 ids' in response.data
+
+# Test for malformed ids and unknown expansions
+def test_movies_by_ids_invalid(client):
+    assert client.get('/movies?ids=1,abc').status_code == 400
+    assert client.get('/movies?ids=1&expand=trailers').status_code == 400
+
+# Test for a database error
+@patch('main.get_db_connection')  # Mock the database connection
+def test_movies_by_ids_internal_error(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.execute.side_effect = Exception("Database error")
+
+    response = client.get('/movies?ids=1,2')
+
+    assert response.status_code == 500
@@ -0,0 +1,77 @@
+import pytest
+import threading
+from unittest.mock import patch, MagicMock
+from main import app
+from hashing import HashingPool, HashingBusy
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+# Test that hashing and checking round-trip through worker processes
+def test_process_pool_roundtrip():
+    pool = HashingPool(workers=1, max_queue=1, rounds=4)
+    try:
+        hashed = pool.hashpw(b'password123')
+        assert pool.checkpw(b'password123', hashed)
+        assert not pool.checkpw(b'wrongpassword', hashed)
+        assert pool.stats()['completed'] == 3
+    finally:
+        pool.shutdown()
+
+# Test that work beyond the queue limit is rejected instead of queued
+def test_pool_rejects_when_saturated():
+    pool = HashingPool(workers=1, max_queue=0, retry_after=5, rounds=4, use_processes=False)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_hash(password, rounds):
+        started.set()
+        release.wait(5)
+        return 0.0, b'hash'
+
+    with patch('hashing._hashpw', slow_hash):
+        thread = threading.Thread(target=pool.hashpw, args=(b'password123',))
+        thread.start()
+        started.wait(5)
+
+        with pytest.raises(HashingBusy) as error:
+            pool.hashpw(b'password123')
+
+        release.set()
+        thread.join(5)
+
+    assert error.value.retry_after == 5
+    assert pool.stats()['rejected'] == 1
+    assert pool.stats()['in_flight'] == 0
+    pool.shutdown()
+
+# Test that a saturated pool turns signin into a 503 with Retry-After
+@patch('main.get_db_connection')
+@patch('main.hashing_pool')
+def test_signin_busy(mock_pool, mock_db, client):
+    mock_pool.checkpw.side_effect = HashingBusy(3)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'password': 'hash', 'is_admin': False}
+
+    response = client.post('/signin', json={'username': 'new_user', 'password': 'password123'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+
+# Test that a saturated pool turns signup into a 503 with Retry-After
+@patch('main.get_db_connection')
+@patch('main.hashing_pool')
+def test_signup_busy(mock_pool, mock_db, client):
+    mock_pool.hashpw.side_effect = HashingBusy(2)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None
+
+    response = client.post('/signup', json={'username': 'new_user', 'password': 'password123'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '2'
+    mock_db.return_value.commit.assert_not_called()
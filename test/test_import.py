@@ -0,0 +1,146 @@
+import io
+import json
+import pymysql
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app, movie_bitmaps
+from catalog_import import CatalogImport, INSERT_SQL, ndjson_records, csv_records
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def ndjson(*records):
+    return '\n'.join(json.dumps(record) for record in records).encode('utf-8')
+
+def import_cursor(existing_links=()):
+    # The genre list is read first, then the stored links of every batch
+    connection = MagicMock()
+    cursor = connection.cursor.return_value
+    cursor.fetchall.side_effect = [[('Action',), ('Drama',)], *existing_links]
+    return connection, cursor
+
+def written(cursor, kind):
+    return [params for call in cursor.executemany.call_args_list if call[0][0] == INSERT_SQL[kind]
+            for params in call[0][1]]
+
+# Test that NDJSON lines are parsed one at a time, keeping malformed lines as errors
+def test_ndjson_records():
+    body = b'{"type": "genre", "movie_genres_type": "Noir"}\n\n{"movie_title": "Heat"}\nnot json\n[1]\n'
+
+    records = list(ndjson_records(io.BytesIO(body), default_type='movie'))
+
+    assert records[0] == (1, {'type': 'genre', 'movie_genres_type': 'Noir'})
+    assert records[1] == (3, {'type': 'movie', 'movie_title': 'Heat'})
+    assert [line for line, record in records if isinstance(record, ValueError)] == [4, 5]
+
+# Test that CSV rows carry their line number and empty cells become None
+def test_csv_records():
+    body = b'type,movie_id,movie_title\r\nmovie,,Heat\r\n,7,"Alien, Director\'s Cut"\r\n'
+
+    records = list(csv_records(io.BytesIO(body), default_type='movie'))
+
+    assert records == [
+        (2, {'type': 'movie', 'movie_id': None, 'movie_title': 'Heat'}),
+        (3, {'type': 'movie', 'movie_id': '7', 'movie_title': "Alien, Director's Cut"}),
+    ]
+
+# Test that records are written in batches, parents first, with invalid rows reported
+def test_import_batches():
+    connection, cursor = import_cursor(existing_links=[[(1, 'Action')], [(1, 'Action'), (1, 'Noir')]])
+    importer = CatalogImport(connection, batch_size=3)
+
+    report = importer.run([
+        (1, {'type': 'movie_genre', 'movie_id': 1, 'movie_genres_type': 'noir'}),
+        (2, {'type': 'genre', 'movie_genres_type': 'Noir'}),
+        (3, {'type': 'movie', 'movie_id': 1, 'movie_title': 'Heat'}),
+        (4, {'type': 'movie_genre', 'movie_id': 1, 'movie_genres_type': 'noir'}),
+        (5, {'type': 'movie_genre', 'movie_id': 1, 'movie_genres_type': 'action'}),
+        (6, {'type': 'actor', 'first_name': 'Al'}),
+        (7, {'type': 'movie_actor', 'movie_id': 'one', 'actor_id': 2}),
+        (8, {'type': 'review'}),
+        (9, {'type': 'actor', 'first_name': 'Al', 'last_name': 'Pacino'}),
+    ])
+
+    assert report['rows'] == 9
+    assert report['batches'] == 2
+    assert report['imported'] == {'genre': 1, 'movie': 1, 'actor': 1, 'movie_actor': 0, 'movie_genre': 2}
+    assert report['errors'] == [
+        {'line': 1, 'error': 'Genre not found: noir'},
+        {'line': 6, 'error': 'first_name and last_name are required'},
+        {'line': 7, 'error': 'movie_id must be an integer'},
+        {'line': 8, 'error': 'Unknown record type: review'},
+    ]
+    # Linked with the stored spelling, once; the link to Action already existed
+    assert written(cursor, 'movie_genre') == [(1, 'Noir')]
+    assert written(cursor, 'actor') == [(None, 'Al', 'Pacino')]
+    statements = [call[0][0] for call in cursor.executemany.call_args_list]
+    assert statements.index(INSERT_SQL['genre']) < statements.index(INSERT_SQL['movie_genre'])
+    assert connection.commit.call_count == 2
+
+# Test that a failing batch statement is retried row by row and only the bad rows are reported
+def test_import_row_errors():
+    connection, cursor = import_cursor(existing_links=[[]])
+
+    # Actor 99 does not exist
+    def executemany(sql, rows):
+        if sql == INSERT_SQL['movie_actor'] and (1, 99) in rows:
+            raise pymysql.err.IntegrityError(1452, 'Cannot add or update a child row')
+    cursor.executemany.side_effect = executemany
+    cursor.execute.side_effect = lambda sql, params=None: executemany(sql, [params])
+
+    report = CatalogImport(connection).run([
+        (1, {'type': 'movie_actor', 'movie_id': 1, 'actor_id': 2}),
+        (2, {'type': 'movie_actor', 'movie_id': 1, 'actor_id': 99}),
+    ])
+
+    assert report['imported']['movie_actor'] == 1
+    assert report['errors'] == [{'line': 2, 'error': 'Cannot add or update a child row'}]
+    assert 'ROLLBACK TO SAVEPOINT import_rows' in [call[0][0] for call in cursor.execute.call_args_list]
+
+# Test the endpoint streams NDJSON into the database and reloads the in-memory structures
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_import_endpoint(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    connection, cursor = import_cursor()
+    mock_db.return_value = connection
+    movie_bitmaps.rebuild([1], [], [])
+
+    response = client.post('/import?batch_size=2', data=ndjson(
+        {'type': 'movie', 'movie_title': 'Heat'},
+        {'type': 'actor', 'first_name': 'Al', 'last_name': 'Pacino'},
+        {'type': 'movie', 'title': 'Alien'},
+    ), content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    assert response.json['rows'] == 3 and response.json['failed'] == 0
+    assert response.json['imported']['movie'] == 2
+    assert response.json['batches'] == 2
+    assert response.json['rows_per_second'] > 0
+    assert movie_bitmaps.needs_rebuild()
+
+# Test that CSV takes the record type from ?type=
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_import_csv_endpoint(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    connection, cursor = import_cursor()
+    mock_db.return_value = connection
+
+    response = client.post('/import?type=actor', data=b'first_name,last_name\nAl,Pacino\nRobert,\n',
+                           content_type='text/csv')
+
+    assert response.status_code == 200
+    assert response.json['imported']['actor'] == 1
+    assert response.json['errors'] == [{'line': 3, 'error': 'first_name and last_name are required'}]
+
+# Test unsupported formats and batch sizes
+@patch('main.authenticate')
+def test_import_bad_requests(mock_auth, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+
+    assert client.post('/import', json={'type': 'movie'}).status_code == 415
+    assert client.post('/import?batch_size=0', data=b'', content_type='text/csv').status_code == 400
+    assert client.post('/import?batch_size=x', data=b'', content_type='text/csv').status_code == 400
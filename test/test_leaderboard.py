@@ -0,0 +1,154 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app, rebuild_once
+from leaderboard import Leaderboard
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+MOVIES = [
+    (1, 'Inception', 100, 880.0),   # 8.8 over many reviews
+    (2, 'Obscure', 1, 10.0),        # A single perfect review
+    (3, 'Tenet', 50, 375.0),        # 7.5
+    (4, 'Unreviewed', None, None),
+]
+GENRES = [(1, 'Sci-Fi'), (3, 'Sci-Fi'), (2, 'Drama')]
+
+def built(prior=10):
+    board = Leaderboard(prior=prior)
+    board.rebuild(MOVIES, GENRES)
+    return board
+
+def ranking(board, genre=None):
+    return [movie['movie_id'] for movie in board.top(10, genre)]
+
+# Test that a single review is pulled towards the mean and does not top the list
+def test_bayesian_ranking():
+    board = built()
+
+    assert ranking(board) == [1, 2, 3]
+    assert board.top(2)[1]['score'] == 8.525  # (10 * 1265 / 151 + 10) / 11
+    assert ranking(board, 'Sci-Fi') == [1, 3]
+    assert board.top(1)[0]['average_rating'] == 8.8
+    assert board.top(10, 'Comedy') == []
+
+# Test that review writes move a movie without a rebuild
+def test_incremental_rate():
+    board = built()
+    for _ in range(200):
+        board.rate(3, 1, 10.0)
+    assert ranking(board) == [3, 1, 2]
+    assert ranking(board, 'Sci-Fi') == [3, 1]
+
+    board.rate(4, 1, 9.0)  # First review of an unranked movie
+    assert 4 in ranking(board)
+
+    board.rate(4, -1, -9.0)
+    assert 4 not in ranking(board)
+
+# Test that deltas cannot give a movie a negative review count
+def test_rate_unknown_and_negative():
+    board = built(prior=1)
+
+    board.rate(42, -1, -8.0)  # A movie created by another worker since the rebuild
+    assert board.stats()['movies'] == 4
+
+    board.rate(2, -1, -10.0)
+    board.rate(2, -1, -10.0)  # Its other review was already deleted by another worker
+    assert 2 not in ranking(board)
+    board.rate(2, 1, 6.0)
+    assert board.top(10)[-1]['average_rating'] == 6.0
+
+# Test genre and movie removal
+def test_remove_genre_and_movie():
+    board = built()
+    board.add_genre(2, 'Sci-Fi')
+    assert ranking(board, 'Sci-Fi') == [1, 2, 3]
+
+    board.remove_genre('Sci-Fi')
+    assert ranking(board, 'Sci-Fi') == []
+
+    board.remove_movie(1)
+    assert ranking(board) == [2, 3]
+
+# Test that updates before the first rebuild are ignored
+def test_updates_before_rebuild():
+    board = Leaderboard()
+    board.rate(1, 1, 10.0)
+    board.add_movie(5, 'New')
+
+    assert board.needs_rebuild()
+    assert board.top(10) == []
+
+# Test the endpoint, building the rankings on first use
+@patch('main.get_db_connection')
+def test_top_movies(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [MOVIES, GENRES]
+
+    response = client.get('/movies/top?limit=2')
+    again = client.get('/movies/top?limit=2')
+
+    assert response.status_code == 200
+    assert [movie['movie_title'] for movie in response.json['movies']] == ['Inception', 'Obscure']
+    assert again.json == response.json
+    assert mock_cursor.execute.call_count == 2  # Built once
+
+# Test filtering by a genre that does not exist
+@patch('main.get_db_connection')
+def test_top_movies_unknown_genre(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'version': 1}
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}]
+
+    response = client.get('/movies/top?genre=Western')
+
+    assert response.status_code == 404
+
+# Test an invalid limit
+def test_top_movies_bad_limit(client):
+    response = client.get('/movies/top?limit=abc')
+
+    assert response.status_code == 400
+
+# Test that concurrent requests rebuild once: they wait for the first build, then serve the old one
+def test_rebuild_once():
+    board = Leaderboard(refresh_interval=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def rebuild():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        board.rebuild(MOVIES, GENRES)
+
+    first = threading.Thread(target=rebuild_once, args=(board, rebuild))
+    first.start()
+    started.wait(5)
+    waiting = threading.Thread(target=rebuild_once, args=(board, rebuild))
+    waiting.start()
+    time.sleep(0.05)
+    assert waiting.is_alive()  # Nothing to serve yet
+    release.set()
+    first.join()
+    waiting.join()
+    assert len(calls) == 1
+
+    # Once stale, the loser returns straight away and serves the current board
+    started.clear()
+    release.clear()
+    with patch('leaderboard.time.time', return_value=time.time() + 120):
+        first = threading.Thread(target=rebuild_once, args=(board, rebuild))
+        first.start()
+        started.wait(5)
+        rebuild_once(board, rebuild)
+        assert len(calls) == 2
+        release.set()
+        first.join()
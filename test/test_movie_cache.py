@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app, movie_cache
+from cache import LRUCache
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def mock_detail(mock_db, version=1):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [
+        {'version': version},
+        {'movie_id': 1, 'movie_title': 'Inception'},
+        None
+    ]
+    mock_cursor.fetchall.side_effect = [
+        [{'star_rating': 5, 'review_text': 'Amazing movie!'}],
+        [{'actor_id': 3, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}],
+        [{'movie_genres_type': 'Sci-Fi'}]
+    ]
+    return mock_cursor
+
+# Test that entries are evicted once their total size exceeds maxbytes
+def test_lru_maxbytes():
+    cache = LRUCache(maxsize=10, maxbytes=10, sizeof=len)
+    cache.set('a', b'12345')
+    cache.set('b', b'12345')
+    cache.set('c', b'123')
+
+    assert cache.get('a') is None
+    assert cache.get('b') == b'12345'
+    assert cache.stats()['bytes'] == 8
+
+    cache.set('d', b'12345678901')  # Larger than the whole cache
+    assert cache.get('d') is None
+    assert cache.stats()['bytes'] == 8
+
+# Test that a repeated movie detail is served from the cache after a version check
+@patch('main.get_db_connection')
+def test_movie_detail_cached(mock_db, client):
+    mock_cursor = mock_detail(mock_db)
+    first = client.get('/movies/1')
+
+    mock_cursor.fetchone.side_effect = [{'version': 1}]
+    second = client.get('/movies/1')
+
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.headers['ETag'] == '"movie-1-1"'
+    assert mock_cursor.execute.call_count == 2  # Detail query, then the version check
+    assert mock_cursor.fetchall.call_count == 3
+
+# Test that a cached body is not served once another worker bumped the version
+@patch('main.get_db_connection')
+def test_movie_detail_stale_version(mock_db, client):
+    mock_detail(mock_db)
+    client.get('/movies/1')
+
+    mock_cursor = mock_detail(mock_db, version=2)
+    mock_cursor.fetchone.side_effect = [
+        {'version': 2},  # Version check of the cached entry
+        {'version': 2},
+        {'movie_id': 1, 'movie_title': 'Inception'},
+        None
+    ]
+    response = client.get('/movies/1')
+
+    assert response.headers['ETag'] == '"movie-1-2"'
+    assert mock_cursor.fetchall.call_count == 3  # Details read again
+    assert movie_cache.get(1)[0] == 2
+
+# Test that writes drop the cached movie and the movies of an updated actor
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_movie_detail_invalidated(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+
+    mock_detail(mock_db)
+    client.get('/movies/1')
+    mock_db.return_value.cursor.return_value.fetchone.side_effect = None
+    response = client.put('/actors/3', json={'first_name': 'Leo', 'last_name': 'DiCaprio'})
+    assert response.status_code == 200
+    assert movie_cache.get(1) is None
+
+    mock_detail(mock_db)
+    client.get('/movies/1')
+    mock_db.return_value.cursor.return_value.fetchone.side_effect = None
+    response = client.post('/movies/1/reviews', json={'star_rating': 8.0, 'review_text': 'Great'})
+    assert response.status_code == 201
+    assert movie_cache.get(1) is None
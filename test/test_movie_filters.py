@@ -0,0 +1,132 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app, movie_bitmaps
+from bitmaps import Bitmap, MovieBitmaps, ARRAY_MAX
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+MOVIES = [1, 2, 3, 4, 5]
+MOVIE_GENRES = [(1, 'Action'), (1, 'Sci-Fi'), (2, 'Action'), (3, 'Action'), (3, 'Horror'), (4, 'Drama')]
+MOVIE_ACTORS = [(1, 10), (2, 10), (3, 10), (4, 11)]
+
+def built():
+    bitmaps = MovieBitmaps()
+    bitmaps.rebuild(MOVIES, MOVIE_GENRES, MOVIE_ACTORS)
+    return bitmaps
+
+# Test set operations on small and chunked bitmaps against Python sets
+def test_bitmap_operations():
+    dense = set(range(0, 200000, 3))
+    sparse = {5, 6, 70000, 150000, 199998}
+    for a in (dense, sparse):
+        for b in (dense, sparse, set(range(60000, 140000))):
+            assert sorted((Bitmap.from_ids(a) & Bitmap.from_ids(b)).page(-1, len(a))) == sorted(a & b)
+            assert len(Bitmap.from_ids(a) - Bitmap.from_ids(b)) == len(a - b)
+
+# Test that ids can be paged through in order
+def test_bitmap_page():
+    bitmap = Bitmap.from_ids(range(0, 300000, 7))
+
+    assert bitmap.page(0, 3) == [7, 14, 21]
+    assert bitmap.page(65534, 2) == [65541, 65548]
+    assert bitmap.page(299999, 10) == []
+
+# Test that a bitmap switches representation as it grows and shrinks
+def test_bitmap_add_discard():
+    bitmap = Bitmap()
+    for i in range(ARRAY_MAX + 1):
+        bitmap.add(i * 2)
+    assert bitmap._chunks is not None
+    assert len(bitmap) == ARRAY_MAX + 1 and 8 in bitmap and 9 not in bitmap
+
+    for i in range(ARRAY_MAX + 1):
+        bitmap.discard(i * 2)
+    assert len(bitmap) == 0 and bitmap.page(-1, 10) == []
+
+# Test genre intersection, exclusion, cast filters and facet counts
+def test_query():
+    bitmaps = built()
+
+    assert bitmaps.query(['Action']) == (3, [1, 2, 3], {'Action': 3, 'Sci-Fi': 1, 'Horror': 1})
+    assert bitmaps.query(['Action'], ['Horror'], [10], after=1) == (2, [2], {'Action': 2, 'Sci-Fi': 1})
+    assert bitmaps.query(['Action', 'Drama'])[0] == 0
+    assert bitmaps.query(actors=[99])[0] == 0
+
+# Test that writes are reflected without a rebuild
+def test_incremental_updates():
+    bitmaps = built()
+
+    bitmaps.add_movie(6)
+    bitmaps.add_genre(6, 'Horror')
+    bitmaps.add_actor(6, 10)
+    assert bitmaps.query(['Horror'], actors=[10])[1] == [3, 6]
+
+    bitmaps.remove_movie(3)
+    bitmaps.remove_actor(11)
+    bitmaps.remove_genre('Sci-Fi')
+    assert bitmaps.query(['Horror'])[1] == [6]
+    assert bitmaps.query(actors=[11])[0] == 0
+    assert 'Sci-Fi' not in bitmaps.query()[2]
+
+def filter_cursor(mock_db, titles):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'version': 1}
+    mock_cursor.fetchall.side_effect = [
+        [{'movie_genres_type': genre} for genre in ('Action', 'Sci-Fi', 'Horror', 'Drama')],
+        [(movie_id,) for movie_id in MOVIES], MOVIE_GENRES, MOVIE_ACTORS,
+        titles,
+    ]
+    return mock_cursor
+
+# Test the endpoint filters case-insensitively and pages through the matches
+@patch('main.get_db_connection')
+def test_filter_endpoint(mock_db, client):
+    filter_cursor(mock_db, [{'movie_id': 1, 'movie_title': 'Inception'}, {'movie_id': 2, 'movie_title': 'Heat'}])
+
+    response = client.get('/movies?genre=action&exclude_genre=horror&actor=10&limit=1')
+
+    assert response.status_code == 200
+    assert response.json['movies'] == [{'movie_id': 1, 'movie_title': 'Inception'}]
+    assert response.json['total'] == 2
+    assert response.json['facets'] == {'genres': {'Action': 2, 'Sci-Fi': 1}}
+    assert response.json['next_cursor']
+    assert movie_bitmaps.stats()['movies'] == 5
+
+# Test that a movie deleted since the last rebuild is skipped without losing the next page
+@patch('main.get_db_connection')
+def test_filter_endpoint_stale_movie(mock_db, client):
+    filter_cursor(mock_db, [{'movie_id': 1, 'movie_title': 'Inception'}])
+
+    response = client.get('/movies?genre=action&limit=2')
+
+    assert response.json['movies'] == [{'movie_id': 1, 'movie_title': 'Inception'}]
+    assert response.json['next_cursor']
+    assert response.json['total'] == 2
+    assert movie_bitmaps.query(['Action'])[1] == [1, 3]
+
+# Test that an actor id sent as a string is filtered on like the int ids in ?actor=
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_filter_after_attach_string_id(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    movie_bitmaps.rebuild(MOVIES, MOVIE_GENRES, MOVIE_ACTORS)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [{'movie_id': 5}, {'actor_id': 10}, None]
+
+    response = client.post('/movies/5/actors', json={'actor_id': '10'})
+
+    assert response.status_code == 201
+    assert movie_bitmaps.query(actors=[10])[1] == [1, 2, 3, 5]
+
+# Test unknown genres and malformed actor ids
+@patch('main.get_db_connection')
+def test_filter_endpoint_errors(mock_db, client):
+    filter_cursor(mock_db, [])
+
+    assert client.get('/movies?genre=Western').status_code == 404
+    assert client.get('/movies?actor=tom').status_code == 400
@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app
+from pagination import encode_cursor, decode_cursor
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def mock_rows(mock_db, rows):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = rows
+    return mock_cursor
+
+# Test that cursors round-trip and reject garbage
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+# Test that a list fitting in one page keeps the original response shape
+@patch('main.get_db_connection')
+def test_movies_unpaginated_shape(mock_db, client):
+    mock_rows(mock_db, [{'movie_id': 1, 'movie_title': 'Inception'}])
+
+    response = client.get('/movies')
+
+    assert response.status_code == 200
+    assert response.json == {'movies': [{'movie_id': 1, 'movie_title': 'Inception'}]}
+
+# Test that a page is cut at the limit and returns a cursor for the next one
+@patch('main.get_db_connection')
+def test_movies_first_page(mock_db, client):
+    mock_cursor = mock_rows(mock_db, [
+        {'movie_id': 1, 'movie_title': 'Inception'},
+        {'movie_id': 2, 'movie_title': 'Interstellar'},
+        {'movie_id': 3, 'movie_title': 'Tenet'}  # Extra row signalling another page
+    ])
+
+    response = client.get('/movies?limit=2')
+
+    assert response.status_code == 200
+    assert [movie['movie_id'] for movie in response.json['movies']] == [1, 2]
+    assert decode_cursor(response.json['next_cursor']) == 2
+    assert mock_cursor.execute.call_args[0][1] == (0, 3)
+
+# Test that the cursor continues after the last key of the previous page
+@patch('main.get_db_connection')
+def test_movies_next_page(mock_db, client):
+    mock_cursor = mock_rows(mock_db, [{'movie_id': 3, 'movie_title': 'Tenet'}])
+
+    response = client.get(f'/movies?limit=2&cursor={encode_cursor(2)}')
+
+    assert response.status_code == 200
+    assert response.json['next_cursor'] is None
+    assert mock_cursor.execute.call_args[0][1] == (2, 3)
+
+# Test that the page size is capped by the server
+@patch('main.PAGE_SIZE_MAX', 10)
+@patch('main.get_db_connection')
+def test_page_size_capped(mock_db, client):
+    mock_cursor = mock_rows(mock_db, [{'actor_id': 1, 'first_name': 'Leonardo', 'last_name': 'DiCaprio'}])
+
+    response = client.get('/actors?limit=1000')
+
+    assert response.status_code == 200
+    assert mock_cursor.execute.call_args[0][1] == (0, 11)
+
+# Test that a large unpaginated list is cut to the maximum page size
+@patch('main.PAGE_SIZE_MAX', 2)
+@patch('main.get_db_connection')
+def test_unpaginated_large_list(mock_db, client):
+    mock_rows(mock_db, [{'actor_id': i, 'first_name': 'A', 'last_name': 'B'} for i in (1, 2, 3)])
+
+    response = client.get('/actors')
+
+    assert len(response.json['actors']) == 2
+    assert decode_cursor(response.json['next_cursor']) == 2
+
+# Test that malformed pagination parameters are rejected
+@patch('main.get_db_connection')
+def test_invalid_page_parameters(mock_db, client):
+    mock_rows(mock_db, [])
+
+    assert client.get('/movies?limit=0').status_code == 400
+    assert client.get('/movies?limit=abc').status_code == 400
+    assert client.get('/movies?cursor=not-a-cursor').status_code == 400
+    assert client.get('/movies/1/reviews?cursor=not-a-cursor').status_code == 400
+
+# Test that movies of a genre are paginated inside the genre object
+@patch('main.get_db_connection')
+def test_genre_movies_paginated(mock_db, client):
+    mock_cursor = mock_rows(mock_db, None)
+    mock_cursor.fetchone.return_value = {'version': 1}
+    mock_cursor.fetchall.side_effect = [
+        [{'movie_genres_type': 'Sci-Fi'}],  # Genre cache
+        [{'movie_id': 1, 'movie_title': 'Inception'}, {'movie_id': 2, 'movie_title': 'Interstellar'}]
+    ]
+
+    response = client.get('/genres/Sci-Fi?limit=1')
+
+    assert response.status_code == 200
+    assert response.json['genre']['movies'] == [{'movie_id': 1, 'movie_title': 'Inception'}]
+    assert decode_cursor(response.json['next_cursor']) == 1
+
+# Test that the admin review list is paginated
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_all_reviews_paginated(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_rows(mock_db, [{'review_id': 5}, {'review_id': 6}])
+
+    response = client.get('/reviews?limit=1')
+
+    assert response.status_code == 200
+    assert response.json['reviews'] == [{'review_id': 5}]
+    assert decode_cursor(response.json['next_cursor']) == 5
@@ -0,0 +1,123 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app
+from ratings import bucket_column, summary
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def rating_row(**buckets):
+    row = {'review_count': sum(buckets.values()), 'rating_sum': 0.0}
+    row.update({f'bucket_{n}': buckets.get(f'bucket_{n}', 0) for n in range(11)})
+    return row
+
+def executed(mock_cursor, table):
+    return [call[0] for call in mock_cursor.execute.call_args_list if table in call[0][0]]
+
+# Test the bucket a star rating is counted in
+def test_bucket_column():
+    assert bucket_column(0.0) == 'bucket_0'
+    assert bucket_column(7.9) == 'bucket_7'
+    assert bucket_column(10.0) == 'bucket_10'
+
+# Test the summary of a movie with and without reviews
+def test_summary():
+    row = rating_row(bucket_7=1, bucket_9=1)
+    row['rating_sum'] = 16.5
+    assert summary(row) == {
+        'review_count': 2,
+        'average_rating': 8.25,
+        'histogram': [0, 0, 0, 0, 0, 0, 0, 1, 0, 1, 0]
+    }
+    assert summary(None) == {'review_count': 0, 'average_rating': None, 'histogram': [0] * 11}
+
+# Test that adding a review increments the movie's summary
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_add_review_updates_rating(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'movie_id': 1}
+
+    response = client.post('/movies/1/reviews', json={'star_rating': 8.5, 'review_text': 'Great'})
+
+    assert response.status_code == 201
+    [(query, params)] = executed(mock_cursor, 'movie_ratings')
+    assert 'bucket_8 = bucket_8 + 1' in query
+    assert params == (1, 8.5, 8.5)
+
+# Test that updating a review moves it between buckets
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_update_review_updates_rating(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'movie_id': 3, 'star_rating': 4.0}
+
+    response = client.put('/profile/reviews/1', json={'star_rating': 9.0, 'review_text': 'Better'})
+
+    assert response.status_code == 200
+    [(query, params)] = executed(mock_cursor, 'movie_ratings')
+    assert 'bucket_4 = bucket_4 - 1' in query
+    assert 'bucket_9 = bucket_9 + 1' in query
+    assert params == (4.0, 9.0, 3)
+
+# Test that deleting a review decrements the movie's summary
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_delete_review_updates_rating(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'review_id': 1, 'movie_id': 3, 'star_rating': 10.0}
+
+    response = client.delete('/reviews/1')
+
+    assert response.status_code == 200
+    [(query, params)] = executed(mock_cursor, 'movie_ratings')
+    assert 'review_count = review_count - 1' in query
+    assert 'bucket_10 = bucket_10 - 1' in query
+    assert params == (10.0, 3)
+
+# Test reading a movie's rating summary
+@patch('main.get_db_connection')
+def test_movie_rating(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    row = rating_row(bucket_6=1)
+    row.update({'found_movie_id': 1, 'rating_sum': 6.0})
+    mock_cursor.fetchone.return_value = row
+
+    response = client.get('/movies/1/rating')
+
+    assert response.status_code == 200
+    assert response.json['rating']['average_rating'] == 6.0
+    assert mock_cursor.execute.call_count == 1
+
+# Test the rating of a movie that does not exist
+@patch('main.get_db_connection')
+def test_movie_rating_not_found(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None
+
+    response = client.get('/movies/999/rating')
+
+    assert response.status_code == 404
+
+# Test the command that recomputes every summary
+@patch('main.get_db_connection')
+def test_rebuild_ratings_command(mock_db):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.rowcount = 12
+
+    result = app.test_cli_runner().invoke(args=['rebuild-ratings'])
+
+    assert 'Rebuilt rating summaries for 12 movies' in result.output
+    assert executed(mock_cursor, 'DELETE FROM movie_ratings')
+    mock_db.return_value.commit.assert_called_once()
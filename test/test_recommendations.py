@@ -0,0 +1,105 @@
+import os
+from decimal import Decimal
+import numpy as np
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app
+from recommend import FactorModel, ModelFile, train
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def ratings():
+    # Users 1-20 love movies 1-5 and dislike 6-10, users 21-40 the opposite; each leaves one movie unrated
+    triples = []
+    for user_id in range(1, 41):
+        liked = range(1, 6) if user_id <= 20 else range(6, 11)
+        for movie_id in range(1, 11):
+            if movie_id != user_id % 10 + 1:
+                triples.append((user_id, movie_id, 9.0 if movie_id in liked else 2.0))
+    return triples
+
+def rated_by(user_id):
+    return [movie_id for movie_id in range(1, 11) if movie_id != user_id % 10 + 1]
+
+@pytest.fixture
+def model_path(tmp_path):
+    path = str(tmp_path / 'recommendations.model')
+    train(ratings(), factors=4, iterations=10)[0].save(path)
+    return path
+
+# Test that training fits the ratings and generalises to the unrated movie of each group
+def test_train_and_recommend():
+    model, rmse = train(ratings(), factors=4, iterations=10)
+
+    assert rmse < 0.5
+    assert model.recommend(1, 5, exclude=rated_by(1)) == [(2, pytest.approx(9.0, abs=1.5))]
+    assert model.recommend(21, 5, exclude=rated_by(21)) == [(2, pytest.approx(2.0, abs=1.5))]
+    assert model.recommend(1, 1)[0][0] in range(1, 6)
+    # Users the model has never seen still get something
+    assert len(model.recommend(999, 3)) == 3
+
+# Test training from a one-pass stream of rows with DECIMAL ratings, as the streamed cursor yields them
+def test_train_from_stream():
+    model, rmse = train(iter([(u, m, Decimal(str(r))) for u, m, r in ratings()]), factors=4, iterations=10)
+
+    assert rmse < 0.5
+    assert model.user_ids.dtype == np.int64 and len(model.movie_ids) == 10
+    with pytest.raises(ValueError):
+        train(iter([]))
+
+# Test that a saved model is memory-mapped back unchanged
+def test_save_and_load(model_path):
+    model, _ = train(ratings(), factors=4, iterations=10)
+    loaded = FactorModel.load(model_path)
+
+    assert isinstance(loaded.movie_factors, np.memmap)
+    assert not loaded.movie_factors.flags.writeable
+    assert np.array_equal(loaded.user_factors, model.user_factors)
+    assert loaded.recommend(1, 3) == model.recommend(1, 3)
+
+# Test that workers pick up a newly trained model file
+def test_model_file_reload(tmp_path):
+    path = str(tmp_path / 'recommendations.model')
+    model_file = ModelFile(path, check_interval=0)
+    assert model_file.get() is None
+
+    train(ratings(), factors=4, iterations=2)[0].save(path)
+    first = model_file.get()
+    assert first is not None and model_file.get() is first
+
+    train(ratings()[:100], factors=4, iterations=2)[0].save(path)
+    assert model_file.get() is not first
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+# Test the endpoint excludes reviewed movies and returns titles
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_recommendations_endpoint(mock_auth, mock_db, client, model_path):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [
+        [{'movie_id': movie_id} for movie_id in rated_by(1) if movie_id != 10],
+        [{'movie_id': 2, 'movie_title': 'Inception'}],
+    ]
+
+    with patch('main.recommendation_model', ModelFile(model_path)):
+        response = client.get('/profile/recommendations?limit=2')
+
+    assert response.status_code == 200
+    assert response.json['recommendations'][0]['movie_title'] == 'Inception'
+    assert 0.0 <= response.json['recommendations'][0]['predicted_rating'] <= 10.0
+    assert len(response.json['recommendations']) == 1  # Movie 10 was deleted
+
+# Test the response before any model has been trained
+@patch('main.authenticate')
+def test_recommendations_not_trained(mock_auth, client, tmp_path):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+
+    with patch('main.recommendation_model', ModelFile(str(tmp_path / 'missing.model'))):
+        response = client.get('/profile/recommendations')
+
+    assert response.status_code == 503
@@ -0,0 +1,87 @@
+import pytest
+import time
+from unittest.mock import patch, MagicMock
+import main
+from main import app, get_db_connection, session_store
+from sessions import new_session_id, sign_session_id
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+# Test that every caller within a request shares one pooled connection
+@patch('main.db_pool')
+def test_single_connection_per_request(mock_pool):
+    pooled = MagicMock()
+    mock_pool.connect.return_value = pooled
+
+    with app.test_request_context('/movies'):
+        first = get_db_connection()
+        first.close()  # Closing inside the request must not release the connection
+        second = get_db_connection()
+        second.cursor()
+
+        assert mock_pool.connect.call_count == 1
+        pooled.close.assert_not_called()
+        pooled.cursor.assert_called_once()
+
+    # The teardown hook releases the connection exactly once
+    pooled.close.assert_called_once()
+
+# Test that no connection is checked out when a request never uses the database
+@patch('main.db_pool')
+def test_connection_opened_lazily(mock_pool):
+    with app.test_request_context('/signout'):
+        pass
+
+    mock_pool.connect.assert_not_called()
+
+# Test that authenticate() and the route handler share the same connection
+@patch('main.SECRET_KEY', 'test-secret')
+@patch('main.db_pool')
+def test_authenticated_route_uses_one_connection(mock_pool, client):
+    pooled = MagicMock()
+    mock_pool.connect.return_value = pooled
+    mock_cursor = MagicMock()
+    pooled.cursor.return_value = mock_cursor
+
+    # authenticate() reads the user, then the handler checks and updates the movie
+    mock_cursor.fetchone.return_value = {'password': 'hash', 'is_admin': 1, 'movie_id': 1}
+
+    session_id = new_session_id()
+    session_store.set(session_id, {'user_id': 1, 'hashed_password': 'hash'}, time.time() + 60)
+    client.set_cookie('session_id', sign_session_id('test-secret', session_id))
+    response = client.put('/movies/1', json={'title': 'Inception'})
+
+    assert response.status_code == 200
+    assert mock_pool.connect.call_count == 1
+    pooled.close.assert_called_once()
+
+# Test that connections outside of a request come straight from the pool
+@patch('main.db_pool')
+def test_connection_outside_request(mock_pool):
+    pooled = MagicMock()
+    mock_pool.connect.return_value = pooled
+
+    connection = get_db_connection()
+    connection.close()
+
+    assert connection is pooled
+    pooled.close.assert_called_once()
+
+# Test that only the multi-statement reads get a connection that allows stacked statements
+@patch('main.multi_statement_pool')
+@patch('main.db_pool')
+def test_multi_statement_connection(mock_pool, mock_multi_pool):
+    with app.test_request_context('/movies/1'):
+        get_db_connection().cursor()
+        get_db_connection(multi_statements=True).cursor()
+        get_db_connection(multi_statements=True).cursor()
+
+        assert mock_pool.connect.call_count == 1
+        assert mock_multi_pool.connect.call_count == 1
+
+    mock_pool.connect.return_value.close.assert_called_once()
+    mock_multi_pool.connect.return_value.close.assert_called_once()
+    assert 'client_flag' not in main.db_config
@@ -0,0 +1,100 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app, review_index
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def mock_reviews(mock_db, *fetched):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [
+        [
+            (1, 10, 'Great plot twist at the end'),
+            (2, 10, 'Boring, no twist at all. Twist? What twist?'),
+            (3, 20, 'The twist was spoiled by the trailer'),
+            (4, 20, None),
+        ],
+        *fetched
+    ]
+    return mock_cursor
+
+# Test that admins get reviews ranked by relevance with their movie and author
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_search_all_reviews(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_cursor = mock_reviews(mock_db, [
+        {'review_id': 1, 'movie_id': 10, 'star_rating': 9, 'review_text': 'Great plot twist at the end',
+         'movie_title': 'Inception', 'username': 'ann'},
+        {'review_id': 2, 'movie_id': 10, 'star_rating': 3, 'review_text': 'Boring, no twist at all. Twist? What twist?',
+         'movie_title': 'Inception', 'username': 'bob'},
+    ])
+
+    response = client.get('/reviews/search?q=plot twist&limit=2')
+
+    assert response.status_code == 200
+    assert [review['review_id'] for review in response.json['reviews']] == [1, 2]
+    assert response.json['reviews'][0]['username'] == 'ann'
+    assert response.json['reviews'][0]['score'] > response.json['reviews'][1]['score']
+    mock_auth.assert_called_once_with(role=1)
+    # Only the ranked reviews are fetched
+    assert mock_cursor.execute.call_args[0][1] == [1, 2]
+
+# Test that per-movie search only ranks that movie's reviews and skips ones deleted meanwhile
+@patch('main.get_db_connection')
+def test_search_movie_reviews(mock_db, client):
+    mock_cursor = mock_reviews(mock_db, [
+        {'review_id': 3, 'star_rating': 4, 'review_text': 'The twist was spoiled by the trailer'},
+    ])
+
+    response = client.get('/movies/20/reviews/search?q=twist')
+
+    assert response.status_code == 200
+    assert mock_cursor.execute.call_args[0][1] == [3]
+    assert response.json['reviews'] == [
+        {'review_id': 3, 'star_rating': 4, 'review_text': 'The twist was spoiled by the trailer',
+         'score': response.json['reviews'][0]['score']}
+    ]
+
+    mock_cursor.fetchall.side_effect = [[]]
+    assert client.get('/movies/20/reviews/search?q=twist').json == {'reviews': []}
+
+# Test that review writes keep the index in sync
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_review_index_after_writes(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 5}, 200)
+    review_index.rebuild([])  # Built, so writes are applied
+
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'movie_id': 10}
+
+    # Like pymysql, every statement resets lastrowid; only the review INSERT generates an id
+    def execute(sql, params=None):
+        mock_cursor.lastrowid = 7 if sql.startswith('INSERT INTO review') else 0
+    mock_cursor.execute.side_effect = execute
+    client.post('/movies/10/reviews', json={'star_rating': 8, 'review_text': 'Dreamlike visuals'})
+    assert [key for _, key, _ in review_index.search('dreamlike', 10)] == [(10, 7)]
+
+    mock_cursor.fetchone.return_value = {'user_id': 5, 'movie_id': 10, 'star_rating': 8}
+    client.put('/profile/reviews/7', json={'star_rating': 6, 'review_text': 'Confusing visuals'})
+    assert review_index.search('dreamlike', 10) == []
+    assert [key for _, key, _ in review_index.search('confusing', 10)] == [(10, 7)]
+
+    mock_cursor.fetchone.return_value = {'review_id': 7, 'movie_id': 10, 'star_rating': 6}
+    client.delete('/reviews/7')
+    assert review_index.search('confusing', 10) == []
+
+# Test the required query parameter and admin check
+@patch('main.authenticate')
+def test_review_search_requires_query(mock_auth, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    assert client.get('/reviews/search').status_code == 400
+    assert client.get('/movies/1/reviews/search?q=').status_code == 400
+
+    mock_auth.return_value = ({'success': False, 'message': 'Forbidden'}, 403)
+    assert client.get('/reviews/search?q=twist').status_code == 403
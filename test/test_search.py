@@ -0,0 +1,133 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app
+from search import InvertedIndex, edit_distance, fold, tokenize
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+def mock_catalog(mock_db):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [
+        [(1, 'Inception'), (2, 'Amélie'), (3, 'The Dark Knight'), (4, 'The Dark Knight Rises')],
+        [(7, 'Leonardo', 'DiCaprio'), (8, 'Audrey', 'Tautou')]
+    ]
+    return mock_cursor
+
+# Test case and diacritic folding
+def test_fold_and_tokenize():
+    assert fold('Amélie') == 'amelie'
+    assert tokenize("The Dark-Knight: RISES") == ['the', 'dark', 'knight', 'rises']
+
+# Test that shorter documents rank higher for the same match and misses return nothing
+def test_bm25_ranking():
+    index = InvertedIndex()
+    index.rebuild([
+        (1, 'The Dark Knight Rises', 'rises'),
+        (2, 'The Dark Knight', 'knight'),
+        (3, 'Inception', 'inception'),
+    ])
+
+    assert [key for _, key, _ in index.search('dark knight', 10)] == [2, 1]
+    assert [key for _, key, _ in index.search('rises', 10)] == [1]
+    assert index.search('matrix', 10) == []
+
+# Test the bounded edit distance
+def test_edit_distance():
+    assert edit_distance('knight', 'knight', 2) == 0
+    assert edit_distance('nihgt', 'night', 2) == 2
+    assert edit_distance('incepton', 'inception', 1) == 1
+    assert edit_distance('matrix', 'inception', 2) is None
+
+# Test that fuzzy matches rank below exact ones and short words are not expanded
+def test_fuzzy_search():
+    index = InvertedIndex()
+    index.rebuild([
+        (1, 'The Dark Knight', 'knight'),
+        (2, 'The Dark Night', 'night'),
+        (3, 'Inception', 'inception'),
+        (4, 'It', 'it'),
+    ])
+
+    assert index.search('incepton', 10) == []
+    assert [key for _, key, _ in index.search('incepton', 10, max_distance=1)] == [3]
+    assert [key for _, key, _ in index.search('knight', 10, max_distance=1)] == [1, 2]
+    assert [key for _, key, _ in index.search('at', 10, max_distance=2)] == []
+
+    # Trigrams of removed terms are dropped with them
+    index.remove(3)
+    assert index.search('incepton', 10, max_distance=1) == []
+    assert not any('inception' in terms for terms in index._grams.values())
+
+# Test incremental updates
+def test_incremental_updates():
+    index = InvertedIndex()
+    index.add(1, 'Ignored', None)  # Not built yet
+    index.rebuild([])
+
+    index.add(1, 'Inception', 'first')
+    index.add(1, 'Interstellar', 'second')
+    assert [payload for _, _, payload in index.search('interstellar', 10)] == ['second']
+    assert index.search('inception', 10) == []
+
+    index.remove(1)
+    assert index.search('interstellar', 10) == []
+    assert index.stats()['terms'] == 0
+
+# Test the search endpoint over movies and actors
+@patch('main.get_db_connection')
+def test_search_endpoint(mock_db, client):
+    mock_cursor = mock_catalog(mock_db)
+
+    response = client.get('/search?q=amelie')
+    actors = client.get('/search?q=audrey&type=actor')
+    none = client.get('/search?q=audrey&type=movie')
+
+    assert response.status_code == 200
+    assert response.json['results'][0]['movie_title'] == 'Amélie'
+    assert actors.json['results'][0] == {
+        'type': 'actor', 'actor_id': 8, 'first_name': 'Audrey', 'last_name': 'Tautou',
+        'score': actors.json['results'][0]['score']
+    }
+    assert none.json == {'results': []}
+    assert mock_cursor.execute.call_count == 2  # Index built once
+
+# Test that catalog writes keep the index in sync
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_search_after_writes(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    mock_catalog(mock_db)
+    client.get('/search?q=inception')
+
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'movie_id': 1}
+
+    client.put('/movies/1', json={'title': 'Origin'})
+    assert client.get('/search?q=inception').json == {'results': []}
+    assert client.get('/search?q=origin').json['results'][0]['movie_id'] == 1
+
+    client.delete('/actors/7')
+    assert client.get('/search?q=dicaprio').json == {'results': []}
+
+# Test fuzzy mode on the search endpoint
+@patch('main.get_db_connection')
+def test_search_endpoint_fuzzy(mock_db, client):
+    mock_catalog(mock_db)
+
+    assert client.get('/search?q=dekaprio').json == {'results': []}
+    response = client.get('/search?q=dekaprio&mode=fuzzy')
+    assert response.json['results'][0]['actor_id'] == 7
+    assert client.get('/search?q=dekaprio&mode=fuzzy&distance=1').json == {'results': []}
+
+# Test the required query parameter
+def test_search_requires_query(client):
+    assert client.get('/search').status_code == 400
+    assert client.get('/search?q=x&type=genre').status_code == 400
+    assert client.get('/search?q=x&mode=regex').status_code == 400
+    assert client.get('/search?q=x&mode=fuzzy&distance=3').status_code == 400
+    assert client.get('/search?q=x&mode=fuzzy&distance=one').status_code == 400
@@ -0,0 +1,95 @@
+import pytest
+import time
+from unittest.mock import patch, MagicMock
+from main import app, session_store
+from sessions import MemorySessionStore, SQLiteSessionStore, sign_session_id, unsign_session_id
+
+SECRET = 'test-secret'
+PASSWORD_HASH = '$2b$12$l7lWkLH2sR9BnmZp.fDU2eSHl2zds4urS.psP6O0EeE904nzGK/tK'  # bcrypt hash of 'password123'
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+# Test that a session id only unsigns with the key it was signed with
+def test_session_id_signature():
+    cookie = sign_session_id(SECRET, 'abc')
+
+    assert unsign_session_id(SECRET, cookie) == 'abc'
+    assert unsign_session_id('other-secret', cookie) is None
+    assert unsign_session_id(SECRET, 'abc.forged') is None
+
+# Test that the memory store drops expired sessions when read
+def test_memory_store_expiry():
+    store = MemorySessionStore(shards=4)
+    store.set('live', {'user_id': 1}, time.time() + 60)
+    store.set('dead', {'user_id': 2}, time.time() - 1)
+
+    assert store.get('live') == {'user_id': 1}
+    assert store.get('dead') is None
+    assert len(store) == 1
+
+# Test that the memory store sweeps expired sessions that are never read again
+def test_memory_store_sweep():
+    store = MemorySessionStore(shards=1, sweep_interval=0)
+    store.set('dead', {'user_id': 2}, time.time() - 1)
+    store.get('other')
+
+    assert len(store) == 0
+
+# Test that sessions written by one worker are visible to another
+def test_sqlite_store_shared(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    worker_a = SQLiteSessionStore(path)
+    worker_b = SQLiteSessionStore(path)
+
+    worker_a.set('sid', {'user_id': 1, 'is_admin': 0}, time.time() + 60)
+    assert worker_b.get('sid') == {'user_id': 1, 'is_admin': 0}
+
+    worker_b.delete('sid')
+    assert worker_a.get('sid') is None
+
+# Test that the SQLite store ignores and sweeps expired sessions
+def test_sqlite_store_expiry(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.sqlite3'), sweep_interval=0)
+    store.set('dead', {'user_id': 1}, time.time() - 1)
+
+    assert store.get('dead') is None
+    count = store._connection().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+    assert count == 0
+
+# Test that signin creates a session that authenticates later requests and signout ends it
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_signin_session_signout(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'password': PASSWORD_HASH, 'is_admin': 0}
+
+    response = client.post('/signin', json={'username': 'new_user', 'password': 'password123'})
+    assert response.status_code == 200
+    session_id = unsign_session_id(SECRET, client.get_cookie('session_id').value)
+    assert session_store.get(session_id)['user_id'] == 1
+
+    # The session cookie authenticates the next request
+    mock_cursor.fetchall.return_value = [('api_key_1',)]
+    assert client.get('/tokens').status_code == 200
+
+    response = client.post('/signout')
+    assert response.status_code == 200
+    assert session_store.get(session_id) is None
+    assert client.get_cookie('session_id') is None
+    assert client.get('/tokens').status_code == 401
+
+# Test that sessions are not shared between clients
+@patch('main.SECRET_KEY', SECRET)
+@patch('main.get_db_connection')
+def test_sessions_not_shared(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = {'user_id': 1, 'password': PASSWORD_HASH, 'is_admin': 0}
+    client.post('/signin', json={'username': 'new_user', 'password': 'password123'})
+
+    with app.test_client() as other_client:
+        assert other_client.get('/tokens').status_code == 401
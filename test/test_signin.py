@@ -7,6 +7,7 @@ def client():
         yield client
 
 # Test for successful signup followed by signin
+@patch('main.SECRET_KEY', 'test-secret')
 @patch('main.get_db_connection')  # Mock the database connection
 def test_signin_success(mock_db, client):
     # Mock the database cursor for signup
@@ -34,6 +35,8 @@ def test_signin_success(mock_db, client):
     assert b'Login successful' in signin_response.data
     assert b'user_id' in signin_response.data
     assert b'is_admin' in signin_response.data
+    assert 'session_id=' in signin_response.headers['Set-Cookie']
+    assert 'HttpOnly' in signin_response.headers['Set-Cookie']
 
 
 # Test for invalid password
@@ -0,0 +1,132 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from main import app, similar_movies
+from similar import SimilarMovies, actor_feature, genre_feature
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+# Movies 1 and 2 share their whole cast, 3 only the genre, 4 shares nothing with them
+CAST = [(1, 10), (1, 11), (1, 12), (2, 10), (2, 11), (2, 12), (3, 50), (4, 99)]
+GENRES = [(1, 'Action'), (2, 'Action'), (3, 'Action'), (4, 'Drama')]
+
+def built():
+    index = SimilarMovies()
+    index.rebuild(CAST, GENRES)
+    return index
+
+# Test the weighted Jaccard similarity; a genre counts for half an actor
+def test_similarity():
+    index = SimilarMovies(genre_weight=0.5)
+    a = {actor_feature(10), actor_feature(11), genre_feature('Action')}
+    b = {actor_feature(10), genre_feature('Action'), genre_feature('Drama')}
+
+    assert index.similarity(a, a) == 1.0
+    assert index.similarity(a, b) == pytest.approx(1.5 / 3)
+    assert index.similarity(a, {actor_feature(99)}) == 0.0
+
+# Test that identical movies are found and unrelated ones are not
+def test_similar():
+    index = built()
+
+    assert index.similar(1, 10)[0] == (2, 1.0)
+    assert 4 not in dict(index.similar(1, 10))
+    assert index.similar(42, 10) == []
+
+# Test that added cast and genres are rehashed until the next rebuild
+def test_incremental_updates():
+    index = built()
+
+    for actor_id in (10, 11, 12):
+        index.add_actor(4, actor_id)
+    index.add_genre(4, 'Action')
+    assert dict(index.similar(1, 10))[4] == pytest.approx(3.5 / 5)
+    assert index.stats()['changed_movies'] == 1
+
+    index.remove_movie(2)
+    index.remove_movie(4)
+    assert 2 not in dict(index.similar(1, 10))
+    assert index.stats()['changed_movies'] == 0
+
+# Test that deleted actors and genres leave the features of every movie that had them
+def test_remove_actor_and_genre():
+    index = built()
+
+    index.remove_actor(50)
+    index.remove_genre('Action')
+    assert index.similarity(index._features[1], {actor_feature(10), actor_feature(11), actor_feature(12)}) == 1.0
+    assert 3 not in index._features
+    assert index.similar(1, 10)[0] == (2, 1.0)
+    assert index.stats()['changed_movies'] == 2
+
+    index.remove_genre('Drama')
+    assert index.similar(4, 10) == []
+
+# Test that a large catalog of overlapping casts finds most of the truly similar movies
+def test_recall():
+    cast, genres = [], []
+    for movie_id in range(2000):
+        family = movie_id // 10
+        cast += [(movie_id, family * 100 + actor) for actor in range(8) if (movie_id + actor) % 5]
+        genres.append((movie_id, f'genre{family % 7}'))
+    index = SimilarMovies()
+    index.rebuild(cast, genres)
+
+    queries = range(0, 2000, 37)
+    found = sum(
+        len([other for other, _ in index.similar(movie_id, 9) if other // 10 == movie_id // 10])
+        for movie_id in queries
+    )
+    assert found >= 0.9 * 9 * len(queries)
+
+# Test the endpoint
+@patch('main.get_db_connection')
+def test_similar_endpoint(mock_db, client):
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.side_effect = [
+        CAST, GENRES,
+        [{'movie_id': 1, 'movie_title': 'Inception'}, {'movie_id': 2, 'movie_title': 'Inception 2'}],
+        [],
+    ]
+
+    response = client.get('/movies/1/similar')
+    missing = client.get('/movies/42/similar')
+
+    assert response.status_code == 200
+    assert response.json['similar'][0] == {'movie_id': 2, 'movie_title': 'Inception 2', 'similarity': 1.0}
+    assert missing.status_code == 404
+
+# Test that attaching a genre to a movie updates the index
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_similar_after_attach(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    similar_movies.rebuild(CAST, GENRES)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [{'movie_id': 3}, {'version': 1}, None]
+    mock_cursor.fetchall.return_value = [{'movie_genres_type': 'Action'}, {'movie_genres_type': 'Drama'}]
+
+    response = client.post('/movies/3/genres', json={'movie_genres_type': 'drama'})
+
+    assert response.status_code == 201
+    assert similar_movies.stats()['changed_movies'] == 1
+
+# Test that an actor id sent as a string is hashed as the int the rebuild uses
+@patch('main.get_db_connection')
+@patch('main.authenticate')
+def test_similar_after_attach_string_id(mock_auth, mock_db, client):
+    mock_auth.return_value = ({'success': True, 'user_id': 1}, 200)
+    similar_movies.rebuild(CAST, GENRES)
+    mock_cursor = MagicMock()
+    mock_db.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = [{'movie_id': 4}, {'actor_id': 10}, None]
+
+    response = client.post('/movies/4/actors', json={'actor_id': '10'})
+
+    assert response.status_code == 201
+    assert actor_feature(10) in similar_movies._features[4]
+    assert all(similarity > 0 for _, similarity in similar_movies.similar(4, 10))